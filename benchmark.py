@@ -0,0 +1,208 @@
+from environment import Environment
+from simulation import Simulation
+from floorplan_generator import generate_floorplan
+import argparse
+import json
+import os
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+
+FLOORPLANS = ["./floorplans/floorplan_001.txt", "./floorplans/floorplan_002.txt"]
+SIZES = [20, 200, 1000, 2000]
+
+
+def best_of(func, number: int, repeat: int = 5) -> float:
+    """
+    :return: float   best seconds per call over repeat timings of number calls
+    """
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def bench_ticks(env_map: str, runs: int = 20, ticks: int = 1000) -> dict:
+    """
+    Full Robot.act() + Station.act() loop, seeded runs
+    """
+    total_ticks = 0
+    start = time.perf_counter()
+
+    for seed in range(runs):
+        total_ticks += Simulation(env_map, seed=seed).run(ticks)["ticks"]
+
+    elapsed = time.perf_counter() - start
+
+    return {"ticks": total_ticks, "ticks_per_sec": total_ticks / elapsed}
+
+
+def bench_components(env_map: str) -> dict:
+    """
+    Per call cost (seconds) of the hot functions in one tick
+    """
+    sim = Simulation(env_map, seed=0)
+    env, robot = sim.enviroment, sim.robot
+    logic = robot.logic
+    sensors = env.get_cells(robot.position)
+
+    def facts():
+        logic.reset_facts()
+        logic.update_facts_from_sensors(sensors, robot.orientation)
+
+    facts()
+    logic.update_battery_life(robot.battery)
+    logic.update_last_action(robot.last_action)
+
+    reading = env.sense(robot.position)
+
+    def codes():
+        logic.reset_facts()
+        logic.update_facts_from_codes(reading, robot.orientation)
+
+    # same decision through a (hit every time) decision cache
+    cached = Simulation(env_map, seed=0)
+    cached.cache_decisions()
+
+    return {
+        "get_cells"                 : best_of(lambda: env.get_cells(robot.position), 20000),
+        "sense"                     : best_of(lambda: env.sense(robot.position), 20000),
+        "update_facts_from_sensors" : best_of(facts, 20000),
+        "update_facts_from_codes"   : best_of(codes, 20000),
+        "decide_action"             : best_of(logic.decide_action, 20000),
+        "decide_from_codes"         : best_of(lambda: logic.decide_from_codes(reading, robot.orientation, robot.battery, robot.last_action), 20000),
+        "decide_from_codes_cached"  : best_of(lambda: cached.robot.logic.decide_from_codes(reading, robot.orientation, robot.battery, robot.last_action), 20000),
+        "environment_str"           : best_of(lambda: frame(sim), 2000),
+    }
+
+
+def frame(sim: Simulation) -> str:
+    """
+    One tick worth of rendering, the robot cell changes then the map is printed
+    """
+    sim.enviroment.rotate_robot(sim.robot.position, sim.robot.orientation)
+    return str(sim.enviroment)
+
+
+def bench_scaling(size: int, ticks: int = 200, seed: int = 0) -> dict:
+    """
+    Load / tick / render cost and peak memory on a generated size x size map
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        env_map = os.path.join(tmp, f"rooms_{size}.txt")
+        generate_floorplan(env_map, size, size, room_size=min(12, size - 1), seed=seed)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        env = Environment(env_map)
+        load_time = time.perf_counter() - start
+        load_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        # first open writes the binary cache, time the second
+        Environment(env_map, use_cache=True)
+        start = time.perf_counter()
+        Environment(env_map, use_cache=True)
+        cached_load_time = time.perf_counter() - start
+
+        sim = Simulation(env_map, seed=seed)
+        start = time.perf_counter()
+        ran = sim.run(ticks)["ticks"]
+        tick_time = time.perf_counter() - start
+
+        render_time = best_of(lambda: frame(sim), 1, repeat=3)
+
+    return {
+        "size"          : size,
+        "cells"         : size * size,
+        "load_time"     : load_time,
+        "load_peak_mb"  : load_peak / 2**20,
+        "cached_load"   : cached_load_time,
+        "ticks_per_sec" : ran / tick_time if tick_time else 0.0,
+        "str_time"      : render_time,
+    }
+
+
+def run_benchmarks(sizes: list = SIZES, runs: int = 20) -> dict:
+    results = {"ticks": {}, "components": {}, "scaling": []}
+
+    for env_map in FLOORPLANS:
+        name = os.path.basename(env_map)
+        results["ticks"][name] = bench_ticks(env_map, runs)
+        results["components"][name] = bench_components(env_map)
+
+    for size in sizes:
+        results["scaling"].append(bench_scaling(size))
+
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    :return: list of str   regressions worse than tolerance (0.5 = 50%) vs the baseline
+    """
+    regressions = []
+
+    for name, ticks in baseline.get("ticks", {}).items():
+        now = results["ticks"].get(name)
+        if now and now["ticks_per_sec"] < ticks["ticks_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name} ticks/sec {ticks['ticks_per_sec']:.0f} -> {now['ticks_per_sec']:.0f}")
+
+    for name, components in baseline.get("components", {}).items():
+        for component, seconds in components.items():
+            now = results["components"].get(name, {}).get(component)
+            if now and now > seconds * (1 + tolerance):
+                regressions.append(f"{name} {component} {seconds * 1e6:.2f}us -> {now * 1e6:.2f}us")
+
+    return regressions
+
+
+def format_results(results: dict) -> str:
+    lines = ["        -- Tick Loop --"]
+    for name, ticks in results["ticks"].items():
+        lines.append(f"{name:<26} {ticks['ticks_per_sec']:>12.0f} ticks/sec")
+
+    lines.append("\n        -- Components (per call) --")
+    for name, components in results["components"].items():
+        for component, seconds in components.items():
+            lines.append(f"{name:<26} {component:<28} {seconds * 1e6:>10.2f} us")
+
+    lines.append("\n        -- Scaling --")
+    lines.append(f"{'size':>6} {'load s':>9} {'load MB':>9} {'cached s':>9} {'ticks/sec':>11} {'str s':>9}")
+    for row in results["scaling"]:
+        lines.append(
+            f"{row['size']:>6} {row['load_time']:>9.4f} {row['load_peak_mb']:>9.2f} {row['cached_load']:>9.4f} "
+            f"{row['ticks_per_sec']:>11.0f} {row['str_time']:>9.4f}"
+        )
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulation benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="*", default=SIZES, help="generated floorplan sizes")
+    parser.add_argument("--runs", type=int, default=20, help="seeded runs per floorplan for the tick loop")
+    parser.add_argument("--save", default=None, help="write results as a .json baseline")
+    parser.add_argument("--compare", default=None, help="baseline .json to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown before a regression is reported")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.runs)
+    print(format_results(results))
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
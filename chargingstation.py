@@ -1,15 +1,17 @@
 from environment import Environment
+from sensors import to_dict
 from chargingstation_logic import ChargingStationLogicSystem
 
 class Station():
 
-    def __init__(self, position: tuple, ori: str, env: object, robot: object):
+    def __init__(self, position: tuple, ori: str, env: object, robot: object | None = None):
         self.logic = ChargingStationLogicSystem()
         self.setup_logic_rules() 
         self.enviroment = env
         self.paired_robot = robot
         self.position = position
         self.orientation = ori
+        env.add_charger(position, self)
         self.senser_values = self.sense()
         self.decision = None
         self.last_action = None
@@ -31,11 +33,10 @@ class Station():
     def sense(self):
         """
         Get values around the robot, store within self.values
-            Expected values : dict (str of values, north, east, south, west 
-                                and current value of input pos) 
-                OR None
+            Expected values : tuple of cell codes (north, east, south, west 
+                                and current value of input pos), see sensors.py
         """
-        self.senser_values = self.enviroment.get_cells(self.position)
+        self.senser_values = self.enviroment.sense(self.position)
 
     def decide(self) -> str:
         """
@@ -46,7 +47,7 @@ class Station():
 
         # Pass facts from sensors
         self.logic.reset_facts()
-        self.logic.update_facts_from_sensors(self.senser_values)
+        self.logic.update_facts_from_codes(self.senser_values)
 
         # Decide on action     
         return self.logic.decide_action()
@@ -65,14 +66,33 @@ class Station():
 
         elif "charge_" in self.decision:
 
+            # whichever robot is on that side (occupancy lookup), a robot
+            # glyph that is not simulated is not charged
+            robot = self.adjacent_robot(self.decision.split("_")[1])
+
+            if robot is None:
+                self.last_action = "idle"
+                return
+
             # topup robot charge
-            if self.paired_robot.battery >= 95:
-                self.paired_robot.battery = 100
+            if robot.battery >= 95:
+                robot.battery = 100
             else:
-                self.paired_robot.battery += 5
+                robot.battery += 5
 
             self.last_action = f"Charged Robot : {self.decision}"
 
+    def adjacent_robot(self, direction: str):
+        """
+        :param: str direction = north, east, south, west
+        :return: robot object next to the station on that side, or None
+        """
+        x, y = self.position
+        offsets = {"north": (0, -1), "east": (1, 0), "south": (0, 1), "west": (-1, 0)}
+        dx, dy = offsets[direction]
+
+        return self.enviroment.robot_at((x + dx, y + dy))
+
     def __str__(self):
         """
         Output messages
@@ -83,7 +103,7 @@ class Station():
         return (
             f"\n        -- ChargeStation Data -- \n"
             f"Position                  :   {self.position} \n"
-            f"Last Sensor Values        :   {self.senser_values} \n"
+            f"Last Sensor Values        :   {to_dict(self.senser_values)} \n"
             f"Last Decision             :   {self.decision} \n"
             f"Last Action               :   {self.last_action}\n"
             )
\ No newline at end of file
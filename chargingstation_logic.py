@@ -1,14 +1,12 @@
-class ChargingStationLogicSystem:
-    
-    def __init__(self):
-        self.rules = []
-        self.facts = set()
+from rule_engine import RuleEngine
+from sensors import CELL_CLASSES, ROBOT, from_dict as sensors_codes
 
-    def add_rule(self, conditions, conclusion):
-        self.rules.append({"conditions": conditions, "conclusion": conclusion})
+ROBOT_FACTS = {direction: f"{direction}_robot" for direction in ["north", "south", "east", "west"]}
+SENSOR_ORDER = [("north", 0), ("south", 2), ("east", 1), ("west", 3)]
 
-    def add_fact(self, fact):
-        self.facts.add(fact)
+class ChargingStationLogicSystem(RuleEngine):
+
+    default_conclusion = "chargingstation_idle"
 
     def update_facts_from_sensors(self, sensors: dict):
         """
@@ -16,23 +14,20 @@ class ChargingStationLogicSystem:
 
         :param: sensors  dict like {"pos": "d", "north": " ", "south": "d", ...}
         """
+        self.update_facts_from_codes(sensors_codes(sensors))
 
-        for direction in ["north", "south", "east", "west"]:
-            
-            if sensors[direction] in ["^", "v", "<", ">"]:                
-                self.add_fact(f"{direction}_robot")
-
+    def update_facts_from_codes(self, reading: tuple):
+        """
+        Facts from an Environment.sense reading
 
-    def decide_action(self):
-        # Evaluate rules
+        :param: reading  tuple of cell codes (north, east, south, west, pos)
+        """
 
-        for rule in self.rules:
-            if all(condition in self.facts for condition in rule["conditions"]):
-                return rule["conclusion"]
+        for direction, i in SENSOR_ORDER:
             
-        # Default if no rules match
-        return "chargingstation_idle"
-    
+            if CELL_CLASSES[reading[i]] == ROBOT:                
+                self.add_fact(ROBOT_FACTS[direction])
+
     def ori_lookup(self, input_dir) -> str:
         """
         Change dir into robot direction symbol
@@ -52,9 +47,6 @@ class ChargingStationLogicSystem:
         directions.update({v: k for k, v in directions.items()})
         
         return directions[input_dir]
-    
-    def reset_facts(self):
-        self.facts.clear()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,260 @@
+from simulation import Simulation, format_summary
+from environment import Environment
+from entity_index import EntityIndex
+from grid import Grid
+import argparse
+import marshal
+import mmap
+import os
+import random
+import struct
+
+
+MAGIC = b"CRCHKP01"
+
+# magic, grid width, grid height, state size, cells offset
+HEADER = struct.Struct("<8sIIQQ")
+
+
+def capture(sim: Simulation) -> dict:
+    """
+    Everything but the grid cells needed to carry on sim from its current
+    tick: entity index (dirt counts, not positions), RNG state, robot /
+    station / run state. Plain dicts / lists / tuples so it marshals as is
+    """
+    env = sim.enviroment
+    index = env.index
+
+    return {
+        "env_map"   : sim.env_map,
+        "seed"      : sim.seed,
+        "multi"     : sim.multi,
+        "rules"     : sim.rules,
+        "row_lengths": list(env.world.row_lengths),
+        "rng"       : env.rng.getstate(),
+        "environment": {
+            "robot_location"        : env.robot_location,
+            "robot_ori"             : env.robot_ori,
+            "chargestation_location": env.chargestation_location,
+            "station_ori"           : env.station_ori,
+        },
+        "index": {
+            "robots"     : dict(index.robots),
+            "under"      : dict(index.under),
+            "stations"   : dict(index.stations),
+            "dirt_counts": dict(index.dirt_counts),
+        },
+        "robots": [
+            {
+                "position"    : robot.position,
+                "orientation" : robot.orientation,
+                "battery"     : robot.battery,
+                "decision"    : robot.decision,
+                "last_action" : robot.last_action,
+                "counter"     : robot.counter,
+                "returning"   : robot.returning,
+                "senser_values": robot.senser_values,
+                "priority"    : list(robot.logic.direction_priority),
+                "planner"     : robot.planner,
+                "dock"        : robot.dock,
+            }
+            for robot in sim.robots
+        ],
+        "stations": [
+            {"decision": station.decision, "last_action": station.last_action, "senser_values": station.senser_values}
+            for station in sim.stations
+        ],
+        "run": {
+            "tick"         : sim.tick,
+            "cells_cleaned": sim.cells_cleaned,
+            "crashes"      : sim.crashes,
+            "clean_tick"   : sim.clean_tick,
+            "battery_curve": list(sim.battery_curve),
+        },
+        "scheduler": {
+            "due"   : sorted(sim.scheduler.due),
+            "timers": list(sim.scheduler.timers),
+        } if sim.scheduler is not None else None,
+    }
+
+
+def save_checkpoint(sim: Simulation, path: str) -> "Checkpoint":
+    """
+    Write sim to a binary checkpoint: header, marshalled state, then the
+    grid cells on a page boundary so forks can map them copy on write
+
+    :return: Checkpoint of the written file
+    """
+    grid = sim.enviroment.world
+    state = marshal.dumps(capture(sim))
+
+    offset = HEADER.size + len(state)
+    offset += -offset % mmap.ALLOCATIONGRANULARITY
+
+    # write then rename, forks still mapping an older checkpoint at path keep theirs
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as file:
+        file.write(HEADER.pack(MAGIC, grid.width, grid.height, len(state), offset))
+        file.write(state)
+        file.write(b"\0" * (offset - file.tell()))
+        file.write(grid.cells)
+
+    os.replace(tmp, path)
+    return Checkpoint(path)
+
+
+class Checkpoint:
+    """
+    A saved Simulation (see save_checkpoint), the state is read up front,
+    the grid cells only when a Simulation is built from it:
+
+        restore()  - private copy of the cells, carries on exactly as the
+                     saved run would have
+        fork()     - cells mapped copy on write (mmap ACCESS_COPY), every
+                     fork shares the checkpoint's pages and only copies the
+                     pages it writes to, so many what-if branches cost
+                     little more than the cells they change. seed reseeds
+                     the branch RNG, None continues the saved RNG stream
+
+    Either way the Simulation is a normal one: change robots / walls on it
+    (robot.orientation, env.set_wall ...) before stepping to try a what-if.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(path, "rb") as file:
+            magic, self.width, self.height, size, self.offset = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a checkpoint")
+
+            self.state = marshal.loads(file.read(size))
+
+    @property
+    def tick(self) -> int:
+        return self.state["run"]["tick"]
+
+    def cells(self, copy_on_write: bool):
+        size = self.width * self.height
+
+        with open(self.path, "rb") as file:
+            if copy_on_write and size:
+                return mmap.mmap(file.fileno(), size, offset=self.offset, access=mmap.ACCESS_COPY)
+
+            file.seek(self.offset)
+            return bytearray(file.read(size))
+
+    def restore(self) -> Simulation:
+        return self.build(self.cells(copy_on_write=False), None)
+
+    def fork(self, seed: int | None = None) -> Simulation:
+        return self.build(self.cells(copy_on_write=True), seed)
+
+    def build(self, cells, seed: int | None) -> Simulation:
+        state = self.state
+        grid = Grid.from_buffer(cells, self.width, state["row_lengths"])
+
+        index = EntityIndex()
+        index.robots = dict(state["index"]["robots"])
+        index.under = dict(state["index"]["under"])
+        index.stations = dict(state["index"]["stations"])
+        index.dirt_counts = dict(state["index"]["dirt_counts"])
+
+        # dirt positions are found from the grid again if something needs them
+        index._dirt = None
+
+        # every branch gets its own RNG, even when the run used the module level one
+        rng = random.Random()
+        if seed is None:
+            rng.setstate(state["rng"])
+        else:
+            rng.seed(seed)
+
+        env = Environment.from_grid(grid, index, rng)
+        for name, value in state["environment"].items():
+            setattr(env, name, value)
+
+        robots = state["robots"]
+        sim = Simulation(state["env_map"], 0, state["seed"], robots[0]["planner"], robots[0]["dock"], state["scheduler"] is not None, state["multi"], env, rules=state["rules"])
+
+        # Simulation sets robots up from the grid, row major, put the saved ones back in run order
+        env.occupants.clear()
+        for robot, saved in zip(sim.robots, robots):
+            robot.position = saved["position"]
+            robot.orientation = saved["orientation"]
+            robot.battery = saved["battery"]
+            robot.decision = saved["decision"]
+            robot.last_action = saved["last_action"]
+            robot.counter = saved["counter"]
+            robot.returning = saved["returning"]
+            robot.senser_values = saved["senser_values"]
+            robot.logic.direction_priority[:] = saved["priority"]
+            env.add_occupant(robot.position, robot)
+
+        for station, saved in zip(sim.stations, state["stations"]):
+            station.decision = saved["decision"]
+            station.last_action = saved["last_action"]
+            station.senser_values = saved["senser_values"]
+
+        for name, value in state["run"].items():
+            setattr(sim, name, value)
+        sim.battery_curve = list(sim.battery_curve)
+
+        if sim.scheduler is not None:
+            sim.scheduler.tick = sim.tick
+            sim.scheduler.due = set(state["scheduler"]["due"])
+            sim.scheduler.timers = [tuple(timer) for timer in state["scheduler"]["timers"]]
+
+        return sim
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pause, resume and branch simulation runs through binary checkpoints")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    save = commands.add_parser("save", help="run a floorplan for --ticks then checkpoint it")
+    save.add_argument("floorplan")
+    save.add_argument("checkpoint")
+    save.add_argument("--ticks", type=int, default=500)
+    save.add_argument("--charge", type=int, default=100)
+    save.add_argument("--seed", type=int, default=None)
+    save.add_argument("--planner", action="store_true")
+    save.add_argument("--dock", action="store_true")
+    save.add_argument("--event-driven", action="store_true")
+    save.add_argument("--multi", action="store_true")
+
+    resume = commands.add_parser("resume", help="carry on a checkpointed run")
+    resume.add_argument("checkpoint")
+    resume.add_argument("--ticks", type=int, default=500)
+    resume.add_argument("--save", default=None, help="checkpoint again at the end")
+
+    fork = commands.add_parser("fork", help="run reseeded what-if branches from one checkpoint")
+    fork.add_argument("checkpoint")
+    fork.add_argument("--branches", type=int, default=4)
+    fork.add_argument("--ticks", type=int, default=500)
+    fork.add_argument("--seed", type=int, default=0, help="seed of the first branch (branch j uses seed + j)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "save":
+        sim = Simulation(args.floorplan, args.charge, args.seed, args.planner, args.dock, args.event_driven, args.multi)
+        print(format_summary(sim.run(args.ticks)))
+        save_checkpoint(sim, args.checkpoint)
+
+    elif args.command == "resume":
+        sim = Checkpoint(args.checkpoint).restore()
+        print(format_summary(sim.run(args.ticks)))
+
+        if args.save:
+            save_checkpoint(sim, args.save)
+
+    else:
+        checkpoint = Checkpoint(args.checkpoint)
+        for j in range(args.branches):
+            summary = checkpoint.fork(args.seed + j).run(args.ticks)
+            print(format_summary(summary))
+            print(f"branch {j} from tick {checkpoint.tick}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+from collections import Counter
+import re
+
+ROBOT_GLYPHS = "^v<>"
+STATION_GLYPHS = "udlr"
+WALL_GLYPH = "x"
+FLOOR_GLYPH = " "
+
+
+def is_dirt(char: str) -> bool:
+    """
+    Same dirty test as the logic systems, anything that is not floor, wall,
+    station, robot or a visited digit
+    """
+    return char not in ["u", " ", "d", "l", "r", "x", "^", "v", "<", ">"] and not char.isdigit()
+
+
+# robot / station cells, and dirt cells (not floor, wall, digit, robot or station)
+AGENT_CELLS = re.compile(rb"[\^v<>udlr]")
+DIRT_CELLS = re.compile(rb"[^ x0-9\^v<>udlr]")
+NOT_DIRT_BYTES = b" x0123456789^v<>udlr"
+
+
+class WallView:
+    """
+    Set like view of the wall cells, answered straight from the grid so
+    large maps don't hold a tuple per wall. O(1) in / len via Grid.count
+    """
+
+    def __init__(self, grid=None):
+        self.grid = grid
+
+    def __contains__(self, pos: tuple) -> bool:
+        x, y = pos
+        try:
+            return self.grid.get(x, y) == WALL_GLYPH
+        except IndexError:
+            return False
+
+    def __len__(self) -> int:
+        return self.grid.count(WALL_GLYPH) if self.grid is not None else 0
+
+    def __iter__(self):
+        if self.grid is None:
+            return
+
+        for y in range(self.grid.height):
+            for match in re.finditer(WALL_GLYPH, self.grid.row(y)):
+                yield match.start(), y
+
+
+class EntityIndex:
+    """
+    Positions of every entity on the map, built in one pass by
+    Environment.generate_map and kept up to date by move_robot / clear_cell /
+    rotate_robot so lookups and dirt counts never rescan the grid.
+
+    The cell under each robot is tracked (self.under) so dirt the robot is
+    standing on still counts. When built with scan (cached / mmapped grids)
+    only the dirt counts are taken up front, the dirt position dict is filled
+    in from the grid the first time self.dirt is used.
+
+    All positions are (x, y) tuples, x, y index start 0 (top, left of grid)
+    """
+
+    def __init__(self):
+        self.robots = {}        # (x, y) -> robot glyph
+        self.under = {}         # (x, y) -> cell value under the robot there
+        self.stations = {}      # (x, y) -> station glyph
+        self.walls = WallView() # (x, y), read from the grid
+        self.dirt_counts = {}   # dirt char -> number of cells
+        self._dirt = {}         # (x, y) -> dirt char, None until built from the grid
+
+    @property
+    def dirt(self) -> dict:
+        """
+        (x, y) -> dirt char of every dirty cell
+        """
+        if self._dirt is None:
+            self._dirt = self.find_dirt()
+
+        return self._dirt
+
+    def attach(self, grid):
+        """
+        Point the wall view at the loaded grid
+        """
+        self.walls.grid = grid
+
+    def scan(self, grid):
+        """
+        Build the index from an already loaded grid (e.g. a cached / mmapped
+        one). Robots / stations are found by regex at C speed, dirt is only
+        counted (bytes.translate) until self.dirt is first needed
+        """
+        self.attach(grid)
+        width = grid.width
+
+        for match in AGENT_CELLS.finditer(grid.cells):
+            y, x = divmod(match.start(), width)
+            self.add(x, y, chr(match.group()[0]))
+
+        # mmap backed cells have no translate()
+        cells = grid.cells if hasattr(grid.cells, "translate") else bytes(grid.cells)
+        counts = Counter(cells.translate(None, NOT_DIRT_BYTES))
+
+        self.dirt_counts = {chr(code): count for code, count in counts.items()}
+        self._dirt = None
+
+    def find_dirt(self) -> dict:
+        """
+        Dirt positions from the grid, plus any dirt robots are standing on
+        """
+        grid = self.walls.grid
+        width = grid.width
+        dirt = {}
+
+        for match in DIRT_CELLS.finditer(grid.cells):
+            y, x = divmod(match.start(), width)
+            dirt[(x, y)] = chr(match.group()[0])
+
+        for pos, char in self.under.items():
+            if is_dirt(char):
+                dirt[pos] = char
+
+        return dirt
+
+    def add(self, x: int, y: int, char: str):
+        """
+        Index a single cell value read from the floorplan
+        """
+        if char == WALL_GLYPH:
+            return
+
+        elif char in ROBOT_GLYPHS:
+            self.robots[(x, y)] = char
+            self.under[(x, y)] = char
+
+        elif char in STATION_GLYPHS:
+            self.stations[(x, y)] = char
+
+        elif is_dirt(char):
+            self._dirt[(x, y)] = char
+            self.dirt_counts[char] = self.dirt_counts.get(char, 0) + 1
+
+    def move_robot(self, old_pos: tuple, new_pos: tuple, ori: str, under: str):
+        """
+        Robot moved old_pos -> new_pos, the tail cell is overwritten with "0"
+        so any dirt left under it is gone
+
+        :param under: str cell value at new_pos before the robot moved onto it
+        """
+        self.clear_dirt(old_pos)
+        self.robots.pop(old_pos, None)
+        self.under.pop(old_pos, None)
+        self.robots[new_pos] = ori
+        self.under[new_pos] = under
+
+    def rotate_robot(self, pos: tuple, ori: str):
+        self.robots[pos] = ori
+
+    def clear_dirt(self, pos: tuple) -> bool:
+        """
+        Remove dirt at pos (if any), pos is a robot position
+
+        :return: bool True if a dirt cell was removed
+        """
+        if self._dirt is not None:
+            char = self._dirt.pop(pos, None)
+        else:
+            char = self.under.get(pos)
+            if char is not None and not is_dirt(char):
+                char = None
+
+        if pos in self.under:
+            self.under[pos] = "0"
+
+        if char is None:
+            return False
+
+        self.dirt_counts[char] -= 1
+        if not self.dirt_counts[char]:
+            del self.dirt_counts[char]
+
+        return True
+
+    def dirt_remaining(self) -> int:
+        return sum(self.dirt_counts.values())
+
+    def first(self, objects: list) -> tuple | None:
+        """
+        First robot / station matching any of objects, in row major order
+        (same order a top, left grid scan would find it)
+
+        :return: tuple ((x, y), glyph) or None
+        """
+        found = [
+            (pos, char)
+            for table in (self.robots, self.stations)
+            for pos, char in table.items()
+            if char in objects
+        ]
+
+        if not found:
+            return None
+
+        return min(found, key=lambda item: (item[0][1], item[0][0]))
@@ -1,36 +1,155 @@
+from grid import Grid
+import floorplan_cache
+from entity_index import EntityIndex, ROBOT_GLYPHS, STATION_GLYPHS
+from planner import DistanceField, PASSABLE
+from renderer import RowRenderer
+import random
+import re
+
+
+# (dx, dy) of one move forward for each robot glyph
+STEPS = {"^": (0, -1), ">": (1, 0), "v": (0, 1), "<": (-1, 0)}
+
+
 class Environment:
 
-    def __init__(self, env_map: str):
+    def __init__(self, env_map: str, rng: random.Random | None = None, use_cache: bool = False):
+        self.rng = rng if rng is not None else random
+        self.use_cache = use_cache
         self.robot_ori = None 
         self.station_ori = None       
+        self.index = EntityIndex()
         self.world = self.generate_map(env_map)
+        self.dirt_distances = None
+        self.dock_distances = None
+        self.listeners = []
+        self.renderer = None
+        self.occupants = {}     # (x, y) -> robot object standing there (see add_occupant)
+        self.chargers = {}      # (x, y) -> simulated station object there (see add_charger)
+
+        # every cell write, through the Environment or world[y][x] = c, reaches the listeners
+        if self.world is not None:
+            self.world.on_write = self.notify
         
+        # first robot / station (row major), what single robot callers use
         self.robot_location = self.get_pos(["^", "v", "<", ">"])
         self.chargestation_location = self.get_pos(["u", "d", "l", "r"])
 
-        if self.robot_location:
-            x, y = self.robot_location
-            self.occupied_pos = self.world[y][x]
-        else:
-            self.occupied_pos = None
+    @classmethod
+    def from_grid(cls, grid: Grid, index: EntityIndex, rng: random.Random | None = None) -> "Environment":
+        """
+        Environment over an already built grid + index (e.g. a restored checkpoint),
+                no floorplan is read. First robot / station found as in __init__
+        """
+        env = cls.__new__(cls)
+        env.rng = rng if rng is not None else random
+        env.use_cache = False
+        env.robot_ori = None
+        env.station_ori = None
+        env.index = index
+        env.world = grid
+        env.dirt_distances = None
+        env.dock_distances = None
+        env.listeners = []
+        env.renderer = None
+        env.occupants = {}
+        env.chargers = {}
+        grid.on_write = env.notify
+
+        index.attach(grid)
+        env.robot_location = env.get_pos(["^", "v", "<", ">"])
+        env.chargestation_location = env.get_pos(["u", "d", "l", "r"])
+
+        return env
+
+    @property
+    def occupied_pos(self) -> str | None:
+        """
+        Cell value under the first robot. Every robot has its own under-cell,
+        kept in self.index.under by position
+        """
+        return self.index.under.get(self.robot_location)
+
+    @occupied_pos.setter
+    def occupied_pos(self, value: str):
+        self.index.under[self.robot_location] = value
+
+    def robots(self) -> list:
+        """
+        :return: list of ((x, y), glyph) of every robot, row major order
+        """
+        return sorted(self.index.robots.items(), key=lambda item: (item[0][1], item[0][0]))
+
+    def stations(self) -> list:
+        """
+        :return: list of ((x, y), glyph) of every charging station, row major order
+        """
+        return sorted(self.index.stations.items(), key=lambda item: (item[0][1], item[0][0]))
+
+    def add_occupant(self, position: tuple, agent):
+        """
+        Register the robot object standing at position, stations look up
+        the robot they charge here
+        """
+        self.occupants[position] = agent
+
+    def add_charger(self, position: tuple, station):
+        """
+        Register the station object simulated at position, only these are
+        docked at (a station glyph without one charges nothing)
+        """
+        self.chargers[position] = station
+        self.dock_distances = None
+
+    def robot_at(self, position: tuple):
+        """
+        :return: robot object at position, or None (no robot / not registered)
+        """
+        return self.occupants.get(position)
 
 
 
     def generate_map(self, env_map):
         """
         Reads input str .txt file and converts it into a 2D grid.
+                Single pass, every robot, station and dirt cell is added
+                to self.index while the rows are read (walls are answered
+                from the grid itself).
+                With use_cache the grid comes from the memory mapped
+                binary cache next to the .txt (see floorplan_cache).
+                The map needs a wall border (Grid.walled), sense reads
+                neighbours at fixed flat offsets without bounds checks
 
         :param env_map: Path to environment map file
-        :return: 2D list representing the map
+        :return: Grid (compact byte grid, indexed as grid[y][x]) representing the map
         """
         try:
 
-            grid = []
+            if self.use_cache:
+                grid = floorplan_cache.load_grid(env_map)
+                if not grid.walled():
+                    raise ValueError(f"{env_map} has no wall border")
+
+                self.index.scan(grid)
+                return grid
+
+            rows = []
+            entity = re.compile(r"[^ x0-9]")
             with open(env_map, "r") as file:
 
-                for line in file:
-                    grid.append(list(line.strip()))
+                for y, line in enumerate(file):
+                    row = line.strip()
+                    rows.append(row)
+
+                    # skip floor / visited cells
+                    for match in entity.finditer(row):
+                        self.index.add(match.start(), y, match.group())
+
+            grid = Grid(rows)
+            if not grid.walled():
+                raise ValueError(f"{env_map} has no wall border")
 
+            self.index.attach(grid)
             return grid
         
         except Exception as err:
@@ -40,6 +159,8 @@ class Environment:
     def get_pos(self, objects: list) -> tuple | None:
         """
         Searches the internal 2D map and returns the robot's position.
+                Robots / stations are looked up in self.index, anything
+                else falls back to a scan of the grid
 
         :return: tuple (x, y of the robot) or None the robot has not been found. 
                 Robot pos returned as x, y tuple into self.robot_location
@@ -48,6 +169,19 @@ class Environment:
 
         try:
 
+            if all(char in ROBOT_GLYPHS + STATION_GLYPHS for char in objects):
+                found = self.index.first(objects)
+                if found is None:
+                    return None
+
+                pos, char = found
+                if char in ROBOT_GLYPHS:
+                    self.robot_ori = char
+                else:
+                    self.station_ori = char
+
+                return pos
+
             # loop through file
             for y, row in enumerate(self.world):
                 for x, char in enumerate(row):
@@ -77,16 +211,20 @@ class Environment:
 
         :param pos: tuple of x, y of the object
         :return: dict (str of values, north, east, south, west, current cells of input pos) or None (err)           
+                "pos" is the cell under the robot at pos, for non robot positions
+                (stations) the first robot's under-cell, as it has always been
         """
         try:
             x, y = pos
 
+            world = self.world
+
             sensors_dic = {
-                "north"   : self.world[y-1][x],
-                "east"    : self.world[y][x+1],
-                "south"   : self.world[y+1][x],
-                "west"    : self.world[y][x-1],
-                "pos"     : self.occupied_pos
+                "north"   : world.get(x, y-1),
+                "east"    : world.get(x+1, y),
+                "south"   : world.get(x, y+1),
+                "west"    : world.get(x-1, y),
+                "pos"     : self.index.under.get(pos, self.occupied_pos)
             }
 
            
@@ -97,42 +235,195 @@ class Environment:
             return None
         
 
+    def sense(self, pos: tuple) -> tuple:
+        """
+        Compact get_cells, byte codes of the cells north, east, south, west
+        of pos (fixed flat offsets into the grid, safe as the map is walled,
+        see generate_map) and of the cell under the robot at pos (same "pos"
+        rule as get_cells)
+
+        :param pos: tuple of x, y of the object
+        :return: tuple (north, east, south, west, pos) of int cell codes (see sensors.py)
+        """
+        x, y = pos
+        w = self.world.width
+        cells = self.world.cells
+        p = y * w + x
+
+        under = self.index.under.get(pos, self.occupied_pos)
+        under = ord(under) if under is not None else cells[p]
+
+        return (cells[p - w], cells[p + 1], cells[p + w], cells[p - 1], under)
+
     def clear_cell(self, position: tuple):
         """
         Using internal 2D map, update current position value (not robot) to "0" (or increment +1)
         """
-        self.occupied_pos = "0"
+        position = position if position is not None else self.robot_location
 
+        # dirt first, without a dirt position index it is read from the under-cell
+        self.remove_dirt(position)
+        self.index.under[position] = "0"
 
-    def move_robot(self, move_to: tuple, ori: str) -> tuple:
+    def remove_dirt(self, position: tuple):
+        """
+        Drop dirt at position from the index and (if built) the dirt distance field
+        """
+        if self.index.clear_dirt(position) and self.dirt_distances is not None:
+            self.dirt_distances.remove_source(position)
+
+    def dirt_field(self) -> DistanceField:
+        """
+        Distance from every cell to the nearest dirt, built on first use and
+        then kept up to date as dirt is cleaned
+
+        :return: planner.DistanceField
+        """
+        if self.dirt_distances is None:
+            self.dirt_distances = DistanceField(self.world, self.index.dirt)
+
+        return self.dirt_distances
+
+    def dirt_remaining(self) -> int:
+        """
+        :return: int   number of dirty cells left (from the index, no grid scan)
+        """
+        return self.index.dirt_remaining()
+
+    def add_listener(self, callback):
+        """
+        callback(pos) is called with (x, y) whenever a grid cell changes
+        (robot moves / turns, walls edited, any world.set / world[y][x] = c)
+        """
+        self.listeners.append(callback)
+
+    def notify(self, pos: tuple):
+        for callback in self.listeners:
+            callback(pos)
+
+    def dock_field(self) -> DistanceField:
+        """
+        Distance from every cell to the nearest charging station (a cell next to one),
+        computed once per map, only rebuilt after set_wall changes the walls.
+        Only stations that are simulated (add_charger) count, without any the
+        first station, chargestation_location
+
+        :return: planner.DistanceField
+        """
+        if self.dock_distances is None:
+            stations = list(self.chargers) or [pos for pos in [self.chargestation_location] if pos is not None]
+            docks = [(x + dx, y + dy) for x, y in stations for dx, dy in [(0, -1), (1, 0), (0, 1), (-1, 0)]]
+
+            self.dock_distances = DistanceField(self.world, [pos for pos in docks if PASSABLE[ord(self.world.get(*pos))]])
+
+        return self.dock_distances
+
+    def set_wall(self, position: tuple, wall: bool = True):
+        """
+        Using internal 2D map, add ("x") or remove (" ") a wall at position.
+                Paths change, so the cached distance fields are dropped.
+                The outer wall border stays (see generate_map)
+        """
+        x, y = position
+        if not wall and not (0 < x < self.world.width - 1 and 0 < y < self.world.height - 1):
+            raise ValueError(f"{position} is on the wall border")
+
+        self.world.set(x, y, "x" if wall else " ")
+        self.dirt_distances = None
+        self.dock_distances = None
+
+    def rotate_robot(self, pos: tuple, ori: str):
+        """
+        Using internal 2D map, turn the robot at pos to face ori
+
+        :param ori: str of the robots orientation, expected: "^", "v", "<", ">"
+        """
+        x, y = pos
+        if pos == self.robot_location:
+            self.robot_ori = ori
+
+        self.world.set(x, y, ori)
+        self.index.rotate_robot(pos, ori)
+
+
+    def move_robot(self, move_to: tuple, ori: str, position: tuple | None = None) -> tuple:
         """
         Using internal 2D map, attempt to move to new location (x, y). 
-                return the updated pos, if hit wall, no change in x, y
+                return the updated pos, if hit wall, no change in x, y.
+                Other robots block through the occupancy index (self.index.robots)
 
         :param ori: str of the robots orientation, expected: "^", "v", "<", ">"
+        :param position: tuple x, y of the robot moving, default the first robot
         :return: tuple (x, y pos)               
         """
 
         # gen params
-        x, y = self.robot_location
+        position = position if position is not None else self.robot_location
+        x, y = position
         new_x, new_y = move_to
+        target = self.world.get(new_x, new_y)
 
         # collision detection
-        if self.world[move_to[1]][move_to[0]] in ["u", "d", "l", "r", "x"]:
-            return self.robot_location
+        if target in ["u", "d", "l", "r", "x"] or move_to in self.index.robots:
+            return position
         
         else:            
             # update env data
-            self.occupied_pos = self.world[new_y][new_x] #store curr pos value
-            self.world[y][x] = "0" #print tail values
-            self.world[new_y][new_x] = ori #move to new place
-            self.robot_location = (new_x, new_y) #update env store
+            self.world.set(x, y, "0") #print tail values
+            self.world.set(new_x, new_y, ori) #move to new place
+            self.remove_dirt(position) #tail overwritten, dirt left there is gone
+            self.index.move_robot(position, move_to, ori, target) #store curr pos value
+
+            if position in self.occupants:
+                self.occupants[move_to] = self.occupants.pop(position)
+
+            if position == self.robot_location:
+                self.robot_location = move_to #update env store
+
+            return move_to
 
-            return self.robot_location
+    def move_robot_straight(self, position: tuple, ori: str, steps: int) -> tuple:
+        """
+        move_robot steps times in a row along ori, in one go. The caller has
+                checked every cell on the way is free (not wall, station or robot)
+
+        :param ori: str of the robots orientation, expected: "^", "v", "<", ">"
+        :return: tuple (x, y pos) the robot ends on
+        """
+        x, y = position
+        dx, dy = STEPS[ori]
+        move_to = (x + dx * steps, y + dy * steps)
+        target = self.world.get(*move_to)
+
+        # every cell left behind becomes tail, flat strided slice of the grid
+        start = self.world.index(x, y)
+        step = dy * self.world.width + dx
+        self.world.cells[start:start + step * steps:step] = b"0" * steps
+        self.world.set(*move_to, ori)
+
+        self.remove_dirt(position)
+        self.index.move_robot(position, move_to, ori, target)
+
+        if position in self.occupants:
+            self.occupants[move_to] = self.occupants.pop(position)
+
+        if position == self.robot_location:
+            self.robot_location = move_to
+
+        # the tail slice bypasses Grid.set, move_to was notified by it
+        for i in range(steps):
+            self.notify((x + dx * i, y + dy * i))
+
+        return move_to
 
     def __str__(self):
         """
-        Loop through grid, and join each row to generate out map
+        Loop through grid, and join each row to generate out map.
+                Rows are cached, only rows changed since the last call
+                are rebuilt (see renderer.RowRenderer)
         
         """
-        return "\n".join(map("".join, self.world))
+        if self.renderer is None:
+            self.renderer = RowRenderer(self)
+
+        return self.renderer.render()
@@ -0,0 +1,113 @@
+from simulation import Simulation
+from rule_config import load_rules
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import csv
+import glob
+import time
+
+
+RESULT_FIELDS = [
+    "floorplan", "seed", "ticks", "coverage", "clean_tick", "cells_cleaned",
+    "dirt_remaining", "battery_dead", "crashes", "final_battery", "wall_time",
+]
+
+
+def run_experiment(job: tuple) -> dict:
+    """
+    Single seeded headless run, executed inside a worker process.
+            The run owns a random.Random(seed), so every (floorplan, seed)
+            pair replays exactly, whichever worker runs it
+
+    :param: job  tuple (floorplan path, seed, ticks, charge, planner, dock, rules)
+    :return: dict   one results table row (see RESULT_FIELDS)
+    """
+    env_map, seed, ticks, charge, planner, dock, rules = job
+
+    summary = Simulation(env_map, charge, seed, planner, dock, rules=rules).run(ticks)
+
+    row = {field: summary.get(field) for field in RESULT_FIELDS}
+    row["seed"] = seed
+    row["battery_dead"] = int(summary["battery_dead"])
+
+    return row
+
+
+def run_experiments(floorplans: list, runs: int, ticks: int = 1000, charge: int = 100, base_seed: int = 0, workers: int | None = None, planner: bool = False, dock: bool = False, rules: dict | None = None) -> list:
+    """
+    Fan runs seeded runs per floorplan across a ProcessPoolExecutor
+
+    :param: floorplans  list of floorplan .txt paths
+            runs  int number of seeds per floorplan (base_seed .. base_seed + runs - 1)
+            workers  int max worker processes (None = cpu count)
+            rules  dict rule order / battery threshold (see rule_config), None = default
+    :return: list of dict   results table, ordered by floorplan then seed
+    """
+    jobs = [
+        (env_map, seed, ticks, charge, planner, dock, rules)
+        for env_map in floorplans
+        for seed in range(base_seed, base_seed + runs)
+    ]
+
+    chunksize = max(1, len(jobs) // (4 * (workers or 4)))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_experiment, jobs, chunksize=chunksize))
+
+
+def write_results(results: list, path: str):
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def format_results(results: list) -> str:
+    """
+    Per floorplan averages of the results table
+    """
+    lines = [f"{'floorplan':<36} {'runs':>5} {'coverage':>9} {'cleaned':>8} {'full_clean':>10} {'dead':>5} {'crashes':>8}"]
+
+    for env_map in sorted({row["floorplan"] for row in results}):
+        rows = [row for row in results if row["floorplan"] == env_map]
+        n = len(rows)
+        full = [row["clean_tick"] for row in rows if row["clean_tick"] is not None]
+
+        lines.append(
+            f"{env_map:<36} {n:>5} "
+            f"{sum(row['coverage'] for row in rows) / n:>8.1f}% "
+            f"{sum(row['cells_cleaned'] for row in rows) / n:>8.1f} "
+            f"{(sum(full) / len(full) if full else float('nan')):>10.1f} "
+            f"{sum(row['battery_dead'] for row in rows):>5} "
+            f"{sum(row['crashes'] for row in rows) / n:>8.1f}"
+        )
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seeded Monte Carlo runs over floorplans")
+    parser.add_argument("floorplans", nargs="*", default=sorted(glob.glob("./floorplans/*.txt")))
+    parser.add_argument("--runs", type=int, default=100, help="seeds per floorplan")
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--charge", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="first seed")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=None, help="write the results table to this .csv")
+    parser.add_argument("--planner", action="store_true", help="robots path to the nearest dirt")
+    parser.add_argument("--dock", action="store_true", help="robots return to the station to recharge")
+    parser.add_argument("--rules", default=None, help="rule config .json (rule order, battery threshold), e.g. written by tuning.py")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = run_experiments(args.floorplans, args.runs, args.ticks, args.charge, args.seed, args.workers, args.planner, args.dock, load_rules(args.rules) if args.rules else None)
+
+    print(format_results(results))
+    print(f"\n{len(results)} runs in {time.perf_counter() - start:.2f}s")
+
+    if args.out:
+        write_results(results, args.out)
+
+
+if __name__ == "__main__":
+    main()
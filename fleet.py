@@ -0,0 +1,376 @@
+from environment import Environment
+from robot_logic import RobotLogicSystem
+from rule_config import DEFAULT_RULES, load_rules, rule_list
+from sensors import CELL_CLASSES, BLOCKED, ROBOT
+from array import array
+import argparse
+import time
+
+
+DIRECTIONS = ["north", "east", "south", "west"]
+GLYPHS = ["^", ">", "v", "<"]    # robot glyph for each DIRECTIONS index
+GLYPH_CODES = bytes(ord(glyph) for glyph in GLYPHS)
+
+# last action codes, index into LAST_ACTIONS
+LAST_ACTIONS = [None, "moved", "crash!!!", "cleaned", "rotated", "random_direction"]
+MOVED, CRASHED, CLEANED, ROTATED, RANDOM_DIRECTION = 1, 2, 3, 4, 5
+
+# cell classes a move can't enter (walls, stations, other robots)
+BLOCKING = (BLOCKED, ROBOT)
+
+MASK64 = (1 << 64) - 1
+
+
+def splitmix64(state: int) -> tuple:
+    """
+    Tiny per robot RNG, the whole state is one int so it lives in an array
+
+    :return: tuple (new state, 64 bit random value)
+    """
+    state = (state + 0x9E3779B97F4A7C15) & MASK64
+    z = state
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return state, z ^ (z >> 31)
+
+
+def seed_state(seed: int, robot_id: int) -> int:
+    """
+    Independent RNG stream per robot, depends only on (seed, robot_id)
+    """
+    state, value = splitmix64((seed * 0x2545F4914F6CDD1D + robot_id) & MASK64)
+    return value
+
+
+class Fleet():
+    """
+    Many robots on one Environment, all robot state kept in flat arrays
+    (no Robot objects) and stepped in phases each tick:
+
+        sense   - 4 neighbour lookups for every robot (flat grid offsets)
+        decide  - per robot, the same RobotLogicSystem facts and rule set a
+                  single Robot uses, with the robot's own shuffled priority
+        act     - all moves resolved at once against the tick start grid:
+                  walls / stations / robots crash, two robots claiming the
+                  same cell -> lowest robot id wins, the other crashes
+        charge  - every station charges the first adjacent robot (n, e, s, w)
+
+    decide / act still loop over the robots in Python, the arrays save the
+    per object overhead, they do not vectorise the rule evaluation.
+    """
+
+    def __init__(self, env: Environment, charge: int = 100, seed: int = 0, rules: dict | None = None):
+        self.enviroment = env
+        self.grid = env.world
+        self.cells = env.world.cells
+        self.width = env.world.width
+        self.seed = seed
+        self.charge = charge
+        self.rules = rules or DEFAULT_RULES
+
+        self.logic = RobotLogicSystem(battery_threshold=self.rules["battery_threshold"])
+        self.setup_logic_rules()
+
+        # robot arrays
+        self.pos = array("q")           # flat grid index
+        self.ori = array("B")           # DIRECTIONS index
+        self.battery = array("i")
+        self.under = array("B")         # cell code under the robot
+        self.last_action = array("B")   # LAST_ACTIONS index
+        self.counter = array("I")
+        self.rng = array("Q")
+        self.priority = array("B")      # 4 per robot, shuffled DIRECTIONS indexes
+        self.decisions = []
+        self.occupancy = {}             # flat grid index -> robot id
+
+        for (x, y), glyph in sorted(env.index.robots.items(), key=lambda item: (item[0][1], item[0][0])):
+            self.add_robot((x, y), glyph)
+
+        self.stations = array("q", sorted(y * self.width + x for x, y in env.index.stations))
+        self.tick = 0
+        self.cells_cleaned = 0
+
+    def add_robot(self, position: tuple, ori: str, charge: int | None = None) -> int:
+        """
+        Add a robot at position (x, y) facing ori ("^", "v", "<", ">").
+                position must be a floor cell, it is overwritten with the robot glyph
+
+        :return: int   robot id
+        """
+        x, y = position
+        p = y * self.width + x
+        robot_id = len(self.pos)
+
+        self.pos.append(p)
+        self.ori.append(GLYPHS.index(ori))
+        self.battery.append(self.charge if charge is None else charge)
+        self.under.append(self.cells[p])
+        self.last_action.append(0)
+        self.counter.append(0)
+        self.rng.append(seed_state(self.seed, robot_id))
+        self.priority.extend(range(4))
+        self.decisions.append(None)
+        self.occupancy[p] = robot_id
+
+        self.cells[p] = GLYPH_CODES[self.ori[robot_id]]
+        self.enviroment.index.robots[position] = ori
+        self.enviroment.index.under.setdefault(position, chr(self.under[robot_id]))
+        self.enviroment.notify(position)
+
+        return robot_id
+
+    def setup_logic_rules(self):
+        """
+        Same rule set as a single Robot (rule_config.rule_list of self.rules), no planner / dock
+        """
+        for conditions, conclusion in rule_list(self.rules):
+            self.logic.add_rule(conditions, conclusion)
+
+    def __len__(self) -> int:
+        return len(self.pos)
+
+    def random_below(self, robot_id: int, n: int) -> int:
+        state, value = splitmix64(self.rng[robot_id])
+        self.rng[robot_id] = state
+        return value % n
+
+    def sense(self) -> tuple:
+        """
+        Neighbour cell codes of every robot in one pass (flat offsets, the
+        Environment only loads walled maps)
+
+        :return: tuple of 4 lists (north, east, south, west) of cell codes
+        """
+        cells, w, pos = self.cells, self.width, self.pos
+
+        return (
+            [cells[p - w] for p in pos],
+            [cells[p + 1] for p in pos],
+            [cells[p + w] for p in pos],
+            [cells[p - 1] for p in pos],
+        )
+
+    def shuffle_priority(self, robot_id: int) -> list:
+        """
+        Shuffle the robot's compass priority in place (Fisher-Yates, robot's own RNG)
+
+        :return: list of direction names, the new priority
+        """
+        base = robot_id * 4
+        priority = self.priority
+        for k in range(3, 0, -1):
+            j = self.random_below(robot_id, k + 1)
+            priority[base + k], priority[base + j] = priority[base + j], priority[base + k]
+
+        return [DIRECTIONS[d] for d in priority[base:base + 4]]
+
+    def decide(self, robot_id: int, reading: tuple) -> str:
+        """
+        :param: reading  tuple of cell codes (north, east, south, west, under), as Environment.sense
+        :return: str   the decision, RobotLogicSystem facts for this robot's state
+        """
+        logic = self.logic
+        logic.direction_priority = self.shuffle_priority(robot_id)
+        logic.reset_facts()
+
+        return logic.decide_from_facts(reading, GLYPHS[self.ori[robot_id]], self.battery[robot_id], LAST_ACTIONS[self.last_action[robot_id]])
+
+    def step(self) -> int:
+        """
+        Advance every live robot, then every station, one tick
+
+        :return: int   number of robots that acted
+        """
+        north, east, south, west = self.sense()
+        cells, w = self.cells, self.width
+        offsets = (-w, 1, w, -1)
+
+        acting = [i for i in range(len(self.pos)) if self.battery[i] > 0]
+        moves = []
+
+        # decide + non move actions
+        for i in acting:
+            if self.act_robot(i, (north[i], east[i], south[i], west[i], self.under[i])):
+                moves.append(i)
+
+        # collision resolution, all moves against the tick start grid
+        occupied = set(self.occupancy)
+        claimed = set()
+        for i in moves:
+            p = self.pos[i]
+            target = p + offsets[self.ori[i]]
+
+            if target in occupied or target in claimed or CELL_CLASSES[cells[target]] in BLOCKING:
+                self.last_action[i] = CRASHED
+                continue
+
+            claimed.add(target)
+            self.move_robot(i, target)
+
+        for i in acting:
+            self.counter[i] += 1
+            self.battery[i] = max(self.battery[i] - 1, 0)
+
+        self.charge_robots()
+        self.tick += 1
+
+        return len(acting)
+
+    def act_robot(self, robot_id: int, reading: tuple) -> bool:
+        """
+        Decide for robot_id and carry out clean / rotate / random turns
+
+        :return: bool   True if the robot wants to move forward (resolved by the caller)
+        """
+        i = robot_id
+        decision = self.decide(i, reading)
+        move = False
+
+        if "clean" in decision:
+            self.under[i] = ord("0")
+            self.last_action[i] = CLEANED
+            self.cells_cleaned += 1
+            self.clean_cell(i)
+
+        elif "move" in decision:
+            move = True
+
+        elif "rotate" in decision:
+            self.turn(i, DIRECTIONS.index(decision.split("_")[1]))
+            self.last_action[i] = ROTATED
+
+        elif "random" in decision:
+
+            if "keep_swimming" in decision:
+                move = True
+            else:
+                d = self.random_below(i, 4)
+                decision = f"random_{DIRECTIONS[d]}"
+                self.turn(i, d)
+                self.last_action[i] = RANDOM_DIRECTION
+
+        self.decisions[i] = decision
+        return move
+
+    def clean_cell(self, robot_id: int):
+        self.enviroment.index.clear_dirt(self.xy(robot_id))
+
+    def move_robot(self, robot_id: int, target: int):
+        """
+        Move robot_id onto flat grid index target (already checked free)
+        """
+        i = robot_id
+        p = self.pos[i]
+        old = self.xy(i)
+        cells = self.cells
+
+        self.under[i] = cells[target]
+        cells[p] = ord("0")
+        cells[target] = GLYPH_CODES[self.ori[i]]
+        self.pos[i] = target
+        del self.occupancy[p]
+        self.occupancy[target] = i
+        self.last_action[i] = MOVED
+        self.enviroment.index.move_robot(old, self.xy(i), GLYPHS[self.ori[i]], chr(self.under[i]))
+        self.enviroment.notify(old)
+        self.enviroment.notify(self.xy(i))
+
+    def turn(self, robot_id: int, direction: int):
+        """
+        Face robot_id towards DIRECTIONS[direction] and update the grid glyph
+        """
+        self.ori[robot_id] = direction
+        self.cells[self.pos[robot_id]] = GLYPH_CODES[direction]
+        self.enviroment.index.rotate_robot(self.xy(robot_id), GLYPHS[direction])
+        self.enviroment.notify(self.xy(robot_id))
+
+    def charge_robots(self):
+        """
+        Each station tops up the first robot found north, east, south, west
+        """
+        cells, w = self.cells, self.width
+
+        for s in self.stations:
+            for neighbour in (s - w, s + 1, s + w, s - 1):
+                robot_id = self.occupancy.get(neighbour)
+
+                if robot_id is not None and cells[neighbour] in GLYPH_CODES:
+                    self.charge_robot(robot_id)
+                    break
+
+    def charge_robot(self, robot_id: int):
+        if self.battery[robot_id] >= 95:
+            self.battery[robot_id] = 100
+        else:
+            self.battery[robot_id] += 5
+
+    def run(self, ticks: int = 1000) -> dict:
+        """
+        Step until ticks have run or every robot battery is dead
+
+        :return: dict   run summary
+        """
+        start = time.perf_counter()
+
+        for i in range(ticks):
+            if not self.step():
+                break
+
+        return {
+            "robots"        : len(self.pos),
+            "ticks"         : self.tick,
+            "cells_cleaned" : self.cells_cleaned,
+            "dirt_remaining": self.enviroment.dirt_remaining(),
+            "battery_dead"  : sum(1 for b in self.battery if b <= 0),
+            "wall_time"     : time.perf_counter() - start,
+        }
+
+    def xy(self, robot_id: int) -> tuple:
+        return divmod(self.pos[robot_id], self.width)[::-1]
+
+    def robot_state(self, robot_id: int) -> dict:
+        return {
+            "position"   : self.xy(robot_id),
+            "facing"     : GLYPHS[self.ori[robot_id]],
+            "battery"    : self.battery[robot_id],
+            "decision"   : self.decisions[robot_id],
+            "last_action": LAST_ACTIONS[self.last_action[robot_id]],
+            "moves"      : self.counter[robot_id],
+        }
+
+    def __str__(self):
+        return str(self.enviroment)
+
+
+def place_robots(fleet: Fleet, count: int, seed: int = 0):
+    """
+    Spread count extra robots over free floor cells (seeded, random facing)
+    """
+    free = [p for p in range(len(fleet.cells)) if fleet.cells[p] == ord(" ")]
+    state = seed_state(seed, -1)
+
+    for k in range(min(count, len(free))):
+        state, value = splitmix64(state)
+        p = free.pop(value % len(free))
+        fleet.add_robot((p % fleet.width, p // fleet.width), GLYPHS[value % 4])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Step a fleet of robots on one floorplan")
+    parser.add_argument("floorplan", nargs="?", default="./floorplans/floorplan_002.txt")
+    parser.add_argument("--robots", type=int, default=0, help="extra robots placed on random floor cells")
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--charge", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rules", default=None, help="rule config .json (rule order, battery threshold), e.g. written by tuning.py")
+    args = parser.parse_args(argv)
+
+    rules = load_rules(args.rules) if args.rules else None
+    fleet = Fleet(Environment(args.floorplan), args.charge, args.seed, rules)
+    place_robots(fleet, args.robots, args.seed)
+
+    print(fleet.run(args.ticks))
+
+
+if __name__ == "__main__":
+    main()
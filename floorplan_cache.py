@@ -0,0 +1,98 @@
+from grid import Grid
+from array import array
+import mmap
+import os
+import struct
+
+
+MAGIC = b"CRGRID01"
+
+# magic, source mtime_ns, source size, width, height, cells offset
+HEADER = struct.Struct("<8sqqIIQ")
+
+
+def cache_path(env_map: str) -> str:
+    """
+    Binary grid cache lives next to the floorplan, floorplan_002.txt -> floorplan_002.grid
+    """
+    return os.path.splitext(env_map)[0] + ".grid"
+
+
+def write_cache(env_map: str, grid: Grid) -> str:
+    """
+    Write grid to the cache file for env_map, tagged with the source file
+    mtime / size. Cells start on a page boundary so they can be mmapped.
+
+    :return: str   cache path
+    """
+    source = os.stat(env_map)
+    path = cache_path(env_map)
+
+    row_lengths = array("I", grid.row_lengths).tobytes()
+    offset = HEADER.size + len(row_lengths)
+    offset += -offset % mmap.ALLOCATIONGRANULARITY
+
+    # write then rename, readers never see a half written cache
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as file:
+        file.write(HEADER.pack(MAGIC, source.st_mtime_ns, source.st_size, grid.width, grid.height, offset))
+        file.write(row_lengths)
+        file.write(b"\0" * (offset - file.tell()))
+        file.write(grid.cells)
+
+    os.replace(tmp, path)
+    return path
+
+
+def read_cache(env_map: str) -> Grid | None:
+    """
+    Memory map the cached grid for env_map (copy on write: pages are shared
+    between every process that opens the same map until a cell is written).
+
+    :return: Grid backed by the mmap, or None if there is no cache / it is stale
+    """
+    path = cache_path(env_map)
+
+    try:
+        source = os.stat(env_map)
+
+        with open(path, "rb") as file:
+            magic, mtime_ns, size, width, height, offset = HEADER.unpack(file.read(HEADER.size))
+
+            if magic != MAGIC or mtime_ns != source.st_mtime_ns or size != source.st_size:
+                return None
+
+            row_lengths = array("I")
+            row_lengths.frombytes(file.read(4 * height))
+
+            if width * height == 0:
+                return Grid.from_buffer(bytearray(), width, row_lengths)
+
+            cells = mmap.mmap(file.fileno(), width * height, offset=offset, access=mmap.ACCESS_COPY)
+
+        return Grid.from_buffer(cells, width, row_lengths)
+
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def load_grid(env_map: str) -> Grid:
+    """
+    Open env_map through its binary cache, parsing the .txt and
+    (re)writing the cache only when the source has changed
+
+    :return: Grid
+    """
+    grid = read_cache(env_map)
+    if grid is not None:
+        return grid
+
+    grid = Grid.from_file(env_map)
+
+    try:
+        write_cache(env_map, grid)
+    except OSError:
+        # read only floorplan dir, use the parsed grid as is
+        return grid
+
+    return read_cache(env_map) or grid
@@ -0,0 +1,195 @@
+import argparse
+import math
+import random
+
+
+DIRT_TYPES = "qfsw"     # "d" is left out, Environment reads it as a station glyph
+
+
+def interior(value: int, size: int, room_size: int) -> bool:
+    """
+    True if a row / column index is inside a room (not a border or wall line)
+    """
+    if value <= 0 or value >= size - 1:
+        return False
+
+    return not room_size or value % room_size != 0
+
+
+def door(rng: random.Random, wall: int, next_wall: int, door_width: int) -> tuple:
+    """
+    Random door along a wall segment, between the walls at wall and next_wall
+
+    :return: tuple (first door cell, door size), size 0 if the segment has no room
+    """
+    span = next_wall - wall - 1
+    if span <= 0:
+        return 0, 0
+
+    size = min(door_width, span)
+    return wall + 1 + rng.randrange(span - size + 1), size
+
+
+def place_entities(rng: random.Random, width: int, height: int, room_size: int, robots: int, stations: int) -> dict:
+    """
+    Pick robot / station cells up front (the only per map state kept in memory).
+            Station i goes directly south of robot i when that cell is free,
+            like the hand drawn floorplans, any others go on random room cells
+
+    :return: dict (x, y) -> glyph
+    """
+    entities = {}
+    capacity = sum(interior(x, width, room_size) for x in range(width)) * sum(interior(y, height, room_size) for y in range(height))
+
+    if robots + stations > capacity:
+        raise ValueError(f"{robots} robots + {stations} stations do not fit in {capacity} room cells")
+
+    def random_cell() -> tuple:
+        while True:
+            x = rng.randrange(1, width - 1)
+            y = rng.randrange(1, height - 1)
+            if interior(x, width, room_size) and interior(y, height, room_size) and (x, y) not in entities:
+                return x, y
+
+    robot_cells = []
+    for i in range(robots):
+        pos = random_cell()
+        entities[pos] = "^"
+        robot_cells.append(pos)
+
+    for i in range(stations):
+        if i < len(robot_cells):
+            x, y = robot_cells[i]
+            if interior(y + 1, height, room_size) and (x, y + 1) not in entities:
+                entities[(x, y + 1)] = "u"
+                continue
+
+        entities[random_cell()] = "u"
+
+    return entities
+
+
+def generate_floorplan(path: str, width: int, height: int, room_size: int = 12, door_width: int = 2, dirt_density: float = 0.05, robots: int = 1, stations: int = 1, seed: int = 0) -> dict:
+    """
+    Write a seeded floorplan in the Environment.generate_map text format
+            ("x" walls, " " floor, dirt letters, "^" robots, "u" stations).
+
+            The map is a grid of room_size rooms (room_size 0 = one open room)
+            joined by door_width gaps in every wall. Rows are built and
+            written one at a time, so memory stays O(width) plus the
+            robot / station cells whatever the map size
+
+    :return: dict   summary (size, dirt cells, entity positions)
+    """
+    if width < 3 or height < 3:
+        raise ValueError("floorplan must be at least 3 x 3")
+
+    layout_rng = random.Random(seed)
+    dirt_rng = random.Random(seed + 1)
+    entities = place_entities(random.Random(seed + 2), width, height, room_size, robots, stations)
+
+    # entities per row, popped as rows are written
+    entity_rows = {}
+    for (x, y), glyph in entities.items():
+        entity_rows.setdefault(y, []).append((x, glyph))
+
+    rooms_x = range(0, width, room_size) if room_size else []
+    door_width = max(1, door_width)
+
+    # plain room row: border + vertical wall lines
+    band_row = bytearray(b" " * width)
+    band_row[0] = band_row[-1] = ord("x")
+    for x in rooms_x:
+        band_row[x] = ord("x")
+
+    # geometric gaps between dirt cells, cost scales with dirt not with area
+    log_miss = math.log(1 - dirt_density) if 0 < dirt_density < 1 else None
+    vertical_doors = []
+    dirt_cells = 0
+
+    with open(path, "wb") as file:
+
+        for y in range(height):
+
+            if y == 0 or y == height - 1:
+                file.write(b"x" * width + b"\n")
+                continue
+
+            if room_size and y % room_size == 0:
+                # horizontal wall line, one door per room above it
+                row = bytearray(b"x" * width)
+                for x in rooms_x:
+                    start, size = door(layout_rng, x, min(x + room_size, width - 1), door_width)
+                    row[start:start + size] = b" " * size
+            else:
+                if room_size and y % room_size == 1:
+                    # new band of rooms, pick the door rows in each vertical wall
+                    vertical_doors = [
+                        door(layout_rng, y - 1, min(y - 1 + room_size, height - 1), door_width)
+                        for x in rooms_x
+                    ]
+
+                row = bytearray(band_row)
+                for x, (start, size) in zip(rooms_x, vertical_doors):
+                    if 0 < x < width - 1 and start <= y < start + size:
+                        row[x] = ord(" ")
+
+            # dirt
+            if dirt_density >= 1:
+                candidates = [x for x in range(width) if row[x] == ord(" ")]
+            elif log_miss is None:
+                candidates = []
+            else:
+                candidates = []
+                x = -1
+                while True:
+                    x += 1 + int(math.log(1.0 - dirt_rng.random()) / log_miss)
+                    if x >= width:
+                        break
+                    if row[x] == ord(" "):
+                        candidates.append(x)
+
+            for x in candidates:
+                row[x] = ord(dirt_rng.choice(DIRT_TYPES))
+            dirt_cells += len(candidates)
+
+            for x, glyph in entity_rows.pop(y, []):
+                if row[x] != ord(" "):
+                    dirt_cells -= 1
+                row[x] = ord(glyph)
+
+            file.write(row + b"\n")
+
+    return {
+        "path"      : path,
+        "width"     : width,
+        "height"    : height,
+        "dirt"      : dirt_cells,
+        "robots"    : [pos for pos, glyph in entities.items() if glyph == "^"],
+        "stations"  : [pos for pos, glyph in entities.items() if glyph == "u"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a seeded floorplan for scale testing")
+    parser.add_argument("path")
+    parser.add_argument("--width", type=int, default=200)
+    parser.add_argument("--height", type=int, default=200)
+    parser.add_argument("--room-size", type=int, default=12, help="0 = one open room")
+    parser.add_argument("--door-width", type=int, default=2)
+    parser.add_argument("--dirt", type=float, default=0.05, help="chance a floor cell is dirty")
+    parser.add_argument("--robots", type=int, default=1)
+    parser.add_argument("--stations", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    summary = generate_floorplan(
+        args.path, args.width, args.height, args.room_size, args.door_width,
+        args.dirt, args.robots, args.stations, args.seed,
+    )
+    print(f"{summary['path']}: {summary['width']}x{summary['height']}, {summary['dirt']} dirt cells, "
+          f"{len(summary['robots'])} robots, {len(summary['stations'])} stations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+class Grid:
+    """
+    Compact 2D floorplan, one byte per cell in a flat bytearray (row major).
+
+    Cell codes are the latin-1 byte of the floorplan character, so "x" -> 120,
+    " " -> 32, "0" -> 48 ... and whole grid ops (count, find, translate) run on
+    self.cells at C speed. world[y][x] get / set of 1 char strs still works.
+
+    Ragged rows are padded out to self.width with PAD ("x", impassable),
+    self.row_lengths keeps the true lengths so __str__ matches the input file.
+
+    on_write, if set, is called with (x, y) after every set() (and so every
+    world[y][x] = c), the Environment hooks its listeners in here.
+    """
+
+    PAD = ord("x")
+
+    # cells a robot can never stand on (walls, stations)
+    WALLS = b"xudlr"
+
+    def __init__(self, rows: list, width: int | None = None):
+        self.height = len(rows)
+        self.row_lengths = [len(row) for row in rows]
+        self.width = width if width is not None else max(self.row_lengths, default=0)
+        self.cells = bytearray([self.PAD]) * (self.width * self.height)
+        self.on_write = None
+
+        for y, row in enumerate(rows):
+            start = y * self.width
+            self.cells[start:start + len(row)] = row.encode("latin-1")
+
+    @classmethod
+    def from_buffer(cls, cells, width: int, row_lengths: list) -> "Grid":
+        """
+        Wrap an existing row major cell buffer (bytearray, mmap ...) without copying
+        """
+        grid = cls.__new__(cls)
+        grid.height = len(row_lengths)
+        grid.row_lengths = list(row_lengths)
+        grid.width = width
+        grid.cells = cells
+        grid.on_write = None
+
+        return grid
+
+    @classmethod
+    def from_file(cls, path: str) -> "Grid":
+        """
+        Read a floorplan .txt file into a Grid
+
+        :param path: Path to environment map file
+        :return: Grid
+        """
+        with open(path, "r") as file:
+            return cls([line.strip() for line in file])
+
+    def walled(self) -> bool:
+        """
+        Every cell of the outer frame (padding included) is a wall or station,
+        so the flat neighbour offsets (-width, +1, +width, -1) of any cell a
+        robot can reach stay on its own row and inside the grid
+        """
+        w, h = self.width, self.height
+        if not w or not h:
+            return True
+
+        cells = self.cells
+        frame = bytes(cells[:w]) + bytes(cells[(h - 1) * w:h * w]) + bytes(cells[0:h * w:w]) + bytes(cells[w - 1:h * w:w])
+
+        return not frame.translate(None, self.WALLS)
+
+    def index(self, x: int, y: int) -> int:
+        """
+        Flat offset of (x, y) into self.cells, same index rules as list[y][x]
+        (negative wraps, out of range raises IndexError)
+        """
+        if y < 0:
+            y += self.height
+        if not 0 <= y < self.height:
+            raise IndexError("grid row index out of range")
+
+        length = self.row_lengths[y]
+        if x < 0:
+            x += length
+        if not 0 <= x < length:
+            raise IndexError("grid column index out of range")
+
+        return y * self.width + x
+
+    def get(self, x: int, y: int) -> str:
+        """
+        :return: str   1 char value of cell (x, y)
+        """
+        return chr(self.cells[self.index(x, y)])
+
+    def set(self, x: int, y: int, value: str):
+        """
+        Update cell (x, y) to the 1 char value, on_write is told which cell
+        """
+        i = self.index(x, y)
+        self.cells[i] = ord(value)
+
+        if self.on_write is not None:
+            self.on_write((i % self.width, i // self.width))
+
+    def row(self, y: int) -> str:
+        """
+        :return: str   row y as it appears in the floorplan
+        """
+        start = y * self.width
+        return self.cells[start:start + self.row_lengths[y]].decode("latin-1")
+
+    def count(self, value: str) -> int:
+        """
+        Count cells equal to the 1 char value (padding excluded)
+        """
+        # mmap backed cells have no count()
+        cells = self.cells if hasattr(self.cells, "count") else bytes(self.cells)
+        total = cells.count(ord(value))
+
+        if value == chr(self.PAD):
+            total -= self.width * self.height - sum(self.row_lengths)
+
+        return total
+
+    def nbytes(self) -> int:
+        return len(self.cells)
+
+    def __getitem__(self, y: int) -> "GridRow":
+        if y < 0:
+            y += self.height
+        if not 0 <= y < self.height:
+            raise IndexError("grid row index out of range")
+
+        return GridRow(self, y)
+
+    def __len__(self) -> int:
+        return self.height
+
+    def __iter__(self):
+        for y in range(self.height):
+            yield GridRow(self, y)
+
+    def __str__(self):
+        """
+        Join each row to generate out map
+        """
+        return "\n".join(self.row(y) for y in range(self.height))
+
+
+class GridRow:
+    """
+    View onto one row of a Grid, keeps world[y][x] reads and writes working
+    """
+
+    __slots__ = ("grid", "y")
+
+    def __init__(self, grid: Grid, y: int):
+        self.grid = grid
+        self.y = y
+
+    def __getitem__(self, x: int) -> str:
+        return self.grid.get(x, self.y)
+
+    def __setitem__(self, x: int, value: str):
+        self.grid.set(x, self.y, value)
+
+    def __len__(self) -> int:
+        return self.grid.row_lengths[self.y]
+
+    def __iter__(self):
+        return iter(self.grid.row(self.y))
+
+    def __str__(self):
+        return self.grid.row(self.y)
@@ -0,0 +1,343 @@
+from environment import Environment
+from entity_index import NOT_DIRT_BYTES, STATION_GLYPHS, WALL_GLYPH, is_dirt
+from floorplan_generator import DIRT_TYPES
+from array import array
+from collections import Counter
+import argparse
+import re
+
+
+# cells that are not floor: walls (and row padding) and stations
+NOT_FLOOR_BYTES = (WALL_GLYPH + STATION_GLYPHS).encode("latin-1")
+
+# cell code -> 1 for visited digit cells, else 0
+VISITED_TABLE = bytes(1 if chr(code).isdigit() else 0 for code in range(256))
+
+# cell code -> "#" for walls / stations, "." for anything a robot can stand on
+OPEN_TABLE = bytes(ord("#") if code in NOT_FLOOR_BYTES else ord(".") for code in range(256))
+OPEN_RUNS = re.compile(rb"\.+")
+
+
+def as_bytes(cells) -> bytes:
+    # mmap backed cells have no translate()
+    return cells if hasattr(cells, "translate") else bytes(cells)
+
+
+def floor_cells(grid) -> int:
+    """
+    Number of cells a robot can stand on (not wall, padding or station)
+    """
+    return len(as_bytes(grid.cells).translate(None, NOT_FLOOR_BYTES))
+
+
+def dirt_by_type(grid, under: dict | None = None) -> dict:
+    """
+    Dirt char -> cell count from one pass over the grid, plus the dirt
+    robots are standing on (index.under)
+    """
+    counts = Counter(as_bytes(grid.cells).translate(None, NOT_DIRT_BYTES))
+    dirt = {chr(code): count for code, count in counts.items()}
+
+    for char in (under or {}).values():
+        if is_dirt(char):
+            dirt[char] = dirt.get(char, 0) + 1
+
+    return dirt
+
+
+class RoomMap:
+    """
+    Rooms of a floorplan, found once from the walls. Gaps of door_width
+    cells or less between walls (doors, and narrow corridors) split rooms,
+    the open cells left are joined into rooms by connecting each row run
+    of cells to the overlapping runs of the row above (union find on runs).
+
+    A room is a list of (start, end) flat grid ranges, so per room counts
+    are slices of the grid / heatmap. Door cells belong to no room.
+    """
+
+    def __init__(self, grid, door_width: int = 2):
+        self.width = grid.width
+        self.size = len(grid.cells)
+        self.rooms = self.find_rooms(grid, door_width)
+        self._labels = None
+
+    def find_rooms(self, grid, door_width: int) -> list:
+        w, h = grid.width, grid.height
+        cells = as_bytes(grid.cells).translate(OPEN_TABLE)
+        room_cells = bytearray(cells)
+        narrow = re.compile(rb"(?<!\.)\.{1,%d}(?!\.)" % door_width)
+
+        # narrow gaps along rows, then down columns (strided slices of the grid)
+        for y in range(h):
+            start = y * w
+            for match in narrow.finditer(cells, start, start + w):
+                room_cells[match.start():match.end()] = b"#" * (match.end() - match.start())
+
+        for x in range(w):
+            column = cells[x::w]
+            for match in narrow.finditer(column):
+                room_cells[x + match.start() * w:x + match.end() * w:w] = b"#" * (match.end() - match.start())
+
+        runs = []
+        parent = []
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        above = []
+        for y in range(h):
+            start = y * w
+            row = [(match.start(), match.end()) for match in OPEN_RUNS.finditer(room_cells, start, start + w)]
+            ids = []
+
+            k = 0
+            for a, b in row:
+                run_id = len(runs)
+                runs.append((a, b))
+                parent.append(run_id)
+                ids.append(run_id)
+
+                # runs of the row above that overlap [a, b)
+                while k < len(above) and above[k][1] <= a - w:
+                    k += 1
+                j = k
+                while j < len(above) and above[j][0] < b - w:
+                    root, other = find(run_id), find(above[j][2])
+                    if root != other:
+                        parent[max(root, other)] = min(root, other)
+                    j += 1
+
+            above = [(a, b, run_id) for (a, b), run_id in zip(row, ids)]
+
+        rooms = {}
+        for run_id, run in enumerate(runs):
+            rooms.setdefault(find(run_id), []).append(run)
+
+        return list(rooms.values())
+
+    @property
+    def labels(self) -> array:
+        """
+        Room id of every grid cell, -1 outside rooms (walls, doors)
+        """
+        if self._labels is None:
+            self._labels = array("i", [-1]) * self.size
+            for room_id, room in enumerate(self.rooms):
+                for a, b in room:
+                    self._labels[a:b] = array("i", [room_id]) * (b - a)
+
+        return self._labels
+
+    def room_of(self, pos: tuple) -> int:
+        x, y = pos
+        return self.labels[y * self.width + x]
+
+    def __len__(self) -> int:
+        return len(self.rooms)
+
+
+class Metrics:
+    """
+    Coverage / cleanliness metrics of one Environment, cheap enough to
+    sample every tick on large maps:
+
+        coverage  - cells ever stood on (or digit cells in the floorplan) over
+                    floor cells, counted as robots arrive, so O(robots)
+        dirt      - per dirt type, read from the entity index counts
+        heatmap   - visits per cell (uint32 array over the flat grid), a
+                    visit is a robot arriving between two samples
+
+    Works with anything that keeps env.index up to date (Simulation, Fleet).
+    The per room breakdown (rooms()) slices the grid and heatmap per room,
+    so it is for the end of a run rather than every tick.
+    """
+
+    def __init__(self, env: Environment, door_width: int = 2):
+        self.enviroment = env
+        self.grid = env.world
+        self.width = env.world.width
+        self.door_width = door_width
+        self.floor = floor_cells(self.grid)
+
+        self.seen = bytearray(as_bytes(self.grid.cells).translate(VISITED_TABLE))
+        self.heat = array("I", [0]) * len(self.grid.cells)
+        self.visited = self.seen.count(1)
+        self.visits = 0
+        self.first_visits = 0
+        self.positions = set(env.index.robots)
+        self.room_map = None
+
+        # sampled series, one entry per sample()
+        self.ticks = array("I")
+        self.coverage_series = array("d")
+        self.dirt_series = array("I")
+        self.revisit_series = array("I")
+        self.dirt_type_series = {char: array("I") for char in DIRT_TYPES}
+
+        self.arrive(env.index.robots)
+
+    def arrive(self, positions):
+        heat, seen, w = self.heat, self.seen, self.width
+
+        for x, y in positions:
+            p = y * w + x
+            if not heat[p]:
+                self.first_visits += 1
+            heat[p] += 1
+            self.visits += 1
+
+            if not seen[p]:
+                seen[p] = 1
+                self.visited += 1
+
+    def sample(self, tick: int):
+        """
+        Count robots that arrived on a cell since the last sample, then
+        append the current values to the series
+        """
+        positions = self.enviroment.index.robots.keys()
+        self.arrive(positions - self.positions)
+        self.positions = set(positions)
+
+        dirt = self.enviroment.index.dirt_counts
+        self.ticks.append(tick)
+        self.coverage_series.append(self.coverage())
+        self.dirt_series.append(sum(dirt.values()))
+        self.revisit_series.append(self.revisits())
+
+        for char in dirt.keys() - self.dirt_type_series.keys():
+            self.dirt_type_series[char] = array("I", [0]) * (len(self.ticks) - 1)
+        for char, series in self.dirt_type_series.items():
+            series.append(dirt.get(char, 0))
+
+    def coverage(self) -> float:
+        """
+        :return: float   % of floor cells visited
+        """
+        return 100 * self.visited / self.floor if self.floor > 0 else 0.0
+
+    def revisits(self) -> int:
+        """
+        Visits to cells that had already been visited
+        """
+        return self.visits - self.first_visits
+
+    def dirt(self) -> dict:
+        """
+        Dirt char -> cells remaining, every DIRT_TYPES char included
+        """
+        dirt = dict.fromkeys(DIRT_TYPES, 0)
+        dirt.update(self.enviroment.index.dirt_counts)
+        return dirt
+
+    def heatmap(self) -> list:
+        """
+        :return: list of array   visits per cell, one array per floorplan row
+        """
+        w = self.width
+        return [self.heat[y * w:y * w + length] for y, length in enumerate(self.grid.row_lengths)]
+
+    def rooms(self) -> list:
+        """
+        Per room breakdown, rooms numbered in row major order of their first cell
+
+        :return: list of dict {"room", "cells", "visited", "coverage", "visits", "dirt"}
+        """
+        if self.room_map is None:
+            self.room_map = RoomMap(self.grid, self.door_width)
+
+        cells = as_bytes(self.grid.cells)
+        heat, seen = self.heat, self.seen
+        rows = []
+
+        for room_id, room in enumerate(self.room_map.rooms):
+            size = visited = visits = dirt = 0
+
+            for a, b in room:
+                size += b - a
+                visited += seen.count(1, a, b)
+                visits += sum(heat[a:b])
+                dirt += len(cells[a:b].translate(None, NOT_DIRT_BYTES))
+
+            rows.append({"room": room_id, "cells": size, "visited": visited, "coverage": 100 * visited / size, "visits": visits, "dirt": dirt})
+
+        # dirt robots are standing on (the grid holds their glyph)
+        for pos, char in self.enviroment.index.under.items():
+            room_id = self.room_map.room_of(pos)
+            if room_id >= 0 and is_dirt(char):
+                rows[room_id]["dirt"] += 1
+
+        return rows
+
+    def arrays(self) -> dict:
+        """
+        Every series plus the flat heatmap, as arrays for analysis
+        (numpy.asarray / numpy.frombuffer take them without copying)
+        """
+        series = {
+            "tick"          : self.ticks,
+            "coverage"      : self.coverage_series,
+            "dirt_remaining": self.dirt_series,
+            "revisits"      : self.revisit_series,
+        }
+        series.update({f"dirt_{char}": values for char, values in self.dirt_type_series.items()})
+        series["heatmap"] = self.heat
+
+        return series
+
+    def save(self, prefix: str):
+        """
+        Write prefix.csv (one row per sample) and prefix.heat (raw native
+        uint32 heatmap, grid.height x grid.width row major)
+        """
+        series = self.arrays()
+        heat = series.pop("heatmap")
+
+        with open(f"{prefix}.csv", "w") as file:
+            file.write(",".join(series) + "\n")
+            for row in zip(*series.values()):
+                file.write(",".join(f"{value:.3f}" if isinstance(value, float) else str(value) for value in row) + "\n")
+
+        with open(f"{prefix}.heat", "wb") as file:
+            heat.tofile(file)
+
+
+def format_metrics(metrics: Metrics, rooms: bool = True) -> str:
+    """
+    Output messages for a Metrics snapshot
+    """
+    dirt = "  ".join(f"{char} {count}" for char, count in metrics.dirt().items())
+    lines = [
+        "\n        -- Metrics -- ",
+        f"Coverage                  :   {metrics.coverage():.1f}% ",
+        f"Visited Cells             :   {metrics.visited} / {metrics.floor} ",
+        f"Revisits                  :   {metrics.revisits()} ",
+        f"Most Visits               :   {max(metrics.heat, default=0)} ",
+        f"Dirt Remaining            :   {dirt} ",
+    ]
+
+    if rooms:
+        lines.append("\n        -- Rooms -- ")
+        lines.append(f"{'room':>5} {'cells':>8} {'visited':>8} {'coverage':>9} {'visits':>8} {'dirt':>6}")
+        for row in metrics.rooms():
+            lines.append(f"{row['room']:>5} {row['cells']:>8} {row['visited']:>8} {row['coverage']:>8.1f}% {row['visits']:>8} {row['dirt']:>6}")
+
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rooms of a floorplan, as found by the metrics module")
+    parser.add_argument("floorplan", nargs="?", default="./floorplans/floorplan_002.txt")
+    parser.add_argument("--door-width", type=int, default=2, help="wall gaps this wide or less are doors")
+    args = parser.parse_args(argv)
+
+    metrics = Metrics(Environment(args.floorplan), args.door_width)
+    print(format_metrics(metrics))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+from collections import deque
+from array import array
+import heapq
+
+
+DIRECTIONS = ["north", "east", "south", "west"]
+UNREACHED = -1
+
+
+def build_passable() -> bytes:
+    """
+    256 entry table, byte cell code -> 1 if a robot can stand on it
+    (anything but walls and charging stations)
+    """
+    table = bytearray([1]) * 256
+    for char in "xudlr":
+        table[ord(char)] = 0
+
+    return bytes(table)
+
+
+PASSABLE = build_passable()
+
+
+class DistanceField:
+    """
+    Shortest path distance (in moves) from every cell to the nearest source
+    cell, multi source BFS over the grid (4 neighbour, walls / stations block).
+
+    Computed once, then reused every tick. Removing a source only repairs
+    the cells that were closest to it (add_source / remove_source), so a
+    robot cleaning dirt never triggers a full recompute.
+
+    Positions are (x, y) tuples, internally flat grid offsets
+    """
+
+    def __init__(self, grid, sources):
+        self.grid = grid
+        self.width = grid.width
+        self.offsets = (-grid.width, 1, grid.width, -1)
+        self.dist = array("i", [UNREACHED]) * (grid.width * grid.height)
+        self.source = array("i", [UNREACHED]) * (grid.width * grid.height)
+        self.sources = set()
+
+        queue = deque()
+        for x, y in sources:
+            p = y * self.width + x
+            if p not in self.sources:
+                self.sources.add(p)
+                self.dist[p] = 0
+                self.source[p] = p
+                queue.append(p)
+
+        self.expand(queue)
+
+    def passable(self, p: int) -> bool:
+        return 0 <= p < len(self.dist) and PASSABLE[self.grid.cells[p]]
+
+    def expand(self, queue: deque):
+        """
+        BFS out from the queued cells, only ever lowering distances
+        """
+        dist, source, offsets = self.dist, self.source, self.offsets
+        cells = self.grid.cells
+
+        while queue:
+            p = queue.popleft()
+            d = dist[p] + 1
+
+            for offset in offsets:
+                n = p + offset
+                if 0 <= n < len(dist) and PASSABLE[cells[n]] and (dist[n] == UNREACHED or dist[n] > d):
+                    dist[n] = d
+                    source[n] = source[p]
+                    queue.append(n)
+
+    def add_source(self, pos: tuple):
+        x, y = pos
+        p = y * self.width + x
+        if p in self.sources:
+            return
+
+        self.sources.add(p)
+        self.dist[p] = 0
+        self.source[p] = p
+        self.expand(deque([p]))
+
+    def remove_source(self, pos: tuple):
+        """
+        Drop a source and repair only the region that was closest to it:
+        reset it, then Dijkstra back in from its border with the rest of
+        the field
+        """
+        x, y = pos
+        s = y * self.width + x
+        if s not in self.sources:
+            return
+
+        self.sources.discard(s)
+        dist, source, offsets = self.dist, self.source, self.offsets
+
+        # region fed by s (connected through BFS parents)
+        region = [s]
+        seen = {s}
+        i = 0
+        while i < len(region):
+            p = region[i]
+            i += 1
+            for offset in offsets:
+                n = p + offset
+                if n not in seen and 0 <= n < len(dist) and source[n] == s:
+                    seen.add(n)
+                    region.append(n)
+
+        for p in region:
+            dist[p] = UNREACHED
+            source[p] = UNREACHED
+
+        # border of the region seeds the repair
+        heap = []
+        for p in region:
+            if not self.passable(p):
+                continue
+            for offset in offsets:
+                n = p + offset
+                if 0 <= n < len(dist) and dist[n] != UNREACHED and n not in seen:
+                    heap.append((dist[n] + 1, p, source[n]))
+
+        heapq.heapify(heap)
+        while heap:
+            d, p, origin = heapq.heappop(heap)
+            if dist[p] != UNREACHED and dist[p] <= d:
+                continue
+
+            dist[p] = d
+            source[p] = origin
+
+            for offset in offsets:
+                n = p + offset
+                if n in seen and self.passable(n) and (dist[n] == UNREACHED or dist[n] > d + 1):
+                    heapq.heappush(heap, (d + 1, n, origin))
+
+    def distance(self, pos: tuple) -> int | None:
+        """
+        :return: int moves to the nearest source or None if none is reachable
+        """
+        x, y = pos
+        d = self.dist[y * self.width + x]
+
+        return None if d == UNREACHED else d
+
+    def next_direction(self, pos: tuple, prefer: str | None = None) -> str | None:
+        """
+        Direction of the first step on a shortest path from pos, prefer
+        (the current heading) wins ties so robots don't turn needlessly
+
+        :return: str north, east, south, west or None (at a source / unreachable)
+        """
+        x, y = pos
+        p = y * self.width + x
+        d = self.dist[p]
+        if d == UNREACHED or d == 0:
+            return None
+
+        order = DIRECTIONS if prefer is None else [prefer] + [direction for direction in DIRECTIONS if direction != prefer]
+
+        for direction in order:
+            n = p + self.offsets[DIRECTIONS.index(direction)]
+            if 0 <= n < len(self.dist) and self.dist[n] == d - 1 and self.passable(n):
+                return direction
+
+        return None
@@ -0,0 +1,184 @@
+from collections import Counter
+import marshal
+import time
+
+
+class Profiler:
+    """
+    Opt in per phase timing. attach() wraps the hot methods of one object
+    (instance attributes over the class methods), so nothing is timed and
+    nothing costs anything until an object is attached, and detach() puts
+    the plain methods back.
+
+    Per phase: call count, cumulative time (including the phases it calls)
+    and own time, plus who called it. Objects with a decision attribute get
+    a histogram of decisions after each act().
+
+    stats() returns it all as a dict, dump() writes a cProfile compatible
+    file for pstats / snakeviz.
+    """
+
+    ROBOT_PHASES = ["act", "sense", "decide", "move", "rotate", "check_dock"]
+    ROBOT_LOGIC_PHASES = ["reset_facts", "decide_from_codes", "decide_from_facts", "update_facts_from_codes", "update_battery_life", "update_last_action", "update_facts_from_planner", "update_facts_from_dock", "decide_action"]
+    STATION_PHASES = ["act", "sense", "decide"]
+    STATION_LOGIC_PHASES = ["reset_facts", "update_facts_from_codes", "decide_action"]
+    ENVIRONMENT_PHASES = ["move_robot", "rotate_robot", "clear_cell"]
+
+    def __init__(self):
+        self.calls = Counter()
+        self.cumtime = Counter()
+        self.tottime = Counter()
+        self.callers = {}           # phase -> Counter of calling phases
+        self.decisions = {}         # label -> Counter of decisions
+        self.code = {}              # phase -> (file, line, name) for dump()
+        self.stack = []             # [phase, time spent in child phases]
+        self.attached = []          # (obj, method name)
+        self.caches = {}            # label -> DecisionCache
+        self.paused = []            # Simulations fast forward was turned off for
+
+    def attach(self, obj, methods: list, label: str | None = None):
+        """
+        Time methods of obj as phases "<label>.<method>", label defaults to the class name
+        """
+        label = label or type(obj).__name__
+
+        for name in methods:
+            method = getattr(obj, name, None)
+            if method is None or name in vars(obj):
+                continue
+
+            phase = f"{label}.{name}"
+            code = getattr(method, "__code__", None)
+            self.code[phase] = (code.co_filename, code.co_firstlineno, phase) if code else ("~", 0, phase)
+
+            setattr(obj, name, self.wrap(method, phase, obj if name == "act" and hasattr(obj, "decision") else None, label))
+            self.attached.append((obj, name))
+
+    def wrap(self, method, phase: str, decider, label: str):
+        stack = self.stack
+        clock = time.perf_counter
+        histogram = self.decisions.setdefault(label, Counter()) if decider is not None else None
+
+        def timed(*args, **kwargs):
+            caller = stack[-1][0] if stack else None
+            frame = [phase, 0.0]
+            stack.append(frame)
+            start = clock()
+
+            try:
+                return method(*args, **kwargs)
+
+            finally:
+                elapsed = clock() - start
+                stack.pop()
+
+                self.calls[phase] += 1
+                self.cumtime[phase] += elapsed
+                self.tottime[phase] += elapsed - frame[1]
+                self.callers.setdefault(phase, Counter())[caller] += 1
+
+                if stack:
+                    stack[-1][1] += elapsed
+
+                if histogram is not None:
+                    histogram[decider.decision] += 1
+
+        return timed
+
+    def attach_simulation(self, sim):
+        """
+        Attach to the robots, stations and environment of a Simulation
+        (every robot / station shares its class's phases). Fast forward is
+        off while attached, batched ticks run no phases and no cache lookups
+        """
+        if sim.fast_forward:
+            sim.fast_forward = False
+            self.paused.append(sim)
+
+        for robot in sim.robots:
+            self.attach(robot, self.ROBOT_PHASES, "Robot")
+            self.attach(robot.logic, self.ROBOT_LOGIC_PHASES, "RobotLogicSystem")
+
+            if robot.logic.cache is not None:
+                self.caches.setdefault("RobotLogicSystem", []).append(robot.logic.cache)
+
+        for station in sim.stations:
+            self.attach(station, self.STATION_PHASES, "Station")
+            self.attach(station.logic, self.STATION_LOGIC_PHASES, "ChargingStationLogicSystem")
+
+        self.attach(sim.enviroment, self.ENVIRONMENT_PHASES, "Environment")
+
+    def detach(self):
+        for obj, name in self.attached:
+            delattr(obj, name)
+
+        self.attached = []
+
+        for sim in self.paused:
+            sim.fast_forward = True
+
+        self.paused = []
+
+    def stats(self) -> dict:
+        """
+        :return: dict   {"phases": {phase: {"calls", "cumtime", "tottime", "per_call"}},
+                         "decisions": {label: {decision: count}},
+                         "caches": {label: {"hits", "misses", "evictions", "invalidations"}}}
+        """
+        return {
+            "phases": {
+                phase: {
+                    "calls"   : calls,
+                    "cumtime" : self.cumtime[phase],
+                    "tottime" : self.tottime[phase],
+                    "per_call": self.cumtime[phase] / calls,
+                }
+                for phase, calls in self.calls.most_common()
+            },
+            "decisions": {label: dict(histogram.most_common()) for label, histogram in self.decisions.items()},
+            "caches": {
+                label: {field: sum(cache.stats()[field] for cache in caches) for field in ["hits", "misses", "evictions", "invalidations"]}
+                for label, caches in self.caches.items()
+            },
+        }
+
+    def dump(self, path: str):
+        """
+        Write the phases in the cProfile / pstats.Stats file format
+        (marshalled {(file, line, name): (calls, calls, tottime, cumtime, callers)})
+        """
+        stats = {}
+
+        for phase, calls in self.calls.items():
+            callers = {}
+            for caller, count in self.callers[phase].items():
+                if caller is not None:
+                    share = count / calls
+                    callers[self.code[caller]] = (count, count, self.tottime[phase] * share, self.cumtime[phase] * share)
+
+            stats[self.code[phase]] = (calls, calls, self.tottime[phase], self.cumtime[phase], callers)
+
+        with open(path, "wb") as file:
+            marshal.dump(stats, file)
+
+
+def format_stats(stats: dict) -> str:
+    """
+    Output messages for Profiler.stats()
+    """
+    lines = ["\n        -- Profile -- ", f"{'phase':<52} {'calls':>9} {'cum s':>10} {'own s':>10} {'us/call':>9}"]
+
+    for phase, row in stats["phases"].items():
+        lines.append(f"{phase:<52} {row['calls']:>9} {row['cumtime']:>10.4f} {row['tottime']:>10.4f} {row['per_call'] * 1e6:>9.2f}")
+
+    for label, histogram in stats["decisions"].items():
+        lines.append(f"\n        -- {label} Decisions -- ")
+        for decision, count in histogram.items():
+            lines.append(f"{str(decision):<52} {count:>9}")
+
+    for label, cache in stats.get("caches", {}).items():
+        lookups = cache["hits"] + cache["misses"]
+        lines.append(f"\n        -- {label} Decision Cache -- ")
+        lines.append(f"hits {cache['hits']}  misses {cache['misses']}  evictions {cache['evictions']}  invalidations {cache['invalidations']}  hit rate {100 * cache['hits'] / lookups if lookups else 0:.1f}%")
+
+    return "\n".join(lines) + "\n"
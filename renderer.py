@@ -0,0 +1,97 @@
+import sys
+
+
+class RowRenderer:
+    """
+    Cached floorplan string. Each row is kept as a str, the Environment
+    listener marks the rows a robot move / turn touched and only those are
+    rebuilt from the grid on the next render, so an idle or 1 cell change
+    frame costs no per cell work.
+    """
+
+    def __init__(self, env):
+        self.grid = env.world
+        self.rows = [self.grid.row(y) for y in range(self.grid.height)]
+        self.dirty = set()
+        self.frame = "\n".join(self.rows)
+
+        env.add_listener(self.cell_changed)
+
+    def cell_changed(self, pos: tuple):
+        """
+        Environment listener, a grid cell changed
+        """
+        self.dirty.add(pos[1])
+
+    def render(self) -> str:
+        """
+        :return: str   the whole map, same as str(grid)
+        """
+        if self.dirty:
+            for y in self.dirty:
+                self.rows[y] = self.grid.row(y)
+
+            self.dirty.clear()
+            self.frame = "\n".join(self.rows)
+
+        return self.frame
+
+
+class AnsiRenderer:
+    """
+    Live terminal view. The first frame clears the screen and draws the
+    whole map, after that a frame is only the ANSI cursor moves + chars of
+    the cells that changed since the last one (2 per robot move).
+
+    top  int screen row the map starts on (1 based), rows above are free
+         for status lines
+    """
+
+    CLEAR = "\x1b[2J"
+
+    def __init__(self, env, top: int = 1):
+        self.grid = env.world
+        self.top = top
+        self.changed = set()
+        self.drawn = False
+
+        env.add_listener(self.cell_changed)
+
+    def cell_changed(self, pos: tuple):
+        """
+        Environment listener, a grid cell changed
+        """
+        self.changed.add(pos)
+
+    def move_to(self, x: int, y: int) -> str:
+        """
+        :return: str   ANSI cursor position for grid cell (x, y)
+        """
+        return f"\x1b[{self.top + y};{x + 1}H"
+
+    def render(self, status: list | None = None) -> str:
+        """
+        :param: status  list of str status lines drawn above the map (top - 1 at most)
+        :return: str   escape sequence updating the terminal to the current grid,
+                       cursor left on the line below the map
+        """
+        grid = self.grid
+
+        if not self.drawn:
+            self.drawn = True
+            self.changed.clear()
+            frame = [self.CLEAR, self.move_to(0, 0), str(grid)]
+
+        else:
+            frame = [self.move_to(x, y) + grid.get(x, y) for x, y in sorted(self.changed, key=lambda pos: (pos[1], pos[0]))]
+            self.changed.clear()
+
+        for line, text in enumerate(status or [], start=1):
+            frame.append(f"\x1b[{line};1H\x1b[2K{text}")
+
+        frame.append(self.move_to(0, grid.height))
+        return "".join(frame)
+
+    def draw(self, stream=sys.stdout, status: list | None = None):
+        stream.write(self.render(status))
+        stream.flush()
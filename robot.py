@@ -1,54 +1,40 @@
 from environment import Environment
+from sensors import to_dict
 from robot_logic import RobotLogicSystem
+from rule_config import DEFAULT_RULES, rule_list
 import random
 
+# charge level a docked robot waits for before it leaves the station
+DOCK_RESUME = 95
+
 class Robot():
 
-    def __init__(self, position: tuple, ori: str, charge: int, env: object):        
-        self.logic = RobotLogicSystem()
-        self.setup_logic_rules()        
+    def __init__(self, position: tuple, ori: str, charge: int, env: object, rng: random.Random | None = None, planner: bool = False, dock: bool = False, dock_margin: int = 10, rules: dict | None = None):        
         self.enviroment = env
+        self.rng = rng if rng is not None else env.rng
+        self.planner = planner
+        self.dock = dock
+        self.dock_margin = dock_margin
+        self.returning = False
+        self.rules = rules or DEFAULT_RULES
+        self.logic = RobotLogicSystem(rng=self.rng, battery_threshold=self.rules["battery_threshold"])
+        self.setup_logic_rules(self.rules)
         self.battery = charge
         self.position = position
         self.decision = None
+        env.add_occupant(position, self)
         self.senser_values = self.sense()
         self.orientation = ori
         self.last_action = None
         self.counter = 0
 
-    def setup_logic_rules(self):
+    def setup_logic_rules(self, rules: dict | None = None):
         """
-        Expert System logic / rules        
+        Expert System logic / rules, the groups of rule_config.RULE_GROUPS in
+        rules["order"] (dirt first, then clear, then random by default)
         """
-        # Clean current cell if dirty
-        self.logic.add_rule(["current_cell_dirty"], "clean")
-
-        # Battery dead. End program
-        self.logic.add_rule(["battery_dead"], "battery_dead")
-
-        # Move forward if Filth is present
-        self.logic.add_rule(["front_dirty", "battery_ok"], "move_forward")
-
-        # Rotate to closest Filth
-        self.logic.add_rule(["north_dirty", "battery_ok"], "rotate_north")
-        self.logic.add_rule(["east_dirty", "battery_ok"], "rotate_east")
-        self.logic.add_rule(["south_dirty", "battery_ok"], "rotate_south")
-        self.logic.add_rule(["west_dirty", "battery_ok"], "rotate_west")
-
-        # Prioritise Clear
-        # Move Forward
-        self.logic.add_rule(["front_clear", "battery_ok"], "move_forward")
-
-        # Rotate
-        self.logic.add_rule(["north_clear", "battery_ok"], "rotate_north")
-        self.logic.add_rule(["east_clear", "battery_ok"], "rotate_east")
-        self.logic.add_rule(["south_clear", "battery_ok"], "rotate_south")
-        self.logic.add_rule(["west_clear", "battery_ok"], "rotate_west")
-
-        # Last resort
-        # Randomly move
-        self.logic.add_rule(["surrounded", "spin_to_win", "battery_ok"], "random_direction")
-        self.logic.add_rule(["surrounded", "on_to_glory", "battery_ok"], "random_keep_swimming")
+        for conditions, conclusion in rule_list(rules, self.planner, self.dock):
+            self.logic.add_rule(conditions, conclusion)
 
 
     def charge_consumption(self, usage: int) -> bool:
@@ -68,11 +54,10 @@ class Robot():
     def sense(self):
         """
         Get values around the robot, store within self.values
-            Expected values : dict (str of values, north, east, south, west 
-                                and current value of input pos) 
-                OR None
+            Expected values : tuple of cell codes (north, east, south, west 
+                                and current value of input pos), see sensors.py
         """
-        self.senser_values = self.enviroment.get_cells(self.position)
+        self.senser_values = self.enviroment.sense(self.position)
 
 
     def decide(self) -> str:
@@ -90,14 +75,38 @@ class Robot():
         :return: str: the decision, move, clean or rotate (north, east, south, west)
         """
 
-        # Pass facts from sensors/battery
         self.logic.reset_facts()
-        self.logic.update_facts_from_sensors(self.senser_values, self.orientation)
-        self.logic.update_battery_life(self.battery)
-        self.logic.update_last_action(self.last_action)
 
-        # Decide on action
-        return self.logic.decide_action()
+        if self.dock:
+            self.check_dock()
+
+        if self.planner:
+            field = self.enviroment.dirt_field()
+            self.logic.update_facts_from_planner(field.next_direction(self.position, self.ori_lookup(self.orientation)), self.orientation)
+
+        # Pass facts from sensors/battery, decide on action (cached per sensor state when the logic has a cache)
+        return self.logic.decide_from_codes(self.senser_values, self.orientation, self.battery, self.last_action)
+
+    def check_dock(self):
+        """
+        Start returning once the battery only covers the trip home (+ dock_margin),
+        stop once charged back up, pass the route home to the logic system
+        """
+        field = self.enviroment.dock_field()
+        distance = field.distance(self.position)
+
+        if distance is None:
+            self.returning = False
+            return
+
+        if not self.returning and self.battery <= distance + self.dock_margin:
+            self.returning = True
+
+        elif self.returning and distance == 0 and self.battery >= DOCK_RESUME:
+            self.returning = False
+
+        if self.returning:
+            self.logic.update_facts_from_dock(field.next_direction(self.position, self.ori_lookup(self.orientation)), distance == 0, self.orientation)
 
     def move(self):
         """
@@ -108,7 +117,7 @@ class Robot():
         new_pos = self.movement_lookup(self.ori_lookup(self.orientation))
         
         # attempt move
-        self.position = self.enviroment.move_robot(new_pos, self.orientation)
+        self.position = self.enviroment.move_robot(new_pos, self.orientation, self.position)
 
         if self.position == new_pos:
             self.last_action = 'moved'
@@ -124,9 +133,7 @@ class Robot():
         self.orientation = self.ori_lookup(self.decision.split("_")[1])
 
         # update env
-        self.enviroment.robot_ori = self.ori_lookup(self.decision.split("_")[1])
-        x, y = self.position
-        self.enviroment.world[y][x] = self.orientation
+        self.enviroment.rotate_robot(self.position, self.orientation)
 
 
     def act(self):
@@ -151,13 +158,16 @@ class Robot():
             self.rotate()
             self.last_action = 'rotated'
         
+        elif "dock_wait" in self.decision:
+            self.last_action = "docked"
+
         elif "random" in self.decision:
             
             if "keep_swimming" in self.decision:
                 self.move()
             else:
                 directions = ["north", "east", "south", "west"]
-                random.shuffle(directions)
+                self.rng.shuffle(directions)
 
                 self.decision = f"random_{directions[0]}"
                 self.rotate()
@@ -223,7 +233,7 @@ class Robot():
             f"Facing                    :   {self.orientation} \n"
             f"Current Sensor Values     :   {curr_sensers} \n\n"
 
-            f"Last Sensor Values        :   {self.senser_values} \n"
+            f"Last Sensor Values        :   {to_dict(self.senser_values)} \n"
             f"Last Decision             :   {self.decision} \n"
             f"Last Action               :   {self.last_action}\n"
             f"Battery                   :   {self.battery}% \n"
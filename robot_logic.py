@@ -1,17 +1,26 @@
+from rule_engine import RuleEngine
+from sensors import CELL_CLASSES, POS, VISITED, BLOCKED, DIRT, from_dict as sensors_codes
 import random
 
-class RobotLogicSystem:
-    
-    def __init__(self):
-        self.rules = []
-        self.facts = set()
-        self.direction_priority = ["north", "east", "south", "west"]
+# fact names built once, not per tick
+DIRTY_FACTS = {direction: f"{direction}_dirty" for direction in ["north", "east", "south", "west"]}
+BLOCKED_FACTS = {direction: f"{direction}_blocked" for direction in ["north", "east", "south", "west"]}
+CLEAR_FACTS = {direction: f"{direction}_clear" for direction in ["north", "east", "south", "west"]}
+PATH_FACTS = {direction: f"path_{direction}" for direction in ["north", "east", "south", "west"]}
+DOCK_FACTS = {direction: f"dock_{direction}" for direction in ["north", "east", "south", "west"]}
+FRONT = {"^": "north", "v": "south", "<": "west", ">": "east"}
+DIRECTION_INDEX = {"north": 0, "east": 1, "south": 2, "west": 3}
+FRONT_INDEX = {ori: DIRECTION_INDEX[direction] for ori, direction in FRONT.items()}
 
-    def add_rule(self, conditions, conclusion):
-        self.rules.append({"conditions": conditions, "conclusion": conclusion})
+class RobotLogicSystem(RuleEngine):
 
-    def add_fact(self, fact):
-        self.facts.add(fact)
+    default_conclusion = "robot_lost"
+    
+    def __init__(self, compiled: bool = True, rng: random.Random | None = None, cache_size: int = 0, battery_threshold: int = 1):
+        super().__init__(compiled, cache_size)
+        self.direction_priority = ["north", "east", "south", "west"]
+        self.rng = rng if rng is not None else random
+        self.battery_threshold = battery_threshold
 
     def update_last_action(self, last_action):
         """
@@ -27,10 +36,10 @@ class RobotLogicSystem:
 
     def update_battery_life(self, battery):
         """
-        battery: int 0-100
+        battery: int 0-100, dead at or below self.battery_threshold
         """
         
-        if battery <= 1:
+        if battery <= self.battery_threshold:
             fact = "battery_dead"
         else:
             fact = "battery_ok"
@@ -45,58 +54,174 @@ class RobotLogicSystem:
         :param: sensors  dict like {"pos": "d", "north": " ", "south": "d", ...}
                 orientation  str like "^", "v", "<", ">"
         """
-        if sensors["pos"] not in ["u", " ", "d", "l", "r", "x", "^", "v", "<", ">"] and not sensors["pos"].isdigit():
-            self.add_fact("current_cell_dirty")
+        self.update_facts_from_codes(sensors_codes(sensors), orientation)
 
-        directions_clear = 0
+    def update_facts_from_codes(self, reading: tuple, orientation: str):
+        """
+        Facts from an Environment.sense reading, cell codes are classified
+        through the CELL_CLASSES table (no str tests per tick)
 
+        :param: reading  tuple of cell codes (north, east, south, west, pos)
+                orientation  str like "^", "v", "<", ">"
+        """
         # random compass directions
-        random.shuffle(self.direction_priority)
+        self.rng.shuffle(self.direction_priority)
+
+        self.add_sensor_facts(reading, orientation)
+
+    def add_sensor_facts(self, reading: tuple, orientation: str):
+        """
+        update_facts_from_codes for the current direction_priority (no shuffle)
+        """
+        if CELL_CLASSES[reading[POS]] == DIRT:
+            self.add_fact("current_cell_dirty")
+
+        directions_clear = 0
 
         # check front sensers as Prio
-        if sensors[self.ori_lookup(orientation)] not in ["u", " ", "d", "l", "r", "x"] and not sensors[self.ori_lookup(orientation)].isdigit():
-            self.add_fact(f"front_dirty")
+        # (other robots block, like walls and stations)
+        front = CELL_CLASSES[reading[FRONT_INDEX[orientation]]]
+        if front == DIRT:
+            self.add_fact("front_dirty")
             directions_clear += 1
 
-        elif sensors[self.ori_lookup(orientation)] in [" "] or sensors[self.ori_lookup(orientation)].isdigit():
-            self.add_fact(f"front_clear")
+        elif front <= VISITED:
+            self.add_fact("front_clear")
             directions_clear += 1
 
         # check remaining sensers
         # prio dirty, blocked, then visited
         for direction in self.direction_priority:
+            cell = CELL_CLASSES[reading[DIRECTION_INDEX[direction]]]
 
-            if sensors[direction] not in ["u", " ", "d", "l", "r", "x"] and not sensors[direction].isdigit():
-                self.add_fact(f"{direction}_dirty")
+            if cell == DIRT:
+                self.add_fact(DIRTY_FACTS[direction])
                 directions_clear += 1
                 break
 
-            elif sensors[direction] in ["u", "d", "l", "r", "x"]:
-                self.add_fact(f"{direction}_blocked")
-            
-            # elif sensors[direction].isdigit():
-            #     self.add_fact(f"{direction}_visited")
+            elif cell >= BLOCKED:
+                self.add_fact(BLOCKED_FACTS[direction])
 
         # pick random direction that is clear 
         for direction in self.direction_priority:
             
-            if sensors[direction] in [" "] or sensors[direction].isdigit():
-                self.add_fact(f"{direction}_clear")
+            if CELL_CLASSES[reading[DIRECTION_INDEX[direction]]] <= VISITED:
+                self.add_fact(CLEAR_FACTS[direction])
                 directions_clear += 1
                 break
 
         if directions_clear == 0:
             self.add_fact("surrounded")                    
 
-    def decide_action(self):
-        # Evaluate rules
-        for rule in self.rules:
-            if all(condition in self.facts for condition in rule["conditions"]):
-                return rule["conclusion"]
-            
-        # Default if no rules match
-        return "robot_lost"
-    
+    def decide_from_codes(self, reading: tuple, orientation: str, battery: int, last_action: str | None) -> str:
+        """
+        update_facts_from_codes + update_battery_life + update_last_action +
+        decide_action, memoised in self.cache when there is one (cache_size,
+        off by default: building the key costs about what deriving the
+        facts does, so it only pays off for rule sets that are slower to
+        evaluate than the default one). The facts only depend on the
+        CELL_CLASSES of the reading, orientation, battery dead / ok, last
+        action random or not, the shuffled direction_priority (+ any facts
+        added before this call, e.g. dock / planner), so that is the key.
+        Only the part of the priority the facts use is in it (priority_choice),
+        the 24 orders mostly give the same facts. On a hit the facts are not derived at all (self.facts only holds the
+        earlier facts).
+
+        :return: str   the decision
+        """
+        # random compass directions (every call, keeps the RNG sequence)
+        self.rng.shuffle(self.direction_priority)
+
+        if self.cache is None:
+            return self.decide_from_facts(reading, orientation, battery, last_action)
+
+        if self.stale:
+            self.compile()
+
+        classes = bytes(CELL_CLASSES[code] for code in reading)
+
+        key = (
+            classes,
+            orientation,
+            battery <= self.battery_threshold,
+            last_action == "random_direction",
+            self.priority_choice(classes),
+            self.fact_mask if self.compiled else frozenset(self.facts),
+        )
+
+        conclusion = self.cache.get(key)
+        if conclusion is None:
+            conclusion = self.decide_from_facts(reading, orientation, battery, last_action)
+            self.cache.put(key, conclusion)
+
+        return conclusion
+
+    def priority_choice(self, classes: bytes) -> tuple:
+        """
+        What add_sensor_facts takes from direction_priority for these cell
+        classes: the first dirty and the first clear direction, and the
+        blocked directions ahead of that dirty one (all of them when there
+        is no dirt, so then they are left out, classes already has them)
+
+        :return: tuple (dirty index, clear index, blocked bits), -1 = none
+        """
+        dirty = clear = -1
+        blocked = 0
+
+        for direction in self.direction_priority:
+            d = DIRECTION_INDEX[direction]
+            cell = classes[d]
+
+            if cell == DIRT:
+                if dirty < 0:
+                    dirty = d
+            elif cell <= VISITED:
+                if clear < 0:
+                    clear = d
+            elif dirty < 0:
+                blocked |= 1 << d
+
+        return dirty, clear, blocked if dirty >= 0 else 0
+
+    def decide_from_facts(self, reading: tuple, orientation: str, battery: int, last_action: str | None) -> str:
+        self.add_sensor_facts(reading, orientation)
+        self.update_battery_life(battery)
+        self.update_last_action(last_action)
+
+        return self.decide_action()
+
+    def update_facts_from_planner(self, direction: str | None, orientation: str):
+        """
+        First step of the planner's shortest path to the nearest dirt
+
+        :param: direction  str north, east, south, west or None (no path)
+                orientation  str like "^", "v", "<", ">"
+        """
+        if direction is None:
+            return
+
+        if direction == FRONT[orientation]:
+            self.add_fact("path_front")
+        else:
+            self.add_fact(PATH_FACTS[direction])
+
+    def update_facts_from_dock(self, direction: str | None, docked: bool, orientation: str):
+        """
+        Robot is returning to the charging station
+
+        :param: direction  str first step home, north, east, south, west or None
+                docked  bool robot is next to the station
+                orientation  str like "^", "v", "<", ">"
+        """
+        self.add_fact("returning")
+
+        if docked:
+            self.add_fact("docked")
+        elif direction == FRONT[orientation]:
+            self.add_fact("dock_front")
+        elif direction is not None:
+            self.add_fact(DOCK_FACTS[direction])
+
     def ori_lookup(self, input_dir) -> str:
         """
         Change dir into robot direction symbol
@@ -116,6 +241,3 @@ class RobotLogicSystem:
         directions.update({v: k for k, v in directions.items()})
         
         return directions[input_dir]
-    
-    def reset_facts(self):
-        self.facts.clear()
\ No newline at end of file
@@ -0,0 +1,124 @@
+import json
+
+
+# Robot rule set as named groups of (conditions, conclusion), rules keep
+# their order inside a group, the groups are added in a configurable order
+RULE_GROUPS = {
+    # Dock mode, head home when the battery only just covers the trip
+    "dock": [
+        (["returning", "docked"], "dock_wait"),
+        (["returning", "dock_front", "battery_ok"], "move_forward"),
+        (["returning", "dock_north", "battery_ok"], "rotate_north"),
+        (["returning", "dock_east", "battery_ok"], "rotate_east"),
+        (["returning", "dock_south", "battery_ok"], "rotate_south"),
+        (["returning", "dock_west", "battery_ok"], "rotate_west"),
+    ],
+
+    # Clean current cell if dirty
+    "clean": [
+        (["current_cell_dirty"], "clean"),
+    ],
+
+    # Battery dead. End program
+    "battery_dead": [
+        (["battery_dead"], "battery_dead"),
+    ],
+
+    # Move forward if Filth is present
+    "front_dirty": [
+        (["front_dirty", "battery_ok"], "move_forward"),
+    ],
+
+    # Rotate to closest Filth
+    "turn_dirty": [
+        (["north_dirty", "battery_ok"], "rotate_north"),
+        (["east_dirty", "battery_ok"], "rotate_east"),
+        (["south_dirty", "battery_ok"], "rotate_south"),
+        (["west_dirty", "battery_ok"], "rotate_west"),
+    ],
+
+    # Planner mode, head for the nearest (out of sight) Filth
+    "planner": [
+        (["path_front", "battery_ok"], "move_forward"),
+        (["path_north", "battery_ok"], "rotate_north"),
+        (["path_east", "battery_ok"], "rotate_east"),
+        (["path_south", "battery_ok"], "rotate_south"),
+        (["path_west", "battery_ok"], "rotate_west"),
+    ],
+
+    # Prioritise Clear, Move Forward
+    "front_clear": [
+        (["front_clear", "battery_ok"], "move_forward"),
+    ],
+
+    # Rotate
+    "turn_clear": [
+        (["north_clear", "battery_ok"], "rotate_north"),
+        (["east_clear", "battery_ok"], "rotate_east"),
+        (["south_clear", "battery_ok"], "rotate_south"),
+        (["west_clear", "battery_ok"], "rotate_west"),
+    ],
+
+    # Last resort, Randomly move
+    "random": [
+        (["surrounded", "spin_to_win", "battery_ok"], "random_direction"),
+        (["surrounded", "on_to_glory", "battery_ok"], "random_keep_swimming"),
+    ],
+}
+
+# groups only added when the robot runs in that mode
+MODE_GROUPS = {"dock", "planner"}
+
+DEFAULT_RULES = {
+    "order"            : list(RULE_GROUPS),
+    "battery_threshold": 1,    # battery <= threshold -> battery_dead
+}
+
+
+def rule_list(rules: dict | None = None, planner: bool = False, dock: bool = False) -> list:
+    """
+    :param: rules  dict {"order": [group names], "battery_threshold": int}, None = DEFAULT_RULES
+    :return: list of (conditions, conclusion) in priority order
+    """
+    rules = rules or DEFAULT_RULES
+    modes = {"dock": dock, "planner": planner}
+
+    return [
+        rule
+        for group in rules["order"]
+        if group not in MODE_GROUPS or modes[group]
+        for rule in RULE_GROUPS[group]
+    ]
+
+
+def check_rules(rules: dict) -> dict:
+    """
+    :return: dict   just the order / battery_threshold of rules
+    :raises ValueError: order is not a permutation of the RULE_GROUPS, bad threshold
+    """
+    order = rules.get("order")
+    if not isinstance(order, list) or sorted(order) != sorted(RULE_GROUPS):
+        raise ValueError(f"rule order must name each of {', '.join(RULE_GROUPS)} once")
+
+    threshold = rules.get("battery_threshold")
+    if not isinstance(threshold, int) or threshold < 0:
+        raise ValueError("battery_threshold must be an int >= 0")
+
+    return {"order": list(order), "battery_threshold": threshold}
+
+
+def load_rules(path: str) -> dict:
+    """
+    Read a rule config (see save_rules), extra keys (scores ...) are ignored
+    """
+    with open(path, "r") as file:
+        return check_rules(json.load(file))
+
+
+def save_rules(rules: dict, path: str, **info):
+    """
+    Write rules as JSON, info (score, runs ...) is stored alongside
+    """
+    with open(path, "w") as file:
+        json.dump({**check_rules(rules), **info}, file, indent=4)
+        file.write("\n")
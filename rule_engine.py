@@ -0,0 +1,153 @@
+from collections import OrderedDict
+
+
+class DecisionCache:
+    """
+    Bounded LRU map of a compact state key -> conclusion, least recently
+    used entries are evicted once size is reached. Counts hits, misses,
+    evictions and invalidations (clear() after the rules change).
+    """
+
+    def __init__(self, size: int = 1024):
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        conclusion = self.entries.get(key)
+        if conclusion is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return conclusion
+
+    def put(self, key, conclusion):
+        self.entries[key] = conclusion
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        if self.entries:
+            self.entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+
+        return {
+            "size"          : len(self.entries),
+            "limit"         : self.size,
+            "hits"          : self.hits,
+            "misses"        : self.misses,
+            "evictions"     : self.evictions,
+            "invalidations" : self.invalidations,
+            "hit_rate"      : self.hits / lookups if lookups else 0.0,
+        }
+
+
+class RuleEngine:
+    """
+    Shared add_rule / add_fact / decide_action base for the logic systems.
+
+    Interpreted mode scans self.rules in order, testing each condition string
+    against self.facts. Compiled mode interns every fact used by a rule as a
+    bit, turns each rule into a bitmask and keeps self.fact_mask up to date in
+    add_fact, so a decision is (mask & rule) == rule per rule, memoised in a
+    fact mask -> conclusion table. Rules added later recompile on next decide.
+
+    cache_size > 0 adds a DecisionCache (self.cache) that subclasses key on
+    their own compact input state, it is cleared whenever a rule is added.
+    """
+
+    default_conclusion = None
+    table_limit = 4096
+
+    def __init__(self, compiled: bool = True, cache_size: int = 0):
+        self.rules = []
+        self.cache = DecisionCache(cache_size) if cache_size else None
+        self.facts = set()
+        self.compiled = compiled
+        self.fact_bits = {}
+        self.rule_masks = []
+        self.fact_mask = 0
+        self.decision_table = {}
+        self.stale = True
+
+    def add_rule(self, conditions, conclusion):
+        self.rules.append({"conditions": conditions, "conclusion": conclusion})
+        self.stale = True
+
+        # cached decisions were made with the old rule set
+        if self.cache is not None:
+            self.cache.clear()
+
+    def add_fact(self, fact):
+        self.facts.add(fact)
+        if self.compiled:
+            if self.stale:
+                self.compile()
+            self.fact_mask |= self.fact_bits.get(fact, 0)
+
+    def reset_facts(self):
+        self.facts.clear()
+        self.fact_mask = 0
+
+    def compile(self):
+        """
+        Intern rule facts as bits, rules as (mask, conclusion) in rule order
+        """
+        self.fact_bits = {}
+        self.rule_masks = []
+
+        for rule in self.rules:
+            mask = 0
+            for condition in rule["conditions"]:
+                if condition not in self.fact_bits:
+                    self.fact_bits[condition] = 1 << len(self.fact_bits)
+                mask |= self.fact_bits[condition]
+
+            self.rule_masks.append((mask, rule["conclusion"]))
+
+        # facts added before compile
+        self.fact_mask = 0
+        for fact in self.facts:
+            self.fact_mask |= self.fact_bits.get(fact, 0)
+
+        self.decision_table = {}
+        self.stale = False
+
+    def decide_action(self):
+        if not self.compiled:
+            # Evaluate rules
+            for rule in self.rules:
+                if all(condition in self.facts for condition in rule["conditions"]):
+                    return rule["conclusion"]
+
+            # Default if no rules match
+            return self.default_conclusion
+
+        if self.stale:
+            self.compile()
+
+        mask = self.fact_mask
+        conclusion = self.decision_table.get(mask)
+        if conclusion is not None:
+            return conclusion
+
+        conclusion = self.default_conclusion
+        for rule_mask, rule_conclusion in self.rule_masks:
+            if mask & rule_mask == rule_mask:
+                conclusion = rule_conclusion
+                break
+
+        if len(self.decision_table) >= self.table_limit:
+            self.decision_table.clear()
+        self.decision_table[mask] = conclusion
+
+        return conclusion
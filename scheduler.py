@@ -0,0 +1,142 @@
+import heapq
+
+
+class Scheduler:
+    """
+    Event driven tick loop. Agents (anything with act()) run in the order
+    they were added, but only on ticks where something woke them:
+
+        every N ticks    - periodic agents (tick rate), every=1 is every tick
+        cell events      - a watched grid cell changed (Environment listener,
+                           e.g. a robot moving next to a station)
+        timers           - wake once at a given tick
+        triggers         - condition callable checked each tick (battery
+                           threshold ...)
+        busy             - agent asks to run again next tick (station still
+                           charging a robot that is standing still)
+
+    An event raised by an earlier agent in the same tick wakes later agents
+    that same tick, so results match a loop calling every act() in order.
+    """
+
+    def __init__(self, env=None):
+        self.tick = 0
+        self.agents = []
+        self.every = []         # per agent tick rate or None (events only)
+        self.offset = []
+        self.busy = []          # per agent callable or None
+        self.acts = []          # per agent act() count
+        self.timers = []        # heap (tick, agent index)
+        self.watchers = {}      # (x, y) -> [agent index]
+        self.triggers = []      # (agent index, condition)
+        self.due = set()        # woken for the current / upcoming tick
+        self.later = set()      # woken for the tick after
+        self.queue = []         # heap of due agent indexes during a tick
+        self.current = -1       # agent index running now, -1 between ticks
+
+        if env is not None:
+            env.add_listener(self.cell_changed)
+
+    def add_agent(self, agent, every: int | None = 1, offset: int = 0, busy=None) -> int:
+        """
+        :param: agent  object with act()
+                every  int run every N ticks, None = only when woken
+                offset  int first tick for periodic agents
+                busy  callable, True after act() = run again next tick
+        :return: int   agent index (run order)
+        """
+        self.agents.append(agent)
+        self.every.append(every)
+        self.offset.append(offset)
+        self.busy.append(busy)
+        self.acts.append(0)
+
+        return len(self.agents) - 1
+
+    def index(self, agent) -> int:
+        return next(i for i, known in enumerate(self.agents) if known is agent)
+
+    def watch_cells(self, agent, cells: list):
+        """
+        Wake agent whenever one of cells (x, y) changes on the grid
+        """
+        i = self.index(agent)
+        for pos in cells:
+            self.watchers.setdefault(tuple(pos), []).append(i)
+
+    def add_timer(self, agent, tick: int):
+        heapq.heappush(self.timers, (tick, self.index(agent)))
+
+    def add_trigger(self, agent, condition):
+        self.triggers.append((self.index(agent), condition))
+
+    def wake(self, agent_index: int):
+        """
+        Run agent_index this tick if it hasn't had its turn yet, else next tick
+        """
+        if self.current < 0:
+            self.due.add(agent_index)
+
+        elif agent_index > self.current:
+            if agent_index not in self.due:
+                self.due.add(agent_index)
+                heapq.heappush(self.queue, agent_index)
+
+        else:
+            self.later.add(agent_index)
+
+    def cell_changed(self, pos: tuple):
+        """
+        Environment listener, a grid cell changed
+        """
+        for i in self.watchers.get(pos, ()):
+            self.wake(i)
+
+    def run_tick(self) -> int:
+        """
+        Run every agent that is due this tick, in order
+
+        :return: int   number of act() calls
+        """
+        tick = self.tick
+
+        for i, every in enumerate(self.every):
+            if every and tick >= self.offset[i] and (tick - self.offset[i]) % every == 0:
+                self.due.add(i)
+
+        while self.timers and self.timers[0][0] <= tick:
+            self.due.add(heapq.heappop(self.timers)[1])
+
+        for i, condition in self.triggers:
+            if condition():
+                self.due.add(i)
+
+        self.queue = list(self.due)
+        heapq.heapify(self.queue)
+        acted = 0
+
+        while self.queue:
+            i = heapq.heappop(self.queue)
+            self.current = i
+
+            self.agents[i].act()
+            self.acts[i] += 1
+            acted += 1
+
+            if self.busy[i] is not None and self.busy[i]():
+                self.later.add(i)
+
+        self.current = -1
+        self.due, self.later = self.later, set()
+        self.tick += 1
+
+        return acted
+
+    def stats(self) -> dict:
+        """
+        :return: dict   ticks run and act() calls per agent (by class name + index)
+        """
+        return {
+            "ticks": self.tick,
+            "acts" : {f"{type(agent).__name__}_{i}": self.acts[i] for i, agent in enumerate(self.agents)},
+        }
@@ -0,0 +1,62 @@
+# Compact sensor readings. Environment.sense returns a tuple of 5 byte cell
+# codes (north, east, south, west, pos), the latin-1 code of each cell, so a
+# reading is one small tuple of cached ints instead of a dict of strs.
+# CELL_CLASSES maps a code to the small int class the logic systems test.
+
+DIRECTIONS = ["north", "east", "south", "west"]
+NORTH, EAST, SOUTH, WEST, POS = 0, 1, 2, 3, 4
+
+# cell classes
+FLOOR, VISITED, BLOCKED, ROBOT, DIRT = 0, 1, 2, 3, 4
+
+
+def build_cell_classes() -> bytes:
+    """
+    256 entry table, byte cell code -> FLOOR / VISITED / BLOCKED / ROBOT / DIRT
+    """
+    table = bytearray([DIRT]) * 256
+
+    for code in range(256):
+        char = chr(code)
+        if char == " ":
+            table[code] = FLOOR
+        elif char.isdigit():
+            table[code] = VISITED
+        elif char in ["u", "d", "l", "r", "x"]:
+            table[code] = BLOCKED
+        elif char in ["^", "v", "<", ">"]:
+            table[code] = ROBOT
+
+    return bytes(table)
+
+
+CELL_CLASSES = build_cell_classes()
+
+
+def to_dict(reading: tuple) -> dict:
+    """
+    Sensor tuple back into the Environment.get_cells dict (for output messages)
+    """
+    if reading is None:
+        return None
+
+    return {
+        "north" : chr(reading[NORTH]),
+        "east"  : chr(reading[EAST]),
+        "south" : chr(reading[SOUTH]),
+        "west"  : chr(reading[WEST]),
+        "pos"   : chr(reading[POS]),
+    }
+
+
+def from_dict(sensors: dict) -> tuple:
+    """
+    Environment.get_cells dict -> sensor tuple
+    """
+    return (
+        ord(sensors["north"]),
+        ord(sensors["east"]),
+        ord(sensors["south"]),
+        ord(sensors["west"]),
+        ord(sensors["pos"]),
+    )
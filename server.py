@@ -0,0 +1,456 @@
+from simulation import Simulation
+from environment import Environment
+from collections import deque
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import struct
+import sys
+
+
+WEBSOCKET_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# websocket opcodes
+TEXT, CLOSE, PING, PONG = 0x1, 0x8, 0x9, 0xA
+
+# options of a start command -> type they are read as
+START_OPTIONS = {"ticks": int, "interval": float, "charge": int, "seed": int, "planner": bool, "dock": bool, "multi": bool}
+
+
+def encode(message: dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class Session:
+    """
+    One simulation run by the server. Cells the Environment reports as
+    changed (move_robot, rotate_robot, set_wall) are collected by a
+    listener, so each tick is published as a delta:
+
+        {"type": "delta", "sim", "tick", "cells": [[x, y, char] ...],
+         "cleaned": [[x, y] ...], "robots": [[x, y, ori, battery, decision] ...],
+         "stations": [[x, y, action] ...], "dirt": dirt remaining}
+
+    and a new (or resyncing) subscriber first gets a "snapshot" with the
+    full map rows instead of the cells.
+    """
+
+    def __init__(self, sim_id: int, sim: Simulation, ticks: int, interval: float):
+        self.id = sim_id
+        self.sim = sim
+        self.ticks = ticks
+        self.interval = interval
+        self.subscribers = set()
+        self.changed = set()
+        self.summary = None
+        self.task = None
+
+        sim.enviroment.add_listener(self.changed.add)
+
+    def state(self) -> dict:
+        sim = self.sim
+
+        return {
+            "sim"     : self.id,
+            "tick"    : sim.tick,
+            "robots"  : [[*robot.position, robot.orientation, robot.battery, robot.decision] for robot in sim.robots],
+            "stations": [[*station.position, station.last_action] for station in sim.stations],
+            "dirt"    : sim.enviroment.dirt_remaining(),
+        }
+
+    def snapshot(self) -> dict:
+        message = {"type": "snapshot", **self.state(), "map": str(self.sim.enviroment).split("\n")}
+        if self.summary is not None:
+            message["summary"] = self.summary
+
+        return message
+
+    def delta(self) -> dict:
+        world = self.sim.enviroment.world
+        cells = [[x, y, world.get(x, y)] for x, y in sorted(self.changed)]
+        self.changed.clear()
+
+        return {
+            "type"   : "delta",
+            **self.state(),
+            "cells"  : cells,
+            "cleaned": [list(robot.position) for robot in self.sim.robots if robot.decision == "clean"],
+        }
+
+    async def run(self):
+        """
+        Step the simulation, publishing a delta per tick. Subscribers are
+        never awaited, a slow one only drops its own backlog (see Subscriber)
+        """
+        try:
+            for i in range(self.ticks):
+                if not self.sim.step():
+                    break
+
+                if self.subscribers:
+                    self.publish(encode(self.delta()))
+                else:
+                    self.changed.clear()
+                await asyncio.sleep(self.interval)
+
+        except asyncio.CancelledError:
+            # stopped by a client, still report where it got to
+            pass
+
+        self.summary = self.sim.summary()
+        self.summary.pop("battery_curve")
+        self.publish(encode({"type": "end", "sim": self.id, "summary": self.summary}))
+
+    def publish(self, data: bytes):
+        for subscriber in list(self.subscribers):
+            subscriber.send(self, data)
+
+    def info(self) -> dict:
+        return {"sim": self.id, "floorplan": self.sim.env_map, "tick": self.sim.tick, "done": self.summary is not None, "subscribers": len(self.subscribers)}
+
+
+class Subscriber:
+    """
+    One connected client. Messages wait in a bounded backlog that a writer
+    task drains to the socket at whatever pace the client reads.
+
+    When the backlog reaches queue_size the client is behind: its queued
+    deltas are dropped and it is owed a fresh snapshot of each session
+    instead (taken when the writer gets to it, so it is current), further
+    deltas of those sessions are skipped until then. The simulations never
+    wait on a client.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter, websocket: bool = False, queue_size: int = 256):
+        self.writer = writer
+        self.websocket = websocket
+        self.queue_size = queue_size
+        self.backlog = deque()      # (session, bytes), session None for replies
+        self.resync = {}            # session id -> session owed a snapshot
+        self.sessions = {}          # session id -> subscribed session
+        self.ready = asyncio.Event()
+        self.dropped = 0
+        self.closed = False
+
+    def send(self, session: Session, data: bytes):
+        if session.id in self.resync:
+            return
+
+        if len(self.backlog) >= self.queue_size:
+            kept = [(owner, queued) for owner, queued in self.backlog if owner is None]
+            self.dropped += len(self.backlog) - len(kept)
+            self.backlog = deque(kept)
+            self.resync.update(self.sessions)
+        else:
+            self.backlog.append((session, data))
+
+        self.ready.set()
+
+    def reply(self, message: dict):
+        # replies to commands are never dropped
+        self.backlog.append((None, encode(message)))
+        self.ready.set()
+
+    def subscribe(self, session: Session):
+        self.sessions[session.id] = session
+        self.resync[session.id] = session
+        session.subscribers.add(self)
+        self.ready.set()
+
+    def unsubscribe(self, session: Session):
+        self.sessions.pop(session.id, None)
+        self.resync.pop(session.id, None)
+        session.subscribers.discard(self)
+
+    def close(self):
+        self.closed = True
+        for session in list(self.sessions.values()):
+            self.unsubscribe(session)
+        self.ready.set()
+
+    async def drain(self):
+        """
+        Writer task, sends the backlog (snapshots owed first) until closed
+        """
+        while not self.closed:
+            await self.ready.wait()
+            self.ready.clear()
+
+            while (self.backlog or self.resync) and not self.closed:
+                if self.resync:
+                    session_id = next(iter(self.resync))
+                    data = encode(self.resync.pop(session_id).snapshot())
+                else:
+                    session, data = self.backlog.popleft()
+                    if session is not None and session.id not in self.sessions:
+                        continue
+
+                self.write(data)
+                await self.writer.drain()
+
+    def write(self, data: bytes):
+        if self.websocket:
+            data = websocket_frame(TEXT, data.rstrip(b"\n"))
+        self.writer.write(data)
+
+
+def websocket_frame(opcode: int, payload: bytes) -> bytes:
+    """
+    Unmasked server -> client frame
+    """
+    size = len(payload)
+    if size < 126:
+        header = struct.pack("!BB", 0x80 | opcode, size)
+    elif size < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, size)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, size)
+
+    return header + payload
+
+
+async def read_websocket_frame(reader: asyncio.StreamReader) -> tuple:
+    """
+    :return: tuple (opcode, payload) of the next client -> server frame (always masked)
+    """
+    first, second = await reader.readexactly(2)
+    size = second & 0x7F
+    if size == 126:
+        size, = struct.unpack("!H", await reader.readexactly(2))
+    elif size == 127:
+        size, = struct.unpack("!Q", await reader.readexactly(8))
+
+    mask = await reader.readexactly(4) if second & 0x80 else b"\0\0\0\0"
+    payload = await reader.readexactly(size)
+    key = int.from_bytes((mask * (size // 4 + 1))[:size], "big")
+
+    return first & 0x0F, (int.from_bytes(payload, "big") ^ key).to_bytes(size, "big")
+
+
+async def websocket_handshake(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, request_line: bytes) -> bool:
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    key = headers.get("sec-websocket-key")
+    if key is None:
+        writer.write(b"HTTP/1.1 400 Bad Request\r\n\r\n")
+        return False
+
+    accept = base64.b64encode(hashlib.sha1(key.encode("latin-1") + WEBSOCKET_GUID).digest())
+    writer.write(
+        b"HTTP/1.1 101 Switching Protocols\r\n"
+        b"Upgrade: websocket\r\n"
+        b"Connection: Upgrade\r\n"
+        b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n"
+    )
+    return True
+
+
+class SimulationServer:
+    """
+    Runs many Simulations at once on one event loop and streams them to
+    local clients, over a TCP / unix socket (JSON lines) or a WebSocket
+    (same JSON, one text frame per message, detected from the HTTP upgrade).
+
+    Client commands, one JSON object per line / frame:
+
+        {"op": "list"}
+        {"op": "start", "floorplan": path, "ticks", "seed", "charge",
+         "planner", "dock", "multi", "interval"}    -> {"type": "started", "sim"}
+        {"op": "subscribe", "sim": id}              -> snapshot, then deltas
+        {"op": "unsubscribe", "sim": id}
+        {"op": "stop", "sim": id}
+    """
+
+    def __init__(self, queue_size: int = 256, interval: float = 0.0):
+        self.queue_size = queue_size
+        self.interval = interval
+        self.sessions = {}
+
+    def start_simulation(self, env_map: str, ticks: int = 1000, interval: float | None = None, charge: int = 100, seed: int | None = None, planner: bool = False, dock: bool = False, multi: bool = False) -> Session:
+        """
+        Start a simulation task on the running loop. Every session has its
+        own RNG, seeded or not, so sessions never draw from each other's
+
+        :param: interval  float seconds between ticks, None = server default
+        :return: Session
+        :raises ValueError: floorplan missing / unreadable, or no robot on it
+        """
+        if not os.path.isfile(env_map):
+            raise ValueError(f"no floorplan {env_map}")
+
+        env = Environment(env_map, random.Random(seed))
+        if env.world is None or env.robot_location is None:
+            raise ValueError(f"{env_map} is not a floorplan with a robot")
+
+        sim = Simulation(env_map, charge, seed, planner, dock, multi=multi, env=env)
+        session = Session(len(self.sessions), sim, ticks, self.interval if interval is None else interval)
+
+        self.sessions[session.id] = session
+        session.task = asyncio.get_running_loop().create_task(session.run())
+
+        return session
+
+    def command(self, subscriber: Subscriber, message: dict):
+        op = message.get("op")
+        session = self.sessions.get(message.get("sim"))
+
+        if op == "list":
+            subscriber.reply({"type": "sims", "sims": [session.info() for session in self.sessions.values()]})
+
+        elif op == "start":
+            try:
+                options = {name: kind(message[name]) for name, kind in START_OPTIONS.items() if message.get(name) is not None}
+                session = self.start_simulation(message["floorplan"], **options)
+            except Exception as error:
+                subscriber.reply({"type": "error", "error": f"cannot start: {error!r}"})
+                return
+            subscriber.reply({"type": "started", "sim": session.id})
+
+        elif session is None:
+            subscriber.reply({"type": "error", "error": f"no simulation {message.get('sim')}"})
+
+        elif op == "subscribe":
+            subscriber.subscribe(session)
+
+        elif op == "unsubscribe":
+            subscriber.unsubscribe(session)
+
+        elif op == "stop":
+            session.task.cancel()
+            subscriber.reply({"type": "stopped", "sim": session.id})
+
+        else:
+            subscriber.reply({"type": "error", "error": f"unknown op {op}"})
+
+    async def receive(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, websocket: bool) -> bytes:
+        """
+        Next command line / text frame, b"" once the client has gone
+        """
+        if not websocket:
+            return await reader.readline()
+
+        while True:
+            opcode, payload = await read_websocket_frame(reader)
+            if opcode == CLOSE:
+                return b""
+            if opcode == PING:
+                writer.write(websocket_frame(PONG, payload))
+            elif opcode == TEXT:
+                return payload
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        first = await reader.readline()
+        websocket = first.startswith(b"GET ")
+
+        if websocket and not await websocket_handshake(reader, writer, first):
+            writer.close()
+            return
+
+        subscriber = Subscriber(writer, websocket, self.queue_size)
+        drain = asyncio.get_running_loop().create_task(subscriber.drain())
+
+        try:
+            line = None if websocket else first
+            while True:
+                if line is None:
+                    line = await self.receive(reader, writer, websocket)
+                if not line:
+                    break
+
+                if line.strip():
+                    # a failing command gets an error reply, the connection (and its subscriptions) stay
+                    try:
+                        self.command(subscriber, json.loads(line))
+                    except Exception as error:
+                        subscriber.reply({"type": "error", "error": f"bad command: {error!r}"})
+
+                line = None
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+        finally:
+            subscriber.close()
+            drain.cancel()
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, unix: str | None = None):
+        if unix:
+            server = await asyncio.start_unix_server(self.handle, unix)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+
+        async with server:
+            await server.serve_forever()
+
+
+async def watch(sim_id: int, host: str = "127.0.0.1", port: int = 8765, stream=sys.stdout):
+    """
+    Minimal JSON lines client, prints one status line per message of one simulation
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode({"op": "subscribe", "sim": sim_id}))
+
+    while line := await reader.readline():
+        message = json.loads(line)
+        if message["type"] == "end":
+            stream.write(f"end  {message['summary']}\n")
+            break
+        if message["type"] == "error":
+            stream.write(f"{message['error']}\n")
+            break
+
+        if message["type"] in ("snapshot", "delta"):
+            changed = len(message["cells"]) if "cells" in message else "full map"
+            stream.write(f"{message['type']:<9} tick {message['tick']}  cells {changed}  dirt {message['dirt']}  robots {message['robots']}\n")
+            if "summary" in message:
+                break
+
+    writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run simulations on an asyncio server and stream per tick deltas to local clients")
+    parser.add_argument("floorplans", nargs="*", help="simulations to start with the server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="listen on this unix socket path instead of TCP")
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=None, help="seed of the first simulation (simulation j uses seed + j)")
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between ticks")
+    parser.add_argument("--queue", type=int, default=256, help="messages a client may fall behind before it is resynced")
+    parser.add_argument("--multi", action="store_true", help="run every robot and station on the map")
+    parser.add_argument("--watch", type=int, default=None, help="connect to a running server and print simulation WATCH")
+    args = parser.parse_args(argv)
+
+    if args.watch is not None:
+        asyncio.run(watch(args.watch, args.host, args.port))
+        return
+
+    server = SimulationServer(args.queue, args.interval)
+
+    async def serve():
+        for j, env_map in enumerate(args.floorplans):
+            seed = args.seed + j if args.seed is not None else None
+            server.start_simulation(env_map, args.ticks, seed=seed, multi=args.multi)
+
+        await server.serve(args.host, args.port, args.unix)
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+from environment import Environment
+from entity_index import EntityIndex, is_dirt
+from fleet import Fleet, BLOCKING, CRASHED, MOVED, GLYPH_CODES, place_robots
+from robot_logic import RobotLogicSystem
+from rule_config import load_rules
+from sensors import CELL_CLASSES
+from multiprocessing import shared_memory
+from array import array
+import multiprocessing
+import argparse
+import time
+
+
+# per robot state passed between processes, in this order (+ gid first, decision last)
+ROBOT_FIELDS = ["pos", "ori", "battery", "under", "last_action", "counter", "rng"]
+
+
+class Shard(Fleet):
+    """
+    The robots standing in one band of rows [y0, y1) of a sharded run.
+
+    Same facts / decide / act_robot as Fleet (per robot RNG, so results
+    don't depend on which process steps a robot), over the grid in shared
+    memory. A tick is split in phases run in lockstep by ShardedFleet:
+
+        act     - sense + decide, clean / turn, collect move intents.
+                  Turns only swap one robot glyph for another, so the
+                  rows read by neighbouring shards keep their cell classes
+        move    - resolve intents against the tick start grid, contested
+                  targets in the halo rows (next to a band border) are
+                  settled with the other shards' intents, lowest robot id
+                  wins as in Fleet. Robots leaving the band are handed over
+        charge  - stations in the band charge the first robot n, e, s, w,
+                  robots owned by another shard are charged through it
+    """
+
+    def __init__(self, cells, width: int, height: int, y0: int, y1: int, seed: int, charge: int, stations: list, rules: dict):
+        self.enviroment = None
+        self.cells = cells
+        self.width = width
+        self.height = height
+        self.y0 = y0
+        self.y1 = y1
+        self.seed = seed
+        self.charge = charge
+        self.rules = rules
+
+        # same rule set as Fleet
+        self.logic = RobotLogicSystem(battery_threshold=rules["battery_threshold"])
+        self.setup_logic_rules()
+
+        self.ids = array("q")           # global robot id (Fleet index)
+        self.pos = array("q")
+        self.ori = array("B")
+        self.battery = array("i")
+        self.under = array("B")
+        self.last_action = array("B")
+        self.counter = array("I")
+        self.rng = array("Q")
+        self.priority = array("B")
+        self.decisions = []
+        self.occupancy = {}
+        self.intents = []               # (robot, target, free at tick start)
+        self.acting = []
+
+        self.stations = array("q", [s for s in stations if y0 <= s // width < y1])
+        self.tick = 0
+        self.cells_cleaned = 0
+
+    def add(self, state: tuple):
+        gid, *fields, priority, decision = state
+        self.ids.append(gid)
+        for name, value in zip(ROBOT_FIELDS, fields):
+            getattr(self, name).append(value)
+
+        self.priority.extend(priority)
+        self.decisions.append(decision)
+        self.occupancy[self.pos[-1]] = len(self.ids) - 1
+
+    def export(self, i: int) -> tuple:
+        return (self.ids[i], *(getattr(self, name)[i] for name in ROBOT_FIELDS), tuple(self.priority[i * 4:i * 4 + 4]), self.decisions[i])
+
+    def remove(self, indexes: list) -> list:
+        """
+        Drop robots (local indexes) from the shard
+
+        :return: list of their exported states
+        """
+        states = [self.export(i) for i in indexes]
+        dropped = set(indexes)
+        keep = [i for i in range(len(self.ids)) if i not in dropped]
+
+        for name in ["ids"] + ROBOT_FIELDS:
+            setattr(self, name, array(getattr(self, name).typecode, [getattr(self, name)[i] for i in keep]))
+
+        self.priority = array("B", [self.priority[i * 4 + k] for i in keep for k in range(4)])
+        self.decisions = [self.decisions[i] for i in keep]
+        self.occupancy = {p: i for i, p in enumerate(self.pos)}
+
+        return states
+
+    def halo(self, p: int) -> bool:
+        """
+        True if flat index p is on a row another shard's robots can also move onto
+        """
+        y = p // self.width
+        return y <= self.y0 or y >= self.y1 - 1
+
+    def clean_cell(self, robot_id: int):
+        # dirt index is rebuilt from the grid once the run ends
+        pass
+
+    def turn(self, robot_id: int, direction: int):
+        self.ori[robot_id] = direction
+        self.cells[self.pos[robot_id]] = GLYPH_CODES[direction]
+
+    def move_robot(self, robot_id: int, target: int):
+        i = robot_id
+        p = self.pos[i]
+        cells = self.cells
+
+        self.under[i] = cells[target]
+        cells[p] = ord("0")
+        cells[target] = GLYPH_CODES[self.ori[i]]
+        self.pos[i] = target
+        del self.occupancy[p]
+        self.occupancy[target] = i
+        self.last_action[i] = MOVED
+
+    def step_act(self, charges: list) -> tuple:
+        """
+        Charges owed from the last tick, then sense / decide / act
+
+        :param: charges  list of flat positions of robots charged by other shards' stations
+        :return: tuple (number of robots acting, [(target, gid)] free intents in the halo rows)
+        """
+        for p in charges:
+            self.charge_robot(self.occupancy[p])
+
+        north, east, south, west = self.sense()
+        cells, w = self.cells, self.width
+        offsets = (-w, 1, w, -1)
+
+        self.acting = [i for i in range(len(self.pos)) if self.battery[i] > 0]
+        self.intents = []
+        halo = []
+
+        for i in self.acting:
+            if self.act_robot(i, (north[i], east[i], south[i], west[i], self.under[i])):
+                target = self.pos[i] + offsets[self.ori[i]]
+
+                # walls / stations / robots at tick start
+                free = CELL_CLASSES[cells[target]] not in BLOCKING
+                self.intents.append((i, target, free))
+
+                if free and self.halo(target):
+                    halo.append((target, self.ids[i]))
+
+        return len(self.acting), halo
+
+    def step_move(self, claims: dict) -> list:
+        """
+        :param: claims  dict target -> lowest gid of every shard's halo intents
+        :return: list of robot states that left the band
+        """
+        winners = dict(claims)
+        for i, target, free in self.intents:
+            if free and (target not in winners or self.ids[i] < winners[target]):
+                winners[target] = self.ids[i]
+
+        for i, target, free in self.intents:
+            if free and winners[target] == self.ids[i]:
+                self.move_robot(i, target)
+            else:
+                self.last_action[i] = CRASHED
+
+        for i in self.acting:
+            self.counter[i] += 1
+            self.battery[i] = max(self.battery[i] - 1, 0)
+
+        self.tick += 1
+        leaving = [i for i, p in enumerate(self.pos) if not self.y0 <= p // self.width < self.y1]
+
+        return self.remove(leaving) if leaving else []
+
+    def step_charge(self, arriving: list) -> list:
+        """
+        :param: arriving  robot states that moved into the band
+        :return: list of flat positions of robots to charge that another shard owns
+        """
+        for state in arriving:
+            self.add(state)
+
+        cells, w = self.cells, self.width
+        remote = []
+
+        for s in self.stations:
+            for neighbour in (s - w, s + 1, s + w, s - 1):
+                if cells[neighbour] in GLYPH_CODES:
+                    robot_id = self.occupancy.get(neighbour)
+
+                    if robot_id is not None:
+                        self.charge_robot(robot_id)
+                    else:
+                        remote.append(neighbour)
+                    break
+
+        return remote
+
+    def collect(self, charges: list) -> tuple:
+        """
+        :return: tuple (robot states, cells cleaned)
+        """
+        for p in charges:
+            self.charge_robot(self.occupancy[p])
+
+        return [self.export(i) for i in range(len(self.ids))], self.cells_cleaned
+
+
+def shard_worker(conn, shm_name: str, *args):
+    """
+    Worker process loop, one Shard driven by (command, payload) messages
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    shard = Shard(shm.buf, *args)
+    steps = {"add": lambda states: [shard.add(state) for state in states], "act": shard.step_act, "move": shard.step_move, "charge": shard.step_charge, "collect": shard.collect}
+
+    try:
+        while True:
+            command, payload = conn.recv()
+            if command == "stop":
+                break
+
+            conn.send(steps[command](payload))
+
+    finally:
+        shard.cells = None
+        del shard, steps
+        shm.close()
+
+
+class ShardedFleet:
+    """
+    Runs a Fleet split over worker processes, one horizontal band of rows
+    per worker, the grid itself in multiprocessing.shared_memory. Robots
+    read the halo rows of the next band straight from the shared grid,
+    contested moves and charges across borders are exchanged through the
+    parent each tick, all bands advance in lockstep. Same seed -> same
+    result as Fleet.run in one process.
+    """
+
+    def __init__(self, fleet: Fleet, shards: int = 2):
+        self.fleet = fleet
+        self.shards = max(1, min(shards, fleet.grid.height))
+
+        height = fleet.grid.height
+        self.bands = [(k * height // self.shards, (k + 1) * height // self.shards) for k in range(self.shards)]
+
+    def band(self, p: int) -> int:
+        y = p // self.fleet.width
+        return next(k for k, (y0, y1) in enumerate(self.bands) if y0 <= y < y1)
+
+    def run(self, ticks: int = 1000) -> dict:
+        """
+        Same as Fleet.run, the fleet holds the final state afterwards
+
+        :return: dict   run summary
+        """
+        fleet = self.fleet
+        start = time.perf_counter()
+
+        shm = shared_memory.SharedMemory(create=True, size=max(len(fleet.cells), 1))
+        shm.buf[:len(fleet.cells)] = fleet.cells
+        pipes, workers = [], []
+
+        try:
+            for y0, y1 in self.bands:
+                parent, child = multiprocessing.Pipe()
+                worker = multiprocessing.Process(target=shard_worker, args=(child, shm.name, fleet.width, fleet.grid.height, y0, y1, fleet.seed, fleet.charge, list(fleet.stations), fleet.rules), daemon=True)
+                worker.start()
+                pipes.append(parent)
+                workers.append(worker)
+
+            # hand each robot to the shard its row belongs to
+            states = [[] for k in self.bands]
+            for i in range(len(fleet.pos)):
+                states[self.band(fleet.pos[i])].append(export_robot(fleet, i))
+
+            self.broadcast(pipes, [("add", robots) for robots in states])
+            charges = [[] for k in self.bands]
+            ran = 0
+
+            for i in range(ticks):
+                replies = self.broadcast(pipes, [("act", owed) for owed in charges])
+                acting = sum(count for count, halo in replies)
+
+                claims = {}
+                for count, halo in replies:
+                    for target, gid in halo:
+                        if target not in claims or gid < claims[target]:
+                            claims[target] = gid
+
+                arriving = [[] for k in self.bands]
+                for leaving in self.broadcast(pipes, [("move", claims)] * len(pipes)):
+                    for state in leaving:
+                        arriving[self.band(state[1])].append(state)
+
+                charges = [[] for k in self.bands]
+                for remote in self.broadcast(pipes, [("charge", robots) for robots in arriving]):
+                    for p in remote:
+                        charges[self.band(p)].append(p)
+
+                ran += 1
+                if not acting:
+                    break
+
+            results = self.broadcast(pipes, [("collect", owed) for owed in charges])
+
+            for pipe in pipes:
+                pipe.send(("stop", None))
+            for worker in workers:
+                worker.join()
+
+            fleet.cells[:] = shm.buf[:len(fleet.cells)]
+
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+            shm.close()
+
+            # a spawned worker's resource tracker may have unlinked it already
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+        for robots, cleaned in results:
+            fleet.cells_cleaned += cleaned
+            for state in robots:
+                import_robot(fleet, state)
+
+        fleet.tick += ran
+        resync(fleet)
+
+        return {
+            "robots"        : len(fleet.pos),
+            "shards"        : self.shards,
+            "ticks"         : fleet.tick,
+            "cells_cleaned" : fleet.cells_cleaned,
+            "dirt_remaining": fleet.enviroment.dirt_remaining(),
+            "battery_dead"  : sum(1 for b in fleet.battery if b <= 0),
+            "wall_time"     : time.perf_counter() - start,
+        }
+
+    def broadcast(self, pipes: list, messages: list) -> list:
+        """
+        Send one message per shard, then wait for every reply (lockstep barrier)
+        """
+        for pipe, message in zip(pipes, messages):
+            pipe.send(message)
+
+        return [pipe.recv() for pipe in pipes]
+
+
+def export_robot(fleet: Fleet, i: int) -> tuple:
+    return (i, *(getattr(fleet, name)[i] for name in ROBOT_FIELDS), tuple(fleet.priority[i * 4:i * 4 + 4]), fleet.decisions[i])
+
+
+def import_robot(fleet: Fleet, state: tuple):
+    i, *fields, priority, decision = state
+    for name, value in zip(ROBOT_FIELDS, fields):
+        getattr(fleet, name)[i] = value
+
+    fleet.priority[i * 4:i * 4 + 4] = array("B", priority)
+    fleet.decisions[i] = decision
+
+
+def resync(fleet: Fleet):
+    """
+    Rebuild the Environment's index / occupancy from the grid and robot
+    arrays after the shards wrote them directly
+    """
+    env = fleet.enviroment
+    index = EntityIndex()
+    index.scan(env.world)
+
+    for i in range(len(fleet.pos)):
+        pos = fleet.xy(i)
+        under = chr(fleet.under[i])
+        index.under[pos] = under
+
+        if is_dirt(under):
+            index.dirt_counts[under] = index.dirt_counts.get(under, 0) + 1
+
+    env.index = index
+    env.dirt_distances = None
+    env.dock_distances = None
+    env.renderer = None
+    fleet.occupancy = {p: i for i, p in enumerate(fleet.pos)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Step a fleet of robots on one floorplan, split over worker processes")
+    parser.add_argument("floorplan", nargs="?", default="./floorplans/floorplan_002.txt")
+    parser.add_argument("--robots", type=int, default=0, help="extra robots placed on random floor cells")
+    parser.add_argument("--shards", type=int, default=multiprocessing.cpu_count(), help="worker processes (row bands)")
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--charge", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verify", action="store_true", help="also run in one process and check the results match")
+    parser.add_argument("--rules", default=None, help="rule config .json (rule order, battery threshold), e.g. written by tuning.py")
+    args = parser.parse_args(argv)
+
+    rules = load_rules(args.rules) if args.rules else None
+    fleet = Fleet(Environment(args.floorplan, use_cache=True), args.charge, args.seed, rules)
+    place_robots(fleet, args.robots, args.seed)
+    summary = ShardedFleet(fleet, args.shards).run(args.ticks)
+    print(summary)
+
+    if args.verify:
+        single = Fleet(Environment(args.floorplan, use_cache=True), args.charge, args.seed, rules)
+        place_robots(single, args.robots, args.seed)
+        single.run(args.ticks)
+
+        same = (
+            bytes(single.cells) == bytes(fleet.cells)
+            and single.cells_cleaned == fleet.cells_cleaned
+            and single.enviroment.dirt_remaining() == fleet.enviroment.dirt_remaining()
+            and all(single.robot_state(i) == fleet.robot_state(i) for i in range(len(fleet)))
+        )
+        print(f"matches single process run: {same}")
+
+        if not same:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
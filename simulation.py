@@ -0,0 +1,439 @@
+from environment import Environment, STEPS
+from sensors import CELL_CLASSES, VISITED, DIRT
+from scheduler import Scheduler
+from renderer import AnsiRenderer
+from trajectory import TrajectoryRecorder
+from profiler import Profiler, format_stats
+from metrics import Metrics, format_metrics
+from rule_config import load_rules
+from rule_engine import DecisionCache
+import utils
+import argparse
+import random
+import sys
+import time
+
+
+class Simulation():
+
+    def __init__(self, env_map: str, charge: int = 100, seed: int | None = None, planner: bool = False, dock: bool = False, event_driven: bool = False, multi: bool = False, env: Environment | None = None, fast_forward: bool = False, rules: dict | None = None):
+        self.env_map = env_map
+        self.seed = seed
+        self.multi = multi
+        self.rules = rules
+
+        if env is not None:
+            # already built (e.g. restored from a checkpoint), keeps its own RNG
+            self.enviroment = env
+        else:
+            # own RNG per run when seeded, else the shared module level random
+            rng = random.Random(seed) if seed is not None else None
+            self.enviroment = Environment(env_map, rng)
+
+        if multi:
+            # a Robot / Station for every glyph on the map, row major order
+            self.robots = [utils.Robot(pos, ori, charge, self.enviroment, planner=planner, dock=dock, rules=rules) for pos, ori in self.enviroment.robots()]
+            self.stations = [utils.Station(pos, ori, self.enviroment) for pos, ori in self.enviroment.stations()]
+        else:
+            self.robots = [utils.Robot(self.enviroment.robot_location, self.enviroment.robot_ori, charge, self.enviroment, planner=planner, dock=dock, rules=rules)]
+            self.stations = [utils.Station(self.enviroment.chargestation_location, self.enviroment.station_ori, self.enviroment, self.robots[0])]
+
+        self.robot = self.robots[0]
+        self.station = self.stations[0]
+        self.tick = 0
+        self.cells_cleaned = 0
+        self.crashes = 0
+        self.clean_tick = 0 if self.enviroment.dirt_remaining() == 0 else None
+        self.battery_curve = [self.robot.battery]
+        self.scheduler = self.build_scheduler() if event_driven else None
+        self.recorder = None
+        self.metrics = None
+        self.fast_forward = fast_forward
+        self.station_cells = None
+
+    def record(self, path: str) -> TrajectoryRecorder:
+        """
+        Log every following tick to a binary trajectory file (see trajectory.py),
+        the caller closes the returned recorder
+        """
+        self.recorder = TrajectoryRecorder(path, self.env_map)
+        return self.recorder
+
+    def track_metrics(self, door_width: int = 2) -> Metrics:
+        """
+        Sample coverage / dirt / heatmap metrics after every following tick (see metrics.py)
+        """
+        self.metrics = Metrics(self.enviroment, door_width)
+        self.metrics.sample(self.tick)
+        return self.metrics
+
+    def cache_decisions(self, size: int = 1024):
+        """
+        Give every robot an LRU decision cache of size entries (see
+        RobotLogicSystem.decide_from_codes), same results, off by default
+        """
+        for robot in self.robots:
+            robot.logic.cache = DecisionCache(size)
+
+    def build_scheduler(self) -> Scheduler:
+        """
+        Robots every tick, stations only when a robot enters / leaves / turns
+        next to them, and for as long as they keep charging one
+        """
+        scheduler = Scheduler(self.enviroment)
+        for robot in self.robots:
+            scheduler.add_agent(robot, every=1)
+
+        for station in self.stations:
+            scheduler.add_agent(station, every=None, busy=lambda station=station: "charge_" in station.decision)
+
+            x, y = station.position
+            scheduler.watch_cells(station, [(x, y-1), (x+1, y), (x, y+1), (x-1, y)])
+            scheduler.add_timer(station, 0)
+
+        return scheduler
+
+    def step(self) -> bool:
+        """
+        Advance the simulation one tick, robots then charging stations. No rendering
+
+        :return: bool   False if every robot battery is dead (nothing was run), else True
+        """
+        live = [robot for robot in self.robots if robot.battery >= 1]
+        if not live:
+            return False
+
+        if self.scheduler is not None:
+            self.scheduler.run_tick()
+
+            # stations left asleep still read their cells every tick, as in the
+            # plain loop (what Station.__str__ and the render show)
+            for station in self.stations:
+                station.sense()
+        else:
+            for robot in live:
+                robot.act()
+            for station in self.stations:
+                station.act()
+
+        for robot in live:
+            if robot.decision == "clean":
+                self.cells_cleaned += 1
+            elif robot.last_action == "crash!!!" and ("move" in robot.decision or "keep_swimming" in robot.decision):
+                self.crashes += 1
+
+        self.tick += 1
+        self.battery_curve.append(self.robot.battery)
+
+        if self.recorder is not None:
+            self.recorder.record(self)
+
+        if self.metrics is not None:
+            self.metrics.sample(self.tick)
+
+        if self.clean_tick is None and self.enviroment.dirt_remaining() == 0:
+            self.clean_tick = self.tick
+
+        return True
+
+    def straight_run(self, limit: int) -> int:
+        """
+        Number of ticks (up to limit) the robot is certain to spend on
+        move_forward: nothing dirty under or next to it, front clear, battery
+        ok, and never ending a move next to a station. Read off the grid ahead,
+        no sense / decide. Any rule order with front_clear above turn_clear
+
+        :return: int   0 if the next tick has to be run normally
+        """
+        robot = self.robot
+        env = self.enviroment
+        if len(self.robots) != 1 or self.scheduler is not None or self.recorder is not None or self.metrics is not None or robot.planner or robot.dock:
+            return 0
+
+        # front_clear has to outrank the turns for move_forward to be certain
+        order = robot.rules["order"]
+        if order.index("front_clear") > order.index("turn_clear"):
+            return 0
+
+        under = env.index.under.get(robot.position)
+        if under is None or CELL_CLASSES[ord(under)] == DIRT:
+            return 0
+
+        if self.station_cells is None:
+            w = env.world.width
+            self.station_cells = {y * w + x + offset for x, y in env.index.stations for offset in (-w, 1, w, -1)}
+
+        cells, w = env.world.cells, env.world.width
+        x, y = robot.position
+        dx, dy = STEPS[robot.orientation]
+        p = y * w + x
+        step = dy * w + dx
+        ticks = 0
+
+        while ticks < limit and robot.battery - ticks > robot.logic.battery_threshold:
+            if DIRT in (CELL_CLASSES[cells[p - w]], CELL_CLASSES[cells[p + 1]], CELL_CLASSES[cells[p + w]], CELL_CLASSES[cells[p - 1]]):
+                break
+
+            front = p + step
+            if CELL_CLASSES[cells[front]] > VISITED or front in self.station_cells:
+                break
+
+            p = front
+            ticks += 1
+
+        return ticks
+
+    def skip_ahead(self, limit: int) -> int:
+        """
+        Fast forward, apply a straight_run of moves as one batch, with the
+        same end state as stepping it tick by tick (grid tail, position,
+        battery, counter, RNG draws, station state, battery curve)
+
+        :return: int   ticks advanced, 0 = nothing batched, run step()
+        """
+        ticks = self.straight_run(limit)
+        if not ticks:
+            return 0
+
+        robot = self.robot
+        env = self.enviroment
+        logic = robot.logic
+
+        # each decide shuffles the compass priority once
+        for i in range(ticks):
+            logic.rng.shuffle(logic.direction_priority)
+
+        # the last sense was from the cell before the last move
+        if ticks > 1:
+            robot.position = env.move_robot_straight(robot.position, robot.orientation, ticks - 1)
+        robot.sense()
+        robot.position = env.move_robot_straight(robot.position, robot.orientation, 1)
+
+        battery = robot.battery
+        robot.decision = "move_forward"
+        robot.last_action = "moved"
+        robot.counter += ticks
+        robot.battery -= ticks
+
+        # no robot ever came next to a station, their last tick is all that shows
+        for station in self.stations:
+            station.act()
+
+        self.tick += ticks
+        self.battery_curve.extend(range(battery - 1, battery - ticks - 1, -1))
+
+        return ticks
+
+    def render(self) -> str:
+        """
+        Build the same output as the main.py print loop for the current tick
+        """
+        return f"\n\n{self.robot}\n{self.station}\n{self.enviroment}"
+
+    def run(self, ticks: int = 1000, render_every: int | None = None, render_final: bool = False, output=print) -> dict:
+        """
+        Run the simulation headless for up to ticks, optionally rendering
+
+        :param: ticks  int max number of ticks to run
+                render_every  int render every N ticks, None = never
+                render_final  bool render the final state once the run ends
+                output  callable used to emit rendered frames (default print)
+        :return: dict   run summary (see summary)
+        """
+        start = time.perf_counter()
+        i = 0
+
+        while i < ticks:
+
+            limit = ticks - i
+            if render_every:
+                limit = min(limit, render_every - self.tick % render_every)
+
+            # batch straight runs, never past a render tick
+            advanced = self.skip_ahead(limit) if self.fast_forward else 0
+
+            if not advanced:
+                if not self.step():
+                    break
+                advanced = 1
+
+            i += advanced
+
+            if render_every and self.tick % render_every == 0:
+                output(self.render())
+
+        wall_time = time.perf_counter() - start
+
+        if render_final:
+            output(self.render())
+
+        return self.summary(wall_time)
+
+    def status_line(self) -> str:
+        return f"tick {self.tick}  battery {self.robot.battery}%  dirt {self.enviroment.dirt_remaining()}  last {self.robot.decision}"
+
+    def run_live(self, ticks: int = 1000, every: int = 1, delay: float = 0.0, stream=sys.stdout) -> dict:
+        """
+        Run with a live terminal view, each frame only redraws the cells
+        that changed (see renderer.AnsiRenderer)
+
+        :param: ticks  int max number of ticks to run
+                every  int draw every N ticks
+                delay  float seconds to sleep after each drawn frame
+                stream  text stream the ANSI frames are written to
+        :return: dict   run summary (see summary)
+        """
+        view = AnsiRenderer(self.enviroment, top=3)
+        view.draw(stream, [self.status_line()])
+        start = time.perf_counter()
+
+        for i in range(ticks):
+
+            if not self.step():
+                break
+
+            if self.tick % every == 0:
+                view.draw(stream, [self.status_line()])
+
+                if delay:
+                    time.sleep(delay)
+
+        wall_time = time.perf_counter() - start
+
+        # final state, whatever changed since the last drawn frame
+        view.draw(stream, [self.status_line()])
+        stream.write("\n")
+
+        return self.summary(wall_time)
+
+    def coverage(self) -> float:
+        """
+        :return: float   % of floor cells the robots have visited ("0" tail cells + the cell each robot is on)
+        """
+        env = self.enviroment
+        floor = sum(env.world.row_lengths) - len(env.index.walls) - len(env.index.stations)
+        if floor <= 0:
+            return 0.0
+
+        return 100 * (env.world.count("0") + len(self.robots)) / floor
+
+    def summary(self, wall_time: float = 0.0) -> dict:
+        """
+        Run summary, ticks, cells cleaned, battery curve and wall time
+        """
+        return {
+            "floorplan"     : self.env_map,
+            "ticks"         : self.tick,
+            "cells_cleaned" : self.cells_cleaned,
+            "dirt_remaining": self.enviroment.dirt_remaining(),
+            "clean_tick"    : self.clean_tick,
+            "coverage"      : self.coverage(),
+            "crashes"       : self.crashes,
+            "robots"        : len(self.robots),
+            "battery_dead"  : all(robot.battery <= 0 for robot in self.robots),
+            "battery_curve" : self.battery_curve,
+            "final_battery" : self.robot.battery,
+            "last_decision" : self.robot.decision,
+            "wall_time"     : wall_time,
+        }
+
+
+def run_simulation(env_map: str, ticks: int = 1000, charge: int = 100, render_every: int | None = None, render_final: bool = False, output=print, seed: int | None = None, planner: bool = False, dock: bool = False, event_driven: bool = False, record: str | None = None, multi: bool = False, fast_forward: bool = False, rules: dict | None = None) -> dict:
+    """
+    Python API for a single headless run
+
+    :param: record  str path of a trajectory log to write, None = no log
+            rules  dict rule order / battery threshold (see rule_config), None = default
+    :return: dict   run summary
+    """
+    sim = Simulation(env_map, charge, seed, planner, dock, event_driven, multi, fast_forward=fast_forward, rules=rules)
+    if record is None:
+        return sim.run(ticks, render_every, render_final, output)
+
+    with sim.record(record):
+        return sim.run(ticks, render_every, render_final, output)
+
+
+def format_summary(summary: dict) -> str:
+    """
+    Output messages for a run summary
+    """
+    curve = summary["battery_curve"]
+
+    return (
+        f"\n        -- Run Summary -- \n"
+        f"Floorplan                 :   {summary['floorplan']} \n"
+        f"Ticks                     :   {summary['ticks']} \n"
+        f"Cells Cleaned             :   {summary['cells_cleaned']} \n"
+        f"Dirt Remaining            :   {summary['dirt_remaining']} \n"
+        f"Coverage                  :   {summary['coverage']:.1f}% \n"
+        f"Crashes                   :   {summary['crashes']} \n"
+        f"Battery                   :   {curve[0]}% -> {curve[-1]}% (min {min(curve)}%) \n"
+        f"Last Decision             :   {summary['last_decision']} \n"
+        f"Wall Time                 :   {summary['wall_time']:.4f}s \n"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless cleaning robot batch run")
+    parser.add_argument("floorplan", nargs="?", default="./floorplans/floorplan_002.txt")
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--charge", type=int, default=100)
+    parser.add_argument("--render-every", type=int, default=None, help="render every N ticks")
+    parser.add_argument("--render-final", action="store_true", help="render the final state only")
+    parser.add_argument("--live", action="store_true", help="live terminal view, only changed cells are redrawn")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds between live frames")
+    parser.add_argument("--record", default=None, help="write a binary trajectory log (run j > 0 gets a .j suffix), see trajectory.py")
+    parser.add_argument("--metrics", default=None, help="sample metrics every tick, write PREFIX.csv / PREFIX.heat (run j > 0 gets a .j suffix), see metrics.py")
+    parser.add_argument("--profile", nargs="?", const="", default=None, help="time Robot / Station / Environment phases, optionally dump pstats to the given file")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None, help="seed of the first run (run j uses seed + j)")
+    parser.add_argument("--planner", action="store_true", help="robot paths to the nearest dirt")
+    parser.add_argument("--dock", action="store_true", help="robot returns to the station to recharge")
+    parser.add_argument("--event-driven", action="store_true", help="only wake the station when a robot is next to it")
+    parser.add_argument("--multi", action="store_true", help="run every robot and station on the map, not just the first")
+    parser.add_argument("--rules", default=None, help="rule config .json (rule order, battery threshold), e.g. written by tuning.py")
+    parser.add_argument("--decision-cache", type=int, default=0, help="LRU cache N robot decisions per sensor state (same results, off by default)")
+    parser.add_argument("--fast-forward", action="store_true", help="apply straight runs of move_forward in one batch (same results)")
+    args = parser.parse_args(argv)
+
+    profiler = Profiler() if args.profile is not None else None
+    rules = load_rules(args.rules) if args.rules else None
+
+    for j in range(args.runs):
+        seed = args.seed + j if args.seed is not None else None
+        record = args.record if not args.record or j == 0 else f"{args.record}.{j}"
+        metrics = args.metrics if not args.metrics or j == 0 else f"{args.metrics}.{j}"
+
+        sim = Simulation(args.floorplan, args.charge, seed, args.planner, args.dock, args.event_driven, args.multi, fast_forward=args.fast_forward, rules=rules)
+        if record:
+            sim.record(record)
+        if metrics:
+            sim.track_metrics()
+        if args.decision_cache:
+            sim.cache_decisions(args.decision_cache)
+        if profiler is not None:
+            profiler.attach_simulation(sim)
+
+        if args.live:
+            summary = sim.run_live(args.ticks, args.render_every or 1, args.delay)
+        else:
+            summary = sim.run(args.ticks, args.render_every, args.render_final)
+
+        if record:
+            sim.recorder.close()
+
+        print(format_summary(summary))
+        if metrics:
+            sim.metrics.save(metrics)
+            print(format_metrics(sim.metrics))
+        print(f"run {j}")
+
+    if profiler is not None:
+        print(format_stats(profiler.stats()))
+
+        if args.profile:
+            profiler.dump(args.profile)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from floorplan_generator import generate_floorplan
+
+
+@pytest.fixture
+def floorplan_001() -> str:
+    return os.path.join(ROOT, "floorplans", "floorplan_001.txt")
+
+
+@pytest.fixture
+def floorplan_002() -> str:
+    return os.path.join(ROOT, "floorplans", "floorplan_002.txt")
+
+
+@pytest.fixture(scope="session")
+def generated(tmp_path_factory) -> str:
+    """
+    Seeded 40x20 map, 4 robots, 2 stations, rooms and doors
+    """
+    path = str(tmp_path_factory.mktemp("floorplans") / "generated.txt")
+    generate_floorplan(path, 40, 20, robots=4, stations=2, seed=1)
+    return path
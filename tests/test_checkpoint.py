@@ -0,0 +1,53 @@
+from checkpoint import Checkpoint, save_checkpoint
+from simulation import Simulation
+import random
+
+
+def run_state(sim: Simulation, ticks: int) -> tuple:
+    summary = sim.run(ticks)
+    summary.pop("wall_time")
+    return summary, str(sim.enviroment), [(robot.position, robot.orientation, robot.battery) for robot in sim.robots]
+
+
+def test_restore_and_fork_carry_on_identically(floorplan_001, floorplan_002, generated, tmp_path):
+    path = str(tmp_path / "run.ckpt")
+    cases = [
+        (floorplan_002, {"seed": 1}),
+        (floorplan_001, {"seed": 3, "planner": True}),
+        (floorplan_002, {"seed": 2, "dock": True, "event_driven": True}),
+        (generated, {"seed": 4, "multi": True, "dock": True}),
+        (generated, {"seed": 5, "multi": True, "planner": True, "event_driven": True}),
+        (floorplan_002, {"seed": None, "charge": 300}),
+    ]
+
+    for env_map, options in cases:
+        random.seed(9)
+        whole = run_state(Simulation(env_map, **options), 400)
+
+        for split in (1, 77, 150):
+            random.seed(9)
+            sim = Simulation(env_map, **options)
+            sim.run(split)
+            checkpoint = save_checkpoint(sim, path)
+            assert Checkpoint(path).tick == checkpoint.tick == sim.tick
+
+            # the branches carry the saved RNG state, the module level one doesn't matter
+            random.seed(1234)
+            assert run_state(checkpoint.restore(), 400 - split) == whole, (env_map, options, split)
+            assert run_state(checkpoint.fork(), 400 - split) == whole, (env_map, options, split)
+
+
+def test_forks_are_isolated(generated, tmp_path):
+    sim = Simulation(generated, 150, 2, multi=True)
+    sim.run(50)
+    checkpoint = save_checkpoint(sim, str(tmp_path / "run.ckpt"))
+    saved = run_state(checkpoint.restore(), 0)
+
+    first = checkpoint.fork(1)
+    second = checkpoint.fork(2)
+    first.run(200)
+    second.run(200)
+
+    assert str(first.enviroment) != str(second.enviroment)
+    assert run_state(checkpoint.restore(), 0) == saved
+    assert run_state(checkpoint.fork(), 0) == saved
@@ -0,0 +1,73 @@
+from profiler import Profiler
+from robot_logic import RobotLogicSystem
+from rule_config import RULE_GROUPS
+from rule_engine import DecisionCache
+from simulation import Simulation
+import random
+
+
+def final_state(sim: Simulation, ticks: int) -> tuple:
+    summary = sim.run(ticks)
+    summary.pop("wall_time")
+    return summary, str(sim.enviroment), [(robot.position, robot.decision) for robot in sim.robots]
+
+
+def test_cached_runs_match_uncached(floorplan_001, floorplan_002, generated):
+    rng = random.Random(0)
+
+    for seed in range(12):
+        order = list(RULE_GROUPS)
+        rng.shuffle(order)
+        rules = {"order": order, "battery_threshold": rng.randint(0, 5)}
+        env_map = [floorplan_001, floorplan_002, generated][seed % 3]
+        options = {"dock": seed % 2 == 0, "planner": seed % 3 == 1, "multi": seed % 4 == 1}
+
+        runs = []
+        for cached in (True, False):
+            sim = Simulation(env_map, 100, seed, rules=rules, **options)
+            if cached:
+                sim.cache_decisions()
+            runs.append(final_state(sim, 600))
+
+        assert runs[0] == runs[1], (seed, rules, options)
+
+
+def test_cache_key_ignores_unused_priority():
+    logic = RobotLogicSystem(rng=random.Random(0), cache_size=1024)
+    logic.add_rule(["front_clear"], "move_forward")
+
+    # open floor all round: 24 priority orders, one clear fact each way it is shuffled
+    floor = (32, 32, 32, 32, 32)
+    for i in range(50):
+        logic.reset_facts()
+        logic.decide_from_codes(floor, "^", 50, None)
+
+    assert logic.cache.stats()["size"] <= 4
+
+
+def test_cache_stats_cover_fast_forward(floorplan_002):
+    sim = Simulation(floorplan_002, 100, 1, fast_forward=True)
+    sim.cache_decisions()
+    profiler = Profiler()
+    profiler.attach_simulation(sim)
+    summary = sim.run(1000)
+
+    cache = profiler.stats()["caches"]["RobotLogicSystem"]
+    assert cache["hits"] + cache["misses"] == summary["ticks"]
+
+
+def test_lru_eviction():
+    cache = DecisionCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_off_by_default(floorplan_002):
+    sim = Simulation(floorplan_002, 100, 1)
+    assert sim.robot.logic.cache is None
@@ -0,0 +1,55 @@
+from simulation import Simulation
+
+
+def test_dock_keeps_robot_alive(floorplan_002):
+    # the map also has a station glyph with no Station behind it, docking there charged nothing
+    for seed in range(20):
+        summary = Simulation(floorplan_002, 100, seed, dock=True).run(1000)
+        assert not summary["battery_dead"], seed
+        assert min(summary["battery_curve"][1:]) > 0
+
+
+def test_dock_on_generated_map(generated):
+    for seed in range(10):
+        assert not Simulation(generated, 100, seed, dock=True).run(1000)["battery_dead"], seed
+
+
+def test_dock_field_only_simulated_stations(generated):
+    sim = Simulation(generated, 100, 0, dock=True)
+    env = sim.enviroment
+
+    assert list(env.chargers) == [env.chargestation_location]
+    assert len(env.index.stations) > 1
+
+    # every robot / station on the map simulated, every station is a dock
+    multi = Simulation(generated, 100, 0, dock=True, multi=True)
+    assert sorted(multi.enviroment.chargers) == sorted(multi.enviroment.index.stations)
+
+
+def test_dock_recharges_and_resumes(floorplan_002):
+    for seed in range(5):
+        sim = Simulation(floorplan_002, 100, seed, dock=True)
+        curve = sim.run(1000)["battery_curve"]
+
+        # charged back up at the station, then went on cleaning
+        assert any(b > a for a, b in zip(curve, curve[1:]))
+        assert max(curve[150:]) >= 95
+        assert sim.tick == 1000
+
+
+def test_dock_field_rebuilt_after_walls(floorplan_002):
+    sim = Simulation(floorplan_002, 100, 0, dock=True)
+    env = sim.enviroment
+    field = env.dock_field()
+
+    assert env.dock_field() is field
+    assert field.distance(env.robot_location) is not None
+
+    x, y = env.chargestation_location
+    for dx, dy in [(0, -1), (1, 0), (0, 1), (-1, 0)]:
+        if env.world.get(x + dx, y + dy) not in "xudlr":
+            env.set_wall((x + dx, y + dy))
+
+    # walled in, no way home
+    assert env.dock_field() is not field
+    assert env.dock_field().distance(env.robot_location) is None
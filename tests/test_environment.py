@@ -0,0 +1,87 @@
+from environment import Environment
+from entity_index import EntityIndex, is_dirt
+from grid import Grid
+from simulation import Simulation
+from sensors import from_dict
+from collections import Counter
+import pytest
+
+
+def test_grid_round_trip(floorplan_002):
+    with open(floorplan_002) as file:
+        rows = [line.strip() for line in file]
+
+    grid = Grid.from_file(floorplan_002)
+
+    assert str(grid) == "\n".join(rows)
+    assert all(grid[y][x] == rows[y][x] for y in range(len(rows)) for x in range(len(rows[y])))
+
+    grid[2][3] = "0"
+    assert grid.get(3, 2) == "0" and grid.cells[grid.index(3, 2)] == ord("0")
+
+
+def assert_index_matches_grid(env: Environment):
+    fresh = EntityIndex()
+    fresh.scan(env.world)
+
+    # robots hide the cell they stand on, the index keeps it in under
+    dirt = fresh.find_dirt()
+    for pos, char in env.index.under.items():
+        if is_dirt(char):
+            dirt[pos] = char
+
+    assert env.index.robots == fresh.robots
+    assert env.index.stations == fresh.stations
+    assert env.index.dirt == dirt
+    assert {char: count for char, count in env.index.dirt_counts.items() if count} == dict(Counter(dirt.values()))
+
+
+def test_index_kept_up_to_date(floorplan_002, generated):
+    for env_map, options in [(floorplan_002, {}), (generated, {"multi": True}), (generated, {"multi": True, "dock": True})]:
+        for seed in range(5):
+            sim = Simulation(env_map, 200, seed, **options)
+            dirt = sim.enviroment.index.dirt   # positions built up front, kept up to date
+            sim.run(600)
+
+            assert_index_matches_grid(sim.enviroment)
+            assert sim.enviroment.dirt_remaining() == len(dirt)
+
+
+def test_sense_matches_get_cells(generated):
+    sim = Simulation(generated, 100, 2, multi=True)
+    env = sim.enviroment
+    sim.run(200)
+
+    inside = [(x, y) for y in range(1, env.world.height - 1) for x in range(1, env.world.row_lengths[y] - 1)]
+    for pos in inside + list(env.index.robots):
+        assert env.sense(pos) == from_dict(env.get_cells(pos)), pos
+
+
+def test_unreadable_map_has_no_world(tmp_path):
+    env = Environment(str(tmp_path / "missing.txt"))
+
+    assert env.world is None
+    assert env.robot_location is None
+
+
+def test_unwalled_map_is_rejected(tmp_path):
+    # sense reads neighbours at flat offsets, an open edge would wrap rows
+    for rows in ["x x\nx^x\nxxx\n", "xxxx\nx^ 0\nxxxx\n", "xxx\nx^x\nx x\n", "xxxx\n0^ x\nxxxx\n"]:
+        path = tmp_path / "open.txt"
+        path.write_text(rows)
+
+        assert Grid(rows.splitlines()).walled() is False
+        assert Environment(str(path)).world is None
+        assert Environment(str(path), use_cache=True).world is None
+
+    # ragged rows are padded with walls
+    path.write_text("xxxx\nx^x\nxxxx\n")
+    assert Environment(str(path)).sense((1, 1))[:4] == (ord("x"),) * 4
+
+
+def test_wall_border_stays(floorplan_002):
+    env = Environment(floorplan_002)
+
+    for position in [(0, 3), (3, 0), (len(env.world[2]) - 1, 2), (3, len(env.world) - 1)]:
+        with pytest.raises(ValueError):
+            env.set_wall(position, False)
@@ -0,0 +1,25 @@
+from experiments import run_experiment, run_experiments
+from simulation import Simulation
+
+
+def strip(row: dict) -> dict:
+    row = dict(row)
+    row.pop("wall_time")
+    return row
+
+
+def test_parallel_runs_match_serial(floorplan_001, floorplan_002):
+    results = run_experiments([floorplan_001, floorplan_002], 4, ticks=400, base_seed=10, workers=2)
+
+    serial = [run_experiment((env_map, seed, 400, 100, False, False, None)) for env_map in [floorplan_001, floorplan_002] for seed in range(10, 14)]
+
+    assert [strip(row) for row in results] == [strip(row) for row in serial]
+    assert [row["seed"] for row in results] == [10, 11, 12, 13] * 2
+
+
+def test_coverage_counts_every_robot(generated):
+    sim = Simulation(generated, 100, 3, multi=True)
+    metrics = sim.track_metrics()
+
+    for ticks in (0, 50, 200):
+        assert abs(sim.run(ticks)["coverage"] - metrics.coverage()) < 1e-9
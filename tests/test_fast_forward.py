@@ -0,0 +1,37 @@
+from rule_config import DEFAULT_RULES
+from simulation import Simulation
+
+
+def run_state(sim: Simulation, ticks: int, render_every: int | None) -> tuple:
+    robot = sim.robot
+    frames = []
+    summary = sim.run(ticks, render_every, output=frames.append)
+    summary.pop("wall_time")
+    return (summary, frames, str(sim.enviroment), robot.position, robot.orientation, robot.battery, robot.decision,
+            robot.last_action, robot.counter, robot.senser_values, list(robot.logic.direction_priority),
+            sim.station.decision, sim.station.senser_values, dict(sim.enviroment.index.dirt_counts), sim.enviroment.rng.random())
+
+
+def test_fast_forward_matches_step_by_step(floorplan_001, floorplan_002, generated):
+    tuned = {"order": list(reversed(DEFAULT_RULES["order"])), "battery_threshold": 5}
+    batched = 0
+
+    for env_map in (floorplan_001, floorplan_002, generated):
+        for seed in range(6):
+            for charge, ticks, render_every, rules in [(100, 1000, None, None), (400, 1000, 37, None), (1000, 3000, None, tuned)]:
+                step = run_state(Simulation(env_map, charge, seed, rules=rules), ticks, render_every)
+
+                sim = Simulation(env_map, charge, seed, fast_forward=True, rules=rules)
+                skip_ahead = sim.skip_ahead
+
+                def counted(limit):
+                    nonlocal batched
+                    advanced = skip_ahead(limit)
+                    batched += advanced
+                    return advanced
+
+                sim.skip_ahead = counted
+                assert run_state(sim, ticks, render_every) == step, (env_map, seed, charge, rules)
+
+    # the runs above really went through the batched path
+    assert batched
@@ -0,0 +1,41 @@
+from environment import Environment
+from fleet import Fleet, GLYPHS, GLYPH_CODES, place_robots
+from rule_config import DEFAULT_RULES
+
+
+def test_fleet_uses_rule_config(floorplan_002):
+    rules = {"order": list(reversed(DEFAULT_RULES["order"])), "battery_threshold": 20}
+    fleet = Fleet(Environment(floorplan_002), 100, 0, rules)
+
+    assert fleet.logic.battery_threshold == 20
+    assert fleet.logic.rules[0]["conclusion"].startswith("random_")
+
+    for tick in range(100):
+        battery = fleet.battery[0]
+        fleet.step()
+        assert (fleet.decisions[0] == "battery_dead") == (battery <= 20)
+
+
+def fleet_state(fleet: Fleet) -> tuple:
+    return bytes(fleet.cells), fleet.cells_cleaned, [fleet.robot_state(i) for i in range(len(fleet))]
+
+
+def test_fleet_is_seeded_and_consistent(generated):
+    for seed in range(3):
+        runs = []
+        for repeat in range(2):
+            fleet = Fleet(Environment(generated), 150, seed)
+            place_robots(fleet, 20, seed)
+
+            for tick in range(300):
+                fleet.step()
+
+                # one robot per cell, every robot glyph on the grid is a fleet robot
+                assert len(set(fleet.pos)) == len(fleet)
+                assert fleet.occupancy == {p: i for i, p in enumerate(fleet.pos)}
+                assert all(fleet.cells[p] in GLYPH_CODES for p in fleet.pos)
+
+            assert fleet.enviroment.index.robots == {fleet.xy(i): GLYPHS[fleet.ori[i]] for i in range(len(fleet))}
+            runs.append(fleet_state(fleet))
+
+        assert runs[0] == runs[1]
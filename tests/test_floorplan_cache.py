@@ -0,0 +1,48 @@
+from environment import Environment
+from simulation import Simulation
+import floorplan_cache
+import os
+import random
+import shutil
+
+
+def test_cached_grid_matches_parsed(floorplan_002, tmp_path):
+    path = str(tmp_path / "map.txt")
+    shutil.copy(floorplan_002, path)
+
+    parsed = Environment(path)
+    for repeat in range(2):   # first writes the cache, second maps it
+        cached = Environment(path, use_cache=True)
+
+        assert bytes(cached.world.cells) == bytes(parsed.world.cells)
+        assert str(cached.world) == str(parsed.world)
+        assert cached.index.robots == parsed.index.robots
+        assert cached.index.dirt == parsed.index.dirt
+
+    assert os.path.exists(floorplan_cache.cache_path(path))
+
+
+def test_cached_run_matches_parsed(floorplan_002, tmp_path):
+    path = str(tmp_path / "map.txt")
+    shutil.copy(floorplan_002, path)
+    Environment(path, use_cache=True)
+
+    runs = []
+    for use_cache in (False, True):
+        sim = Simulation(path, 200, 3, dock=True, env=Environment(path, random.Random(3), use_cache))
+        summary = sim.run(500)
+        summary.pop("wall_time")
+        runs.append((summary, str(sim.enviroment)))
+
+    assert runs[0] == runs[1]
+
+
+def test_cache_follows_source_changes(floorplan_002, tmp_path):
+    path = str(tmp_path / "map.txt")
+    shutil.copy(floorplan_002, path)
+    Environment(path, use_cache=True)
+
+    with open(path, "a") as file:
+        file.write("xxxxx\n")
+
+    assert str(Environment(path, use_cache=True).world) == str(Environment(path).world)
@@ -0,0 +1,30 @@
+from floorplan_generator import generate_floorplan
+from environment import Environment
+from planner import DistanceField
+
+
+def test_generator_is_seeded(tmp_path):
+    paths = [str(tmp_path / f"{name}.txt") for name in ["a", "b", "c"]]
+    for path, seed in zip(paths, [4, 4, 5]):
+        generate_floorplan(path, 60, 30, robots=5, stations=3, seed=seed)
+
+    a, b, c = (open(path).read() for path in paths)
+    assert a == b
+    assert a != c
+
+
+def test_generated_map_is_usable(tmp_path):
+    path = str(tmp_path / "map.txt")
+    summary = generate_floorplan(path, 60, 30, robots=5, stations=3, seed=2)
+    env = Environment(path)
+    rows = str(env.world).split("\n")
+
+    assert len(rows) == 30 and all(len(row) == 60 for row in rows)
+    assert rows[0] == rows[-1] == "x" * 60
+    assert all(row[0] == row[-1] == "x" for row in rows)
+    assert len(env.index.robots) == 5 and len(env.index.stations) == 3
+    assert env.dirt_remaining() == summary["dirt"]
+
+    # doors join every room, every dirt cell can be reached from the robots
+    field = DistanceField(env.world, list(env.index.robots))
+    assert all(field.distance(pos) is not None for pos in env.index.dirt)
@@ -0,0 +1,54 @@
+from metrics import RoomMap, dirt_by_type, floor_cells
+from environment import Environment
+from simulation import Simulation
+from array import array
+
+
+def test_metrics_match_grid_scans(generated, tmp_path):
+    sim = Simulation(generated, 150, 5, multi=True, dock=True)
+    metrics = sim.track_metrics()
+    env = sim.enviroment
+    visited = {robot.position for robot in sim.robots}
+
+    for tick in range(300):
+        if not sim.step():
+            break
+        visited |= {robot.position for robot in sim.robots}
+
+    rows = str(env.world).split("\n")
+    seen = {(x, y) for y, row in enumerate(rows) for x, char in enumerate(row) if char.isdigit()} | visited
+
+    assert metrics.visited == len(seen)
+    assert metrics.floor == floor_cells(env.world)
+    assert abs(metrics.coverage() - 100 * len(seen) / metrics.floor) < 1e-9
+    assert {char: count for char, count in metrics.dirt().items() if count} == dirt_by_type(env.world, env.index.under)
+    assert sum(metrics.heat) == metrics.visits
+    assert len(metrics.ticks) == sim.tick + 1
+
+    # per room numbers add up to the whole map
+    rooms = metrics.rooms()
+    assert sum(room["dirt"] for room in rooms) <= env.dirt_remaining()
+    assert sum(room["visited"] for room in rooms) <= metrics.visited
+
+    metrics.save(str(tmp_path / "run"))
+    heat = array("I")
+    with open(tmp_path / "run.heat", "rb") as file:
+        heat.fromfile(file, len(metrics.heat))
+    assert heat == metrics.heat
+    assert len(open(tmp_path / "run.csv").read().splitlines()) == len(metrics.ticks) + 1
+
+
+def test_rooms_split_at_doors(tmp_path):
+    path = tmp_path / "rooms.txt"
+    path.write_text(
+        "xxxxxxxxxxx\n"
+        "x    x    x\n"
+        "x         x\n"
+        "x    x    x\n"
+        "xxxxxxxxxxx\n"
+    )
+    room_map = RoomMap(Environment(str(path)).world, door_width=1)
+
+    assert len(room_map) == 2
+    assert room_map.room_of((1, 1)) != room_map.room_of((9, 3))
+    assert room_map.room_of((5, 2)) == -1
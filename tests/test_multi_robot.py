@@ -0,0 +1,19 @@
+from simulation import Simulation
+
+
+def test_robots_never_share_a_cell(generated):
+    for seed in range(4):
+        sim = Simulation(generated, 150, seed, multi=True, dock=seed % 2 == 0)
+        env = sim.enviroment
+        assert len(sim.robots) == len(env.index.robots) == 4
+        assert len(sim.stations) == len(env.index.stations) == 2
+
+        for tick in range(400):
+            if not sim.step():
+                break
+
+            positions = [robot.position for robot in sim.robots]
+            assert len(set(positions)) == len(positions)
+            assert set(positions) == set(env.index.robots)
+            assert all(env.robot_at(robot.position) is robot for robot in sim.robots)
+            assert all(env.world.get(*robot.position) == robot.orientation for robot in sim.robots)
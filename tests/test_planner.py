@@ -0,0 +1,39 @@
+from planner import DistanceField
+from environment import Environment
+from simulation import Simulation
+import random
+
+
+def test_incremental_field_matches_rebuilt(generated):
+    env = Environment(generated)
+    rng = random.Random(0)
+    sources = set(env.index.dirt)
+    field = DistanceField(env.world, sources)
+
+    for i in range(40):
+        pos = rng.choice(sorted(sources))
+        if rng.random() < 0.7 and len(sources) > 1:
+            sources.discard(pos)
+            field.remove_source(pos)
+        else:
+            x, y = pos
+            pos = (x + 1, y)
+            sources.add(pos)
+            field.add_source(pos)
+
+        assert field.dist == DistanceField(env.world, sources).dist, i
+
+
+def test_planner_field_follows_cleaning(floorplan_002, generated):
+    for env_map in (floorplan_002, generated):
+        sim = Simulation(env_map, 1000, 1, planner=True)
+        env = sim.enviroment
+
+        for tick in range(0, 600, 50):
+            sim.run(50)
+            assert env.dirt_field().dist == DistanceField(env.world, env.index.dirt).dist
+
+
+def test_planner_cleans_everything(floorplan_002):
+    for seed in range(5):
+        assert Simulation(floorplan_002, 1000, seed, planner=True).run(1000)["dirt_remaining"] == 0
@@ -0,0 +1,26 @@
+from profiler import Profiler
+from simulation import Simulation
+
+
+def test_profiling_leaves_runs_unchanged(floorplan_002):
+    runs = []
+    for profiled in (False, True):
+        sim = Simulation(floorplan_002, 100, 2, dock=True, fast_forward=True)
+        profiler = Profiler()
+        if profiled:
+            profiler.attach_simulation(sim)
+            assert not sim.fast_forward
+
+        summary = sim.run(500)
+        summary.pop("wall_time")
+        runs.append((summary, str(sim.enviroment)))
+
+        profiler.detach()
+        assert sim.fast_forward
+        assert "act" not in vars(sim.robot)
+
+    assert runs[0] == runs[1]
+
+    stats = profiler.stats()
+    assert stats["phases"]["Robot.act"]["calls"] == runs[1][0]["ticks"]
+    assert sum(stats["decisions"]["Robot"].values()) == runs[1][0]["ticks"]
@@ -0,0 +1,66 @@
+from renderer import AnsiRenderer
+from simulation import Simulation
+import re
+
+
+ESCAPE = re.compile(r"\x1b\[(?:(\d+);(\d+)H|2J|2K)")
+
+
+def apply(screen: dict, frame: str):
+    """
+    Replay an ANSI frame onto screen, {(row, column): char}, 1 based
+    """
+    row = column = 1
+    i = 0
+    while i < len(frame):
+        match = ESCAPE.match(frame, i)
+        if match:
+            if match.group(0) == "\x1b[2J":
+                screen.clear()
+            elif match.group(1):
+                row, column = int(match.group(1)), int(match.group(2))
+            i = match.end()
+        elif frame[i] == "\n":
+            row, column = row + 1, 1
+            i += 1
+        else:
+            screen[(row, column)] = frame[i]
+            column += 1
+            i += 1
+
+
+def test_row_cache_matches_grid(generated):
+    sim = Simulation(generated, 100, 1, multi=True, dock=True)
+
+    for tick in range(300):
+        sim.step()
+        assert str(sim.enviroment) == str(sim.enviroment.world)
+
+
+def test_ansi_frames_rebuild_grid(floorplan_002):
+    sim = Simulation(floorplan_002, 100, 1)
+    view = AnsiRenderer(sim.enviroment, top=3)
+    screen = {}
+
+    for tick in range(300):
+        frame = view.render(["status"])
+        apply(screen, frame)
+
+        rows = str(sim.enviroment.world).split("\n")
+        assert all(screen.get((3 + y, x + 1)) == char for y, row in enumerate(rows) for x, char in enumerate(row))
+        if tick:
+            assert len(frame) < 200
+
+        sim.step()
+
+
+def test_grid_writes_reach_the_row_cache(floorplan_002):
+    env = Simulation(floorplan_002, 100, 1).enviroment
+    str(env)
+
+    env.world[1][1] = "q"
+    assert str(env) == str(env.world)
+
+    env.world.set(-2, 2, "q")
+    assert str(env) == str(env.world)
+    assert str(env).split("\n")[2][-2] == "q"
@@ -0,0 +1,44 @@
+from robot_logic import RobotLogicSystem
+from rule_config import rule_list
+from simulation import Simulation
+import random
+
+
+def test_compiled_matches_interpreted():
+    rng = random.Random(0)
+    systems = []
+    for compiled in (True, False):
+        logic = RobotLogicSystem(compiled, cache_size=0)
+        for conditions, conclusion in rule_list(planner=True, dock=True):
+            logic.add_rule(conditions, conclusion)
+        systems.append(logic)
+
+    facts = sorted({condition for logic in systems for rule in logic.rules for condition in rule["conditions"]} | {"unused"})
+
+    for i in range(2000):
+        chosen = rng.sample(facts, rng.randint(0, 6))
+        decisions = []
+        for logic in systems:
+            logic.reset_facts()
+            for fact in chosen:
+                logic.add_fact(fact)
+            decisions.append(logic.decide_action())
+
+        assert decisions[0] == decisions[1], chosen
+
+
+def test_compiled_run_matches_interpreted(floorplan_002, generated):
+    for env_map, options in [(floorplan_002, {"dock": True}), (generated, {"multi": True, "planner": True})]:
+        for seed in range(3):
+            runs = []
+            for compiled in (True, False):
+                sim = Simulation(env_map, 200, seed, **options)
+                for agent in sim.robots + sim.stations:
+                    agent.logic.compiled = compiled
+                    agent.logic.cache = None
+
+                summary = sim.run(500)
+                summary.pop("wall_time")
+                runs.append((summary, str(sim.enviroment)))
+
+            assert runs[0] == runs[1]
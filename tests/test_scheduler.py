@@ -0,0 +1,32 @@
+from simulation import Simulation
+
+
+def final_state(sim: Simulation, ticks: int) -> tuple:
+    frames = []
+    summary = sim.run(ticks, render_every=1, output=frames.append)
+    summary.pop("wall_time")
+
+    return (
+        summary,
+        frames,
+        str(sim.enviroment),
+        [(robot.position, robot.battery, robot.decision, robot.last_action, robot.senser_values) for robot in sim.robots],
+        [(station.decision, station.last_action, station.senser_values, str(station)) for station in sim.stations],
+    )
+
+
+def test_event_driven_matches_plain_loop(floorplan_001, floorplan_002, generated):
+    cases = [
+        (floorplan_001, {}),
+        (floorplan_002, {}),
+        (floorplan_002, {"dock": True}),
+        (generated, {"multi": True}),
+        (generated, {"multi": True, "dock": True, "planner": True}),
+    ]
+
+    for env_map, options in cases:
+        for seed in range(4):
+            plain = final_state(Simulation(env_map, 60, seed, **options), 1500)
+            events = final_state(Simulation(env_map, 60, seed, event_driven=True, **options), 1500)
+
+            assert plain == events, (env_map, options, seed)
@@ -0,0 +1,50 @@
+from server import SimulationServer, encode
+import asyncio
+import json
+import random
+
+
+async def request(reader, writer, message: dict) -> dict:
+    writer.write(encode(message))
+    return json.loads(await reader.readline())
+
+
+async def run_commands(floorplan: str, tmp_path) -> list:
+    server = SimulationServer(interval=0.0)
+    listener = await asyncio.start_unix_server(server.handle, str(tmp_path / "server.sock"))
+    reader, writer = await asyncio.open_unix_connection(str(tmp_path / "server.sock"))
+
+    bad_map = tmp_path / "empty.txt"
+    bad_map.write_text("xxxx\nx  x\nxxxx\n")
+
+    replies = [
+        await request(reader, writer, {"op": "start", "floorplan": str(tmp_path / "missing.txt")}),
+        await request(reader, writer, {"op": "start", "floorplan": str(bad_map)}),
+        await request(reader, writer, {"op": "start", "floorplan": floorplan, "ticks": "many"}),
+        await request(reader, writer, {"op": "subscribe", "sim": [0]}),
+        await request(reader, writer, {"op": "start", "floorplan": floorplan, "ticks": 5}),
+        await request(reader, writer, {"op": "list"}),
+    ]
+
+    writer.close()
+    listener.close()
+    await listener.wait_closed()
+    for session in server.sessions.values():
+        await session.task
+
+    return replies, server
+
+
+def test_bad_commands_get_error_replies(floorplan_002, tmp_path):
+    replies, server = asyncio.run(run_commands(floorplan_002, tmp_path))
+
+    assert [reply["type"] for reply in replies] == ["error", "error", "error", "error", "started", "sims"]
+    assert len(replies[-1]["sims"]) == 1
+
+
+def test_unseeded_sessions_get_own_rng(floorplan_002, tmp_path):
+    replies, server = asyncio.run(run_commands(floorplan_002, tmp_path))
+    env = server.sessions[0].sim.enviroment
+
+    assert env.rng is not random
+    assert server.sessions[0].sim.robot.rng is env.rng
@@ -0,0 +1,30 @@
+from environment import Environment
+from fleet import Fleet, place_robots
+from rule_config import DEFAULT_RULES
+from sharded import ShardedFleet
+
+
+def fleet_state(fleet: Fleet) -> tuple:
+    return (
+        bytes(fleet.cells),
+        fleet.tick,
+        fleet.cells_cleaned,
+        fleet.enviroment.dirt_remaining(),
+        [fleet.robot_state(i) for i in range(len(fleet))],
+    )
+
+
+def test_sharded_matches_single_process(generated):
+    tuned = {"order": list(reversed(DEFAULT_RULES["order"])), "battery_threshold": 5}
+
+    for seed, shards, rules in [(0, 2, None), (1, 3, None), (2, 4, tuned)]:
+        single = Fleet(Environment(generated), 120, seed, rules)
+        place_robots(single, 30, seed)
+        single.run(200)
+
+        sharded = Fleet(Environment(generated), 120, seed, rules)
+        place_robots(sharded, 30, seed)
+        ShardedFleet(sharded, shards).run(200)
+
+        assert fleet_state(sharded) == fleet_state(single), (seed, shards)
+        assert sharded.enviroment.index.robots == single.enviroment.index.robots
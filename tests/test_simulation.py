@@ -0,0 +1,63 @@
+from simulation import Simulation, run_simulation
+from environment import Environment
+import random
+import utils
+
+
+def test_headless_run_matches_main_loop(floorplan_002):
+    # main.py: robot acts while it has charge, then the station, module level RNG
+    for seed in range(5):
+        random.seed(seed)
+        env = Environment(floorplan_002)
+        robot = utils.Robot(env.robot_location, env.robot_ori, 100, env)
+        station = utils.Station(env.chargestation_location, env.station_ori, env, robot)
+        frames = []
+
+        for i in range(300):
+            if robot.battery < 1:
+                break
+            robot.act()
+            station.act()
+            frames.append(f"\n\n{robot}\n{station}\n{env}")
+
+        random.seed(seed)
+        sim = Simulation(floorplan_002)
+        output = []
+        summary = sim.run(300, render_every=1, output=output.append)
+
+        assert output == frames
+        assert summary["ticks"] == len(frames)
+        assert summary["final_battery"] == robot.battery
+
+
+def test_run_simulation_summary(floorplan_002):
+    summary = run_simulation(floorplan_002, 1000, seed=1)
+
+    assert summary["ticks"] == len(summary["battery_curve"]) - 1
+    assert summary["battery_curve"][0] == 100
+    assert summary["battery_dead"] == (summary["final_battery"] <= 0)
+    assert 0 < summary["coverage"] <= 100
+
+
+def run_state(sim: Simulation, ticks: int) -> tuple:
+    summary = sim.run(ticks)
+    summary.pop("wall_time")
+    return summary, str(sim.enviroment), [(robot.position, robot.decision) for robot in sim.robots]
+
+
+def test_seeded_runs_own_their_rng(floorplan_002, generated):
+    for env_map, options in [(floorplan_002, {}), (generated, {"multi": True, "dock": True})]:
+        alone = run_state(Simulation(env_map, 200, 7, **options), 400)
+
+        # module level random untouched, interleaved runs don't share a stream
+        random.seed(0)
+        state = random.getstate()
+        a = Simulation(env_map, 200, 7, **options)
+        b = Simulation(env_map, 200, 8, **options)
+        for tick in range(400):
+            a.step()
+            b.step()
+
+        assert random.getstate() == state
+        assert run_state(a, 0) == alone
+        assert run_state(b, 0) != alone
@@ -0,0 +1,45 @@
+from simulation import Simulation
+from chargingstation import Station
+
+
+def adjacent(a: tuple, b: tuple) -> bool:
+    return abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1
+
+
+def test_station_only_charges_adjacent_robot(generated):
+    # single robot mode on a multi robot map, the other robot glyphs are not simulated
+    for seed in range(10):
+        sim = Simulation(generated, 100, seed, dock=True)
+
+        for tick in range(1000):
+            battery = sim.robot.battery
+            if not sim.step():
+                break
+
+            if sim.station.last_action.startswith("Charged"):
+                assert adjacent(sim.station.position, sim.robot.position), (seed, tick)
+            elif sim.robot.last_action != "docked":
+                assert sim.robot.battery == battery - 1
+
+
+def test_station_ignores_unsimulated_robot(generated):
+    sim = Simulation(generated, 100, 0)
+    env = sim.enviroment
+
+    # a station away from the robot, paired with it as in single robot mode
+    position, ori = next((pos, ori) for pos, ori in env.stations() if not adjacent(pos, sim.robot.position))
+    station = Station(position, ori, env, sim.robot)
+
+    # an unregistered robot glyph next to the station
+    x, y = position
+    for dx, dy in [(0, -1), (1, 0), (0, 1), (-1, 0)]:
+        if env.world.get(x + dx, y + dy) in " 0":
+            env.world.set(x + dx, y + dy, "^")
+            break
+
+    sim.robot.battery = 50
+    station.act()
+
+    assert station.decision.startswith("charge_")
+    assert station.last_action == "idle"
+    assert sim.robot.battery == 50
@@ -0,0 +1,48 @@
+from simulation import Simulation
+from trajectory import TrajectoryRecorder, read_trajectory, replay
+import pytest
+
+
+def test_replay_rebuilds_every_tick(floorplan_002, generated, tmp_path):
+    path = str(tmp_path / "run.traj")
+
+    for env_map, options in [(floorplan_002, {}), (generated, {"multi": True, "dock": True, "planner": True})]:
+        sim = Simulation(env_map, 200, 4, **options)
+        frames = {}
+
+        with sim.record(path):
+            for tick in range(600):
+                if not sim.step():
+                    break
+                if tick % 37 == 0:
+                    frames[sim.tick] = (str(sim.enviroment), sim.enviroment.dirt_remaining(), sim.robot.position, sim.robot.battery, sim.robot.decision, sim.station.last_action)
+
+        frames[sim.tick] = (str(sim.enviroment), sim.enviroment.dirt_remaining(), sim.robot.position, sim.robot.battery, sim.robot.decision, sim.station.last_action)
+
+        for tick, frame in frames.items():
+            env, robot, station = replay(path, tick)
+            assert (str(env), env.dirt_remaining(), robot["position"], robot["battery"], robot["decision"], station["action"]) == frame
+
+
+def test_large_battery_is_recorded(floorplan_002, tmp_path):
+    path = str(tmp_path / "run.traj")
+
+    with TrajectoryRecorder(path, floorplan_002) as recorder:
+        recorder.record_robot(1, 0, (1, 1), "^", "move_forward", 50000)
+
+    env_map, crc, records = read_trajectory(path)
+    assert list(records)[0][5] == 50000
+
+
+def test_replay_refuses_changed_floorplan(floorplan_002, tmp_path):
+    env_map = tmp_path / "map.txt"
+    env_map.write_text(open(floorplan_002).read())
+    path = str(tmp_path / "run.traj")
+
+    sim = Simulation(str(env_map), 100, 1)
+    with sim.record(path):
+        sim.run(10)
+
+    env_map.write_text(open(floorplan_002).read() + "x\n")
+    with pytest.raises(ValueError):
+        replay(path)
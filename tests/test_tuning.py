@@ -0,0 +1,27 @@
+from tuning import RuleSearch, score_run
+from rule_config import DEFAULT_RULES
+
+
+def test_race_ranks_on_shared_seeds():
+    search = RuleSearch(["a.txt", "b.txt"], seeds=4, min_seeds=1)
+    search.evaluate = lambda pool, candidates, seeds: None
+
+    parent = DEFAULT_RULES
+    child = search.mutate(parent)
+    while search.key(child) == search.key(parent):
+        child = search.mutate(parent)
+
+    # parent fully scored, weak on seed 0; child strong on seed 0 only
+    search.scores[search.key(parent)] = [10, 10] + [100] * 6
+    search.scores[search.key(child)] = [50, 50] + [0] * 6
+
+    assert search.mean(parent) > search.mean(child)
+    assert search.mean(parent, 1) < search.mean(child, 1)
+
+    # the first halving round compares seed 0 of both, the parent is cut there
+    assert search.race(None, [parent, child], 1) == [child]
+
+
+def test_score_run_is_seeded(floorplan_002):
+    job = (floorplan_002, 3, 400, 100, DEFAULT_RULES, False, False)
+    assert score_run(job) == score_run(job)
@@ -0,0 +1,243 @@
+from environment import Environment
+import argparse
+import os
+import struct
+import zlib
+
+
+MAGIC = b"CRTRAJ02"
+
+# magic, floorplan crc32, path length (utf-8 path follows)
+HEADER = struct.Struct("<8sIH")
+
+# record kind byte, then the record
+ROBOT, STATION, STRING = 1, 2, 3
+
+# kind, tick, robot id, x, y, orientation, battery, decision string id
+ROBOT_RECORD = struct.Struct("<BIHIIBiH")
+
+# kind, tick, station id, action string id
+STATION_RECORD = struct.Struct("<BIHH")
+
+# kind, string id, length (utf-8 bytes follow)
+STRING_RECORD = struct.Struct("<BHH")
+
+GLYPHS = ["^", ">", "v", "<"]
+NO_STRING = 0xFFFF
+
+
+def floorplan_crc(env_map: str) -> int:
+    with open(env_map, "rb") as file:
+        return zlib.crc32(file.read())
+
+
+class TrajectoryRecorder:
+    """
+    Append only binary run log. One fixed size record per robot / station
+    per tick (position, orientation, decision, battery, station action),
+    decisions stored as ids into a string table that is written inline the
+    first time each str is seen. Records collect in a buffer and are written
+    in chunks of chunk_size bytes.
+
+    The floorplan is referenced by path + crc32, replay rebuilds the grid
+    from it plus the recorded moves (see replay).
+    """
+
+    def __init__(self, path: str, env_map: str, chunk_size: int = 1 << 16):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.strings = {}
+        self.buffer = bytearray()
+        self.records = 0
+
+        encoded = os.path.abspath(env_map).encode("utf-8")
+        self.file = open(path, "wb")
+        self.buffer += HEADER.pack(MAGIC, floorplan_crc(env_map), len(encoded)) + encoded
+
+    def string_id(self, value: str | None) -> int:
+        """
+        Id of value in the string table, new strs are added to the log
+        """
+        if value is None:
+            return NO_STRING
+
+        string_id = self.strings.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings[value] = string_id
+
+            encoded = value.encode("utf-8")
+            self.buffer += STRING_RECORD.pack(STRING, string_id, len(encoded)) + encoded
+
+        return string_id
+
+    def record_robot(self, tick: int, robot_id: int, position: tuple, ori: str, decision: str | None, battery: int):
+        x, y = position
+        decision_id = self.string_id(decision)
+        self.buffer += ROBOT_RECORD.pack(ROBOT, tick, robot_id, x, y, GLYPHS.index(ori), battery, decision_id)
+        self.records += 1
+
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def record_station(self, tick: int, station_id: int, action: str | None):
+        action_id = self.string_id(action)
+        self.buffer += STATION_RECORD.pack(STATION, tick, station_id, action_id)
+        self.records += 1
+
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def record(self, sim):
+        """
+        Log every robot and station of a Simulation after its current tick
+        """
+        for robot_id, robot in enumerate(sim.robots):
+            self.record_robot(sim.tick, robot_id, robot.position, robot.orientation, robot.decision, robot.battery)
+
+        for station_id, station in enumerate(sim.stations):
+            self.record_station(sim.tick, station_id, station.last_action)
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer.clear()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_trajectory(path: str):
+    """
+    Read a trajectory log
+
+    :return: tuple (floorplan path, floorplan crc32, generator of records).
+             records are ("robot", tick, robot id, (x, y), ori, battery, decision)
+             and ("station", tick, station id, action), strs resolved
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+
+    magic, crc, length = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a trajectory log")
+
+    offset = HEADER.size
+    env_map = data[offset:offset + length].decode("utf-8")
+
+    def records():
+        strings = {}
+        view = memoryview(data)
+        i = offset + length
+
+        while i < len(data):
+            kind = data[i]
+
+            if kind == ROBOT:
+                _, tick, robot_id, x, y, ori, battery, decision = ROBOT_RECORD.unpack_from(view, i)
+                i += ROBOT_RECORD.size
+                yield ("robot", tick, robot_id, (x, y), GLYPHS[ori], battery, strings.get(decision))
+
+            elif kind == STATION:
+                _, tick, station_id, action = STATION_RECORD.unpack_from(view, i)
+                i += STATION_RECORD.size
+                yield ("station", tick, station_id, strings.get(action))
+
+            elif kind == STRING:
+                _, string_id, size = STRING_RECORD.unpack_from(view, i)
+                i += STRING_RECORD.size
+                strings[string_id] = bytes(view[i:i + size]).decode("utf-8")
+                i += size
+
+            else:
+                raise ValueError(f"bad record kind {kind} at byte {i}")
+
+    return env_map, crc, records()
+
+
+def replay(path: str, tick: int | None = None, env_map: str | None = None, robot_id: int = 0) -> tuple:
+    """
+    Rebuild the Environment as it was after tick (None = end of the log)
+    from the floorplan plus the recorded robot moves / turns / cleans.
+    Robot ids are the row major order of the robots on the map
+
+    :param: env_map  floorplan to use instead of the recorded path
+            robot_id  robot / station whose last record is returned
+    :return: tuple (Environment, dict of the last robot record, dict of the last station record)
+    """
+    recorded_map, crc, records = read_trajectory(path)
+    env_map = env_map or recorded_map
+
+    if floorplan_crc(env_map) != crc:
+        raise ValueError(f"{env_map} has changed since the run was recorded")
+
+    env = Environment(env_map)
+    robots = [
+        {"tick": 0, "position": pos, "orientation": ori, "battery": None, "decision": None}
+        for pos, ori in env.robots()
+    ]
+    station = {"tick": 0, "action": None}
+
+    for record in records:
+        if tick is not None and record[1] > tick:
+            break
+
+        if record[0] == "station":
+            if record[2] == robot_id:
+                station = {"tick": record[1], "action": record[3]}
+            continue
+
+        _, t, i, position, ori, battery, decision = record
+        robot = robots[i]
+
+        # same grid updates as Robot.act, from the recorded outcome
+        if position != robot["position"]:
+            env.move_robot(position, ori, robot["position"])
+        elif ori != robot["orientation"]:
+            env.rotate_robot(position, ori)
+
+        if decision is not None and "clean" in decision:
+            env.clear_cell(position)
+
+        robots[i] = {"tick": t, "position": position, "orientation": ori, "battery": battery, "decision": decision}
+
+    return env, robots[robot_id], station
+
+
+def format_state(env: Environment, robot: dict, station: dict) -> str:
+    """
+    Output messages for a replayed tick
+    """
+    return (
+        f"\n        -- Replay Tick {robot['tick']} -- \n"
+        f"Position                  :   {robot['position']} \n"
+        f"Facing                    :   {robot['orientation']} \n"
+        f"Decision                  :   {robot['decision']} \n"
+        f"Battery                   :   {robot['battery']}% \n"
+        f"Station Action            :   {station['action']} \n"
+        f"Dirt Remaining            :   {env.dirt_remaining()} \n\n"
+        f"{env}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded run (simulation.py --record) at any tick")
+    parser.add_argument("log")
+    parser.add_argument("--tick", type=int, default=None, help="tick to rebuild, default the last one")
+    parser.add_argument("--floorplan", default=None, help="floorplan to use instead of the recorded path")
+    parser.add_argument("--robot", type=int, default=0, help="robot (and station) id to show, row major order on the map")
+    args = parser.parse_args(argv)
+
+    print(format_state(*replay(args.log, args.tick, args.floorplan, args.robot)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+from simulation import Simulation
+from rule_config import RULE_GROUPS, MODE_GROUPS, DEFAULT_RULES, save_rules
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import glob
+import random
+import statistics
+import time
+
+
+def score_run(job: tuple) -> float:
+    """
+    Single seeded run of one rule set, executed inside a worker process.
+            Score is 100 * the share of the starting dirt the robot cleaned
+            itself (dirt wiped by driving over it does not count), plus up to
+            10 for having it all cleaned early. Maps without dirt score 100
+
+    :param: job  tuple (floorplan path, seed, ticks, charge, rules, planner, dock)
+    :return: float
+    """
+    env_map, seed, ticks, charge, rules, planner, dock = job
+
+    sim = Simulation(env_map, charge, seed, planner, dock, fast_forward=True, rules=rules)
+    dirt = sim.enviroment.dirt_remaining()
+    summary = sim.run(ticks)
+
+    if not dirt:
+        return 100.0
+
+    score = 100 * min(summary["cells_cleaned"], dirt) / dirt
+    if summary["clean_tick"] is not None and summary["cells_cleaned"] >= dirt:
+        score += 10 * (1 - summary["clean_tick"] / ticks)
+
+    return score
+
+
+def rules_key(rules: dict, planner: bool, dock: bool) -> tuple:
+    """
+    Candidates that add the same rules (mode groups left out) are the same candidate
+    """
+    modes = {"dock": dock, "planner": planner}
+    order = tuple(group for group in rules["order"] if group not in MODE_GROUPS or modes[group])
+
+    return order, rules["battery_threshold"]
+
+
+class RuleSearch:
+    """
+    (mu + lambda) evolutionary search over rule group orders and the
+    battery_dead threshold. Each generation mutates the parents (swap or
+    move a rule group, nudge the threshold) and races parents + children
+    by successive halving: every candidate is scored on min_seeds seeded
+    runs per floorplan, the better half goes on to twice the seeds, and so
+    on up to seeds, so weak candidates stop early. Every candidate sees the
+    same seeds, and scores are kept, so survivors are never re-run.
+
+    The search stops after generations, or after patience generations
+    without the best mean improving by more than tolerance.
+    """
+
+    def __init__(self, floorplans: list, seeds: int = 32, min_seeds: int = 4, ticks: int = 1000, charge: int = 100, planner: bool = False, dock: bool = False, workers: int | None = None, seed: int = 0, max_threshold: int = 50):
+        self.floorplans = floorplans
+        self.seeds = seeds
+        self.min_seeds = min(min_seeds, seeds)
+        self.ticks = ticks
+        self.charge = charge
+        self.planner = planner
+        self.dock = dock
+        self.workers = workers
+        self.rng = random.Random(seed)
+        self.max_threshold = max_threshold
+        self.scores = {}            # candidate key -> list of run scores, seed order
+        self.history = []           # per generation (best rules, best mean, runs so far)
+        self.runs = 0
+
+        modes = {"dock": dock, "planner": planner}
+        self.movable = [group for group in RULE_GROUPS if group not in MODE_GROUPS or modes[group]]
+
+    def key(self, rules: dict) -> tuple:
+        return rules_key(rules, self.planner, self.dock)
+
+    def evaluate(self, pool, candidates: list, seeds: int):
+        """
+        Score every candidate on the first seeds seeds of each floorplan, in parallel
+        """
+        jobs = []
+        owners = []
+
+        for rules in candidates:
+            done = len(self.scores.setdefault(self.key(rules), [])) // len(self.floorplans)
+            for seed in range(done, seeds):
+                for env_map in self.floorplans:
+                    jobs.append((env_map, seed, self.ticks, self.charge, rules, self.planner, self.dock))
+                    owners.append(self.key(rules))
+
+        chunksize = max(1, len(jobs) // (4 * (self.workers or 4)))
+
+        for key, score in zip(owners, pool.map(score_run, jobs, chunksize=chunksize)):
+            self.scores[key].append(score)
+
+        self.runs += len(jobs)
+
+    def mean(self, rules: dict, seeds: int | None = None) -> float:
+        """
+        Mean score over the first seeds seeds of each floorplan (None = every run so far),
+        so candidates raced together are compared on the same runs
+        """
+        scores = self.scores[self.key(rules)]
+        if seeds is not None:
+            scores = scores[:seeds * len(self.floorplans)]
+
+        return statistics.fmean(scores)
+
+    def race(self, pool, candidates: list, keep: int) -> list:
+        """
+        Successive halving down to keep candidates, best first
+        """
+        seeds = self.min_seeds
+
+        while True:
+            self.evaluate(pool, candidates, seeds)
+            candidates.sort(key=lambda rules: self.mean(rules, seeds), reverse=True)
+
+            if seeds >= self.seeds:
+                return candidates[:keep]
+
+            candidates = candidates[:max(keep, len(candidates) // 2)]
+            seeds = min(self.seeds, seeds * 2)
+
+    def mutate(self, rules: dict) -> dict:
+        order = list(rules["order"])
+        threshold = rules["battery_threshold"]
+        kind = self.rng.random()
+
+        if kind < 0.4:
+            # swap two rule groups
+            a, b = self.rng.sample(self.movable, 2)
+            i, j = order.index(a), order.index(b)
+            order[i], order[j] = order[j], order[i]
+
+        elif kind < 0.8:
+            # move one rule group somewhere else
+            group = self.rng.choice(self.movable)
+            order.remove(group)
+            order.insert(self.rng.randrange(len(order) + 1), group)
+
+        else:
+            threshold = min(self.max_threshold, max(0, threshold + self.rng.choice([-3, -2, -1, 1, 2, 3])))
+
+        return {"order": order, "battery_threshold": threshold}
+
+    def run(self, generations: int = 10, population: int = 8, parents: int = 2, patience: int = 3, tolerance: float = 0.01, start: dict | None = None, report=print) -> dict:
+        """
+        :param: generations  int max generations
+                population  int children per generation
+                parents  int survivors kept from each generation
+                patience  int generations without improvement before stopping
+                start  dict rule set to start from, default DEFAULT_RULES
+                report  callable, called with a line per generation
+        :return: dict   best rule set (start if nothing beat it)
+        """
+        best = start or DEFAULT_RULES
+        survivors = [best]
+        stale = 0
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            # the starting rule set is scored in full, it is what the search has to beat
+            self.evaluate(pool, [best], self.seeds)
+            best_mean = self.mean(best)
+            report(f"start  score {best_mean:.3f}  threshold {best['battery_threshold']}  order {' > '.join(self.key(best)[0])}  runs {self.runs}")
+
+            for generation in range(generations):
+                seen = {self.key(rules) for rules in survivors}
+                children = []
+
+                # children that differ from every rule set in this race
+                for attempt in range(population * 10):
+                    if len(children) == population:
+                        break
+                    child = self.mutate(self.rng.choice(survivors))
+                    if self.key(child) not in seen:
+                        seen.add(self.key(child))
+                        children.append(child)
+
+                survivors = self.race(pool, survivors + children, parents)
+                mean = self.mean(survivors[0])
+                self.history.append((survivors[0], mean, self.runs))
+
+                report(f"generation {generation}  best {mean:.3f}  threshold {survivors[0]['battery_threshold']}  order {' > '.join(self.key(survivors[0])[0])}  runs {self.runs}")
+
+                if mean > best_mean:
+                    best = survivors[0]
+
+                if mean <= best_mean + tolerance:
+                    stale += 1
+                    if stale >= patience:
+                        report(f"no improvement for {patience} generations, stopping")
+                        break
+                else:
+                    stale = 0
+
+                best_mean = max(best_mean, mean)
+
+        return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search robot rule orders / battery threshold on seeded runs, write the best as a rule config")
+    parser.add_argument("floorplans", nargs="*", default=sorted(glob.glob("./floorplans/*.txt")))
+    parser.add_argument("--generations", type=int, default=10)
+    parser.add_argument("--population", type=int, default=8, help="children per generation")
+    parser.add_argument("--parents", type=int, default=2, help="rule sets kept each generation")
+    parser.add_argument("--patience", type=int, default=3, help="generations without improvement before stopping")
+    parser.add_argument("--seeds", type=int, default=32, help="seeds per floorplan for a fully scored rule set")
+    parser.add_argument("--min-seeds", type=int, default=4, help="seeds per floorplan in the first halving round")
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--charge", type=int, default=100)
+    parser.add_argument("--planner", action="store_true")
+    parser.add_argument("--dock", action="store_true")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the search itself")
+    parser.add_argument("--out", default="best_rules.json", help="rule config to write (load with simulation.py --rules)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    search = RuleSearch(args.floorplans, args.seeds, args.min_seeds, args.ticks, args.charge, args.planner, args.dock, args.workers, args.seed)
+    best = search.run(args.generations, args.population, args.parents, args.patience)
+
+    info = {
+        "score"         : search.mean(best),
+        "default_score" : search.mean(DEFAULT_RULES),
+        "runs"          : search.runs,
+        "floorplans"    : args.floorplans,
+        "seeds"         : args.seeds,
+        "ticks"         : args.ticks,
+        "planner"       : args.planner,
+        "dock"          : args.dock,
+    }
+    save_rules(best, args.out, **info)
+
+    print(f"\nbest {info['score']:.3f} (default {info['default_score']:.3f}) from {search.runs} runs in {time.perf_counter() - start:.2f}s, written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()